@@ -0,0 +1,246 @@
+import argparse
+import asyncio
+import json
+import os
+import random
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from conversation_context import parse_setup
+from performance_test_assistant import PerformanceTestAssistant, cache_from_environment
+from response_cache import FakeModel
+
+DEFAULT_CONCURRENCY = 8
+DEFAULT_MAX_RETRIES = 5
+DEFAULT_OUTPUT_DIR = 'jmeter-tests/test-plans'
+
+# Exception class names the Gemini SDK (google.api_core) raises when throttled
+RATE_LIMIT_ERRORS = ('ResourceExhausted', 'TooManyRequests', 'ServiceUnavailable', 'DeadlineExceeded')
+
+STUB_SETUP = """TEST TYPE: Load Test - steady traffic at expected peak
+
+TEST PARAMETERS:
+- Users/Threads: 100
+- Ramp-up Period: 30
+- Duration: 300
+- Think Time: 1000
+
+REQUIRED INFORMATION:
+- Target URL: endpoint under test"""
+
+
+def load_manifest(path):
+    """Load a JSON or YAML manifest of test requirements
+
+    The manifest is either a list of items or a mapping with an `items` list
+    (plus optional `output_dir`). Each item is a requirement string or a
+    mapping with `requirement` and optional `name`.
+    """
+    with open(path, encoding='utf-8') as f:
+        if path.endswith(('.yaml', '.yml')):
+            try:
+                import yaml
+            except ImportError:
+                raise RuntimeError("PyYAML is required for YAML manifests: pip install pyyaml")
+            data = yaml.safe_load(f)
+        else:
+            data = json.load(f)
+
+    options = {}
+    if isinstance(data, dict):
+        options = {key: value for key, value in data.items() if key != 'items'}
+        data = data.get('items', [])
+
+    items = []
+    for position, entry in enumerate(data):
+        if isinstance(entry, str):
+            entry = {'requirement': entry}
+        if not entry.get('requirement'):
+            raise ValueError(f"Manifest item {position} has no 'requirement'")
+        entry.setdefault('name', f"item_{position + 1}")
+        items.append(entry)
+    return items, options
+
+
+def extract_test_type(setup, default='performance_test'):
+    """Return the test type name from a 'TEST TYPE:' line, for the filename"""
+    test_type = parse_setup(setup)['test_type']
+    if not test_type:
+        return default
+    name = test_type.split(' - ')[0].strip()
+    name = ''.join(c if c.isalnum() else '_' for c in name).strip('_')
+    return name or default
+
+
+def is_rate_limit_error(error):
+    """Whether an exception looks like API throttling worth retrying"""
+    if type(error).__name__ in RATE_LIMIT_ERRORS:
+        return True
+    message = str(error).lower()
+    return '429' in message or 'rate limit' in message or 'quota' in message
+
+
+class BatchGenerator:
+    """Generate many test plans concurrently with bounded parallelism
+
+    Each manifest item runs get_test_setup_suggestion -> generate_jmx ->
+    save_jmx on its own PerformanceTestAssistant. At most `concurrency` items
+    are in flight; blocking SDK calls run on a thread pool. Throttling errors
+    are retried with exponential backoff and jitter, and a throttled call
+    pauses every worker until the shared cool-down has passed. All items
+    share one response cache: `cache`, or TYPHON_CACHE_PATH when it is set.
+    """
+
+    def __init__(self, model=None, cache=None, concurrency=DEFAULT_CONCURRENCY,
+                 max_retries=DEFAULT_MAX_RETRIES, base_delay=1.0, max_delay=60.0,
+                 output_dir=DEFAULT_OUTPUT_DIR):
+        self.model = model
+        self.cache = cache
+        self.concurrency = concurrency
+        self.max_retries = max_retries
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.output_dir = output_dir
+        self._cooldown_until = 0.0
+
+    async def _call(self, loop, executor, func, *args):
+        """Run a blocking call on the pool, retrying on rate-limit errors"""
+        attempt = 0
+        while True:
+            wait = self._cooldown_until - time.monotonic()
+            if wait > 0:
+                await asyncio.sleep(wait)
+            try:
+                return await loop.run_in_executor(executor, func, *args), attempt
+            except Exception as e:
+                if attempt >= self.max_retries or not is_rate_limit_error(e):
+                    raise
+                delay = min(self.max_delay, self.base_delay * (2 ** attempt))
+                delay += random.uniform(0, delay / 2)
+                self._cooldown_until = max(self._cooldown_until, time.monotonic() + delay)
+                attempt += 1
+
+    async def _generate_one(self, loop, executor, semaphore, cache, item):
+        async with semaphore:
+            result = {'name': item['name'], 'requirement': item['requirement'], 'retries': 0}
+            started = time.perf_counter()
+            try:
+                assistant = PerformanceTestAssistant(model=self.model, cache=cache)
+
+                stage_started = time.perf_counter()
+                setup, retries = await self._call(loop, executor, assistant.get_test_setup_suggestion,
+                                                  item['requirement'])
+                result['setup_seconds'] = time.perf_counter() - stage_started
+                result['retries'] += retries
+
+                stage_started = time.perf_counter()
+                jmx, retries = await self._call(loop, executor, assistant.generate_jmx, setup)
+                result['jmx_seconds'] = time.perf_counter() - stage_started
+                result['retries'] += retries
+
+                test_type = item.get('test_type') or extract_test_type(setup)
+                name = f"{item['name']}_{test_type}" if item.get('name') else test_type
+                output_dir = item.get('output_dir', self.output_dir)
+                result['file'] = await loop.run_in_executor(executor, assistant.save_jmx, jmx, name, output_dir)
+                result['status'] = 'ok'
+            except Exception as e:
+                result['status'] = 'failed'
+                result['error'] = f"{type(e).__name__}: {e}"
+            result['latency_seconds'] = time.perf_counter() - started
+            return result
+
+    async def run_async(self, items):
+        loop = asyncio.get_running_loop()
+        semaphore = asyncio.Semaphore(self.concurrency)
+        started = time.perf_counter()
+        cache = self.cache if self.cache is not None else cache_from_environment()
+        try:
+            with ThreadPoolExecutor(max_workers=self.concurrency) as executor:
+                results = await asyncio.gather(
+                    *(self._generate_one(loop, executor, semaphore, cache, item) for item in items)
+                )
+        finally:
+            if cache is not None and cache is not self.cache:
+                cache.close()
+        return summarize(results, time.perf_counter() - started, self.concurrency)
+
+    def run(self, items):
+        return asyncio.run(self.run_async(items))
+
+
+def summarize(results, wall_seconds, concurrency):
+    """Build the batch summary: per-item results plus overall throughput"""
+    latencies = sorted(result['latency_seconds'] for result in results)
+    succeeded = sum(1 for result in results if result['status'] == 'ok')
+
+    def pct(p):
+        if not latencies:
+            return None
+        return latencies[min(len(latencies) - 1, max(0, -(-len(latencies) * p // 100) - 1))]
+
+    return {
+        'items': len(results),
+        'succeeded': succeeded,
+        'failed': len(results) - succeeded,
+        'concurrency': concurrency,
+        'wall_seconds': wall_seconds,
+        'plans_per_minute': len(results) / wall_seconds * 60 if wall_seconds > 0 else 0.0,
+        'latency_p50_seconds': pct(50),
+        'latency_p95_seconds': pct(95),
+        'latency_max_seconds': latencies[-1] if latencies else None,
+        'retries': sum(result['retries'] for result in results),
+        'results': results,
+    }
+
+
+def format_batch_summary(summary):
+    lines = []
+    for result in summary['results']:
+        if result['status'] == 'ok':
+            lines.append(f"  ok      {result['latency_seconds']:7.2f}s  {result['name']} -> {result['file']}")
+        else:
+            lines.append(f"  FAILED  {result['latency_seconds']:7.2f}s  {result['name']}: {result['error']}")
+    lines.append("")
+    lines.append(f"Generated {summary['succeeded']}/{summary['items']} plans in {summary['wall_seconds']:.1f}s "
+                 f"({summary['plans_per_minute']:.1f} plans/min, concurrency {summary['concurrency']}, "
+                 f"{summary['retries']} retries)")
+    if summary['latency_p50_seconds'] is not None:
+        lines.append(f"Per-item latency: p50 {summary['latency_p50_seconds']:.2f}s, "
+                     f"p95 {summary['latency_p95_seconds']:.2f}s, max {summary['latency_max_seconds']:.2f}s")
+    return "\n".join(lines)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Generate JMeter test plans for every requirement in a manifest")
+    parser.add_argument('manifest', help='JSON or YAML manifest of test requirements')
+    parser.add_argument('--concurrency', type=int, help=f'Parallel LLM requests (default {DEFAULT_CONCURRENCY})')
+    parser.add_argument('--max-retries', type=int, default=DEFAULT_MAX_RETRIES,
+                        help='Retries per call on rate-limit errors')
+    parser.add_argument('--output-dir', help=f'Where plans are saved (default {DEFAULT_OUTPUT_DIR})')
+    parser.add_argument('--summary', help='Write the JSON summary to this file')
+    parser.add_argument('--stub', action='store_true', help='Use an offline stub model instead of Gemini')
+    args = parser.parse_args(argv)
+
+    items, options = load_manifest(args.manifest)
+    generator = BatchGenerator(
+        model=FakeModel(STUB_SETUP) if args.stub else None,
+        concurrency=args.concurrency or options.get('concurrency', DEFAULT_CONCURRENCY),
+        max_retries=args.max_retries,
+        output_dir=args.output_dir or options.get('output_dir', DEFAULT_OUTPUT_DIR),
+    )
+    summary = generator.run(items)
+    print(format_batch_summary(summary))
+
+    if args.summary:
+        directory = os.path.dirname(args.summary)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        with open(args.summary, 'w') as f:
+            json.dump(summary, f, indent=2)
+        print(f"\nSummary written to: {args.summary}")
+    return 0 if summary['failed'] == 0 else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
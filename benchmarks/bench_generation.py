@@ -0,0 +1,190 @@
+"""Benchmark the generation hot path offline and track it across commits
+
+Runs suggestion, refinement, buffered and streamed JMX generation and the
+template path against an offline model, then reports the per-span timings
+and per-generation counters recorded by telemetry.py. Each run is appended
+to a JSON-lines history tagged with the git commit and compared with the
+latest record from another commit with the same settings, so a regression
+in prompt building, cleanup, sanitization or saving shows up as a delta.
+
+Usage:
+    python benchmarks/bench_generation.py --iterations 200
+    python benchmarks/bench_generation.py --latency-ms 50 --cache
+    python benchmarks/bench_generation.py --profile generation.prof --trace-memory
+    python telemetry.py .typhon/bench-generation.jsonl --span jmx.sanitize
+"""
+import argparse
+import contextlib
+import os
+import subprocess
+import sys
+import tempfile
+import time
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..')
+sys.path.insert(0, ROOT)
+
+from batch_generator import STUB_SETUP  # noqa: E402
+from jmx_templates import render_plan  # noqa: E402
+from performance_test_assistant import PerformanceTestAssistant  # noqa: E402
+from response_cache import FakeModel, ResponseCache  # noqa: E402
+from telemetry import TELEMETRY, profiled, read_jsonl  # noqa: E402
+
+DEFAULT_HISTORY = os.path.join('.typhon', 'bench-generation.jsonl')
+
+TEMPLATE_SETUP = """TEST TYPE: Load Test
+TEST PARAMETERS:
+- Number of Users: 50
+- Ramp-up Period: 30 seconds
+- Test Duration: 300 seconds
+REQUIRED INFORMATION:
+- Target URL: https://api.example.com/orders"""
+
+# Elements and save-config fields the sanitizer has to strip from model output
+LEGACY_ELEMENTS = """<BSFSampler guiclass="TestBeanGUI" testclass="BSFSampler" testname="Legacy Script" enabled="true">
+          <stringProp name="scriptLanguage">javascript</stringProp>
+        </BSFSampler>
+        <hashTree/>
+        <ResponseTimeAssertion guiclass="TestBeanGUI" testclass="ResponseTimeAssertion" testname="SLA" enabled="true"/>
+        <hashTree/>
+        """
+
+
+def model_plan_reply():
+    """A chatty model reply wrapping a plan that needs sanitizing"""
+    spec = {'test_type': 'load', 'name': 'Checkout Load', 'threads': 100, 'ramp_up': 30, 'duration': 300,
+            'url': 'https://shop.example.com/checkout', 'think_time': 1000}
+    plan = render_plan(spec, use_plugins=False)
+    plan = plan[plan.index('<jmeterTestPlan'):]
+    plan = plan.replace('<ConstantTimer ', LEGACY_ELEMENTS + '<ConstantTimer ', 1)
+    plan = plan.replace('<time>true</time>', '<time>true</time>\n            <sampleCount>true</sampleCount>'
+                        '\n            <errorCount>true</errorCount>', 1)
+    return f"Here is the JMeter test plan you asked for:\n\n```xml\n{plan}\n```\n\nAdjust the domain as needed."
+
+
+class SlowModel:
+    """Delay every response (and the first streamed chunk) by a fixed latency"""
+
+    def __init__(self, model, latency):
+        self.model = model
+        self.latency = latency
+
+    def generate_content(self, prompt, stream=False, **kwargs):
+        time.sleep(self.latency)
+        return self.model.generate_content(prompt, stream=stream, **kwargs)
+
+
+def offline_model(latency_ms):
+    reply = model_plan_reply()
+    model = FakeModel(responder=lambda prompt: reply if 'XML format' in prompt else STUB_SETUP)
+    return SlowModel(model, latency_ms / 1000) if latency_ms else model
+
+
+def run_iteration(model, cache, output_dir):
+    """One pass over every generation path"""
+    assistant = PerformanceTestAssistant(model=model, cache=cache, use_templates=False)
+    setup = assistant.get_test_setup_suggestion("Load test the checkout API at https://shop.example.com/checkout")
+    assistant.refine_setup("Use 100 users and add an OAuth2 token per user")
+    assistant.save_jmx(assistant.generate_jmx(setup), 'buffered', output_dir)
+    assistant.generate_and_save_jmx(setup, 'streamed', output_dir)
+    PerformanceTestAssistant(model=model, cache=cache).generate_and_save_jmx(TEMPLATE_SETUP, 'template', output_dir)
+
+
+def git_commit():
+    """Short HEAD commit, with -dirty for uncommitted changes; None outside git"""
+    try:
+        commit = subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], cwd=ROOT, capture_output=True,
+                                text=True, check=True).stdout.strip()
+        dirty = subprocess.run(['git', 'status', '--porcelain', '--untracked-files=no'], cwd=ROOT,
+                               capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+    return commit + ('-dirty' if dirty else '')
+
+
+def baseline_record(history, commit, settings):
+    """Latest record in the history from a different commit with the same settings"""
+    if not os.path.exists(history):
+        return None
+    for record in reversed(read_jsonl(history)):
+        if record.get('commit') != commit and all(record.get(key) == value for key, value in settings.items()):
+            return record
+    return None
+
+
+def delta(value, previous):
+    if previous is None:
+        return ''
+    if not previous:
+        return f"{'new':>9}" if value else ''
+    return f"{(value - previous) / previous:+9.1%}"
+
+
+def format_run(record, baseline):
+    iterations = record['iterations']
+    base_spans = baseline['spans'] if baseline else {}
+    base_counters = baseline['counters'] if baseline else {}
+    base_iterations = baseline['iterations'] if baseline else 1
+    lines = [f"{'Span':<20} {'Calls':>7} {'Mean ms':>10} {'Max ms':>10} {'vs base':>9}", '-' * 60]
+    for name, stats in record['spans'].items():
+        previous = base_spans.get(name, {}).get('mean_ms') if baseline else None
+        lines.append(f"{name:<20} {stats['count']:>7} {stats['mean_ms']:10.3f} {stats['max_ms']:10.3f} "
+                     f"{delta(stats['mean_ms'], previous)}")
+    lines += ['', f"{'Counter':<24} {'Per iteration':>14} {'vs base':>9}", '-' * 49]
+    for name, value in record['counters'].items():
+        previous = base_counters.get(name, 0) / base_iterations if baseline else None
+        lines.append(f"{name:<24} {value / iterations:14,.1f} {delta(value / iterations, previous)}")
+    if record['gauges']:
+        lines += ['', f"Peak traced heap: {record['gauges'].get('memory.peak_bytes', 0) / 1024 / 1024:.1f} MiB"]
+    return '\n'.join(lines)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--iterations', type=int, default=100)
+    parser.add_argument('--latency-ms', type=float, default=0,
+                        help='Simulated model latency per call, to see the LLM share of a generation')
+    parser.add_argument('--cache', action='store_true',
+                        help='Serve repeated prompts from a response cache (all but the first miss)')
+    parser.add_argument('--history', default=DEFAULT_HISTORY,
+                        help='JSON-lines history to append to and compare against')
+    parser.add_argument('--no-record', action='store_true', help='Compare without appending this run')
+    parser.add_argument('--profile', metavar='FILE', help='Write cProfile stats for the timed iterations')
+    parser.add_argument('--trace-memory', action='store_true', help='Record peak heap with tracemalloc')
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        model = offline_model(args.latency_ms)
+        cache = ResponseCache(os.path.join(tmp, 'cache.sqlite3')) if args.cache else None
+        # Warm up imports, regex caches and the templates before timing
+        # Sanitizer warnings go to stdout on every iteration
+        with open(os.devnull, 'w') as devnull, contextlib.redirect_stdout(devnull):
+            run_iteration(model, cache, tmp)
+            TELEMETRY.reset()
+            start = time.perf_counter()
+            with profiled(args.profile, args.trace_memory):
+                for i in range(args.iterations):
+                    run_iteration(model, cache, os.path.join(tmp, str(i % 10)))
+            elapsed = time.perf_counter() - start
+        if cache is not None:
+            cache.close()
+
+    commit = git_commit()
+    settings = {'benchmark': 'generation', 'latency_ms': args.latency_ms, 'cache': args.cache}
+    baseline = baseline_record(args.history, commit, settings)
+    fields = dict(settings, commit=commit, iterations=args.iterations, seconds=round(elapsed, 3))
+    if args.no_record:
+        record = dict(fields, **TELEMETRY.snapshot())
+    else:
+        record = TELEMETRY.write_jsonl(args.history, **fields)
+
+    print(f"{args.iterations} iterations in {elapsed:.2f}s ({args.iterations / elapsed:,.1f}/s), "
+          f"commit {commit or 'unknown'}"
+          + (f", compared with {baseline.get('commit')} from {baseline.get('timestamp')}" if baseline else ''))
+    print()
+    print(format_run(record, baseline))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,97 @@
+"""Benchmark the jmeter.log parser: lines/sec on one core
+
+Usage:
+    python benchmarks/bench_jmeter_log.py --lines 5000000
+    python benchmarks/bench_jmeter_log.py --file jmeter-tests/test-plans/jmeter.log
+"""
+import argparse
+import os
+import random
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+from jmeter_log import analyze_log, format_report, format_timestamp  # noqa: E402
+
+GROUP = 'myapp.example.com - Load Test'
+
+NOISE = [
+    'INFO o.a.j.p.h.s.HTTPHC4Impl: HTTP request retry count = 0',
+    'WARN o.a.j.p.h.s.HTTPSamplerBase: Exception while sampling: java.net.SocketTimeoutException: Read timed out',
+    'INFO o.a.j.r.Summariser: summary +   5234 in 00:00:30 =  174.5/s Avg:   312 Min:    12 Max:  4011 Err:     3 (0.06%)',
+    'ERROR o.a.j.e.JSR223PostProcessor: Problem in JSR223 script, JSR223 PostProcessor',
+]
+
+
+def write_synthetic_log(path, lines, threads=2000, ramp_up=60, seed=42):
+    """Write a jmeter.log of repeated runs: ramp-up, steady state with some churn, stop"""
+    rng = random.Random(seed)
+    clock = 1747665023000
+    written = 0
+    with open(path, 'w') as f:
+        def log(millis, message):
+            f.write(f"{format_timestamp(millis)} {message}\n")
+
+        while written < lines:
+            log(clock, 'INFO o.a.j.e.StandardJMeterEngine: Running the test!')
+            log(clock + 300, f'INFO o.a.j.t.ThreadGroup: Starting thread group... number=1 threads={threads} '
+                             f'ramp-up={ramp_up} delayedStart=false')
+            events = []
+            interval = ramp_up * 1000 // threads
+            stop = clock + ramp_up * 1000 + 60000
+            for thread in range(1, threads + 1):
+                start = clock + 300 + thread * interval
+                events.append((start, f'Thread started: {GROUP} 1-{thread}'))
+                end = stop + rng.randint(10, 500)
+                if rng.random() < 0.02:
+                    end = start + rng.randint(1000, 30000)
+                else:
+                    events.append((stop + rng.randint(0, 10), f'Stopping: {GROUP} 1-{thread}'))
+                events.append((end, f'Thread is done: {GROUP} 1-{thread}'))
+                events.append((end, f'Thread finished: {GROUP} 1-{thread}'))
+            for _ in range(threads * 2):
+                events.append((rng.randint(clock, stop), rng.choice(NOISE)))
+            events.sort(key=lambda event: event[0])
+            for millis, message in events:
+                if not message.startswith(('INFO', 'WARN', 'ERROR')):
+                    message = 'INFO o.a.j.t.JMeterThread: ' + message
+                log(millis, message)
+            log(stop, 'INFO o.a.j.g.a.Start: Stopping test')
+            log(stop + 600, 'INFO o.a.j.e.StandardJMeterEngine: Notifying test listeners of end of test')
+            written += len(events) + 5
+            clock = stop + 10000
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--lines', type=int, default=2000000)
+    parser.add_argument('--file', help='Parse an existing jmeter.log instead of generating one')
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = args.file
+        if not path:
+            path = os.path.join(tmp, 'jmeter.log')
+            print(f"Generating ~{args.lines:,} synthetic log lines...")
+            write_synthetic_log(path, args.lines)
+        size_mb = os.path.getsize(path) / (1024 * 1024)
+
+        started = time.perf_counter()
+        analyzer = analyze_log(path)
+        elapsed = time.perf_counter() - started
+        runs = analyzer.summary()
+
+        if args.file:
+            print(format_report(runs))
+            print()
+        print(f"File size:      {size_mb:,.1f} MB")
+        print(f"Lines:          {analyzer.lines:,}")
+        print(f"Runs:           {len(runs)}")
+        print(f"Wall time:      {elapsed:.2f} s")
+        print(f"Throughput:     {analyzer.lines / elapsed:,.0f} lines/sec")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,74 @@
+"""Benchmark template-based plan rendering: plans/sec per test type
+
+Usage:
+    python benchmarks/bench_jmx_templates.py --plans 10000
+"""
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+from jmx_templates import render_from_setup  # noqa: E402
+
+SETUPS = {
+    'load': """TEST TYPE: Load Test - steady traffic at expected peak
+TEST PARAMETERS:
+- Users/Threads: 500
+- Ramp-up Period: 60 seconds
+- Duration: 10 minutes
+- Think Time: 1000
+- Target URL: https://api.example.com/login
+- Test Data: jmeter-tests/data/test-data.csv""",
+    'stress': """TEST TYPE: Stress Test - find the breaking point
+TEST PARAMETERS:
+- Users/Threads: 2000
+- Ramp-up Period: 120
+- Duration: 30 minutes
+- Step Users: 200
+- Expected Response Time: 2000 ms""",
+    'spike': """TEST TYPE: Spike Test - sudden burst of traffic
+TEST PARAMETERS:
+- Users/Threads: 100
+- Ramp-up Period: 30
+- Duration: 10 minutes
+- Spike Users: 1000
+- Spike Duration: 60 seconds""",
+    'endurance': """TEST TYPE: Endurance Test - sustained load
+TEST PARAMETERS:
+- Users/Threads: 200
+- Ramp-up Period: 5 minutes
+- Duration: 8 hours
+- Throughput: 20 requests/second""",
+    'scalability': """TEST TYPE: Scalability Test - growth in steps
+TEST PARAMETERS:
+- Users/Threads: 1000
+- Ramp-up Period: 60
+- Duration: 40 minutes
+- Step Users: 100
+- Step Duration: 4 minutes""",
+}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--plans', type=int, default=10000, help='Plans rendered per test type')
+    args = parser.parse_args()
+
+    total = 0
+    total_elapsed = 0.0
+    for test_type, setup in SETUPS.items():
+        started = time.perf_counter()
+        for _ in range(args.plans):
+            plan = render_from_setup(setup)
+        elapsed = time.perf_counter() - started
+        assert plan is not None, f"{test_type} setup fell back to the LLM"
+        total += args.plans
+        total_elapsed += elapsed
+        print(f"{test_type:<12} {args.plans / elapsed:>10,.0f} plans/sec  ({len(plan):,} bytes each)")
+    print(f"{'overall':<12} {total / total_elapsed:>10,.0f} plans/sec")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,91 @@
+"""Benchmark the streaming JTL analyzer: rows/sec and peak RSS
+
+Usage:
+    python benchmarks/bench_jtl_analyzer.py --rows 10000000
+    python benchmarks/bench_jtl_analyzer.py --rows 10000000 --workers 0
+"""
+import argparse
+import os
+import random
+import resource
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+from jtl_analyzer import DEFAULT_CSV_COLUMNS, analyze_jtl, analyze_jtl_parallel_aggregate, format_summary  # noqa: E402
+
+LABELS = ['Home Page - /home', 'Login Page - /login', 'Search - /search', 'Checkout - /checkout']
+
+
+def write_synthetic_jtl(path, rows, seed=42):
+    """Write a CSV JTL file with realistic columns and a long-tailed latency mix"""
+    rng = random.Random(seed)
+    start = 1747657823000
+    with open(path, 'w', newline='') as f:
+        f.write(','.join(DEFAULT_CSV_COLUMNS) + '\n')
+        batch = []
+        for i in range(rows):
+            elapsed = int(rng.lognormvariate(5.5, 0.6))
+            success = rng.random() > 0.01
+            label = LABELS[i % len(LABELS)]
+            batch.append(
+                f"{start + i // 50},{elapsed},{label},{200 if success else 500},"
+                f"{'OK' if success else 'Internal Server Error'},Thread Group 1-{i % 1000},text,"
+                f"{'true' if success else 'false'},,{rng.randint(500, 5000)},120,1000,1000,"
+                f"https://example.com/,{elapsed // 2},0,{rng.randint(0, 20)}\n"
+            )
+            if len(batch) == 10000:
+                f.writelines(batch)
+                batch = []
+        f.writelines(batch)
+
+
+def peak_rss_mb(who=resource.RUSAGE_SELF):
+    """Peak RSS of this process, or with RUSAGE_CHILDREN of its largest reaped child"""
+    # ru_maxrss is KiB on Linux and bytes on macOS
+    rss = resource.getrusage(who).ru_maxrss
+    return rss / (1024 * 1024) if sys.platform == 'darwin' else rss / 1024
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--rows', type=int, default=1000000)
+    parser.add_argument('--file', help='Analyze an existing JTL instead of generating one')
+    parser.add_argument('--workers', type=int, default=1,
+                        help='Worker processes for parallel ingestion (0 = all cores)')
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = args.file
+        if not path:
+            path = os.path.join(tmp, 'synthetic.jtl')
+            print(f"Generating {args.rows:,} synthetic samples...")
+            write_synthetic_jtl(path, args.rows)
+        size_mb = os.path.getsize(path) / (1024 * 1024)
+
+        rss_before = peak_rss_mb()
+        started = time.perf_counter()
+        if args.workers == 1:
+            rows = analyze_jtl(path)
+        else:
+            rows = analyze_jtl_parallel_aggregate(path, args.workers or None).summary()
+        elapsed = time.perf_counter() - started
+        samples = rows[-1]['samples']
+
+        print(format_summary(rows))
+        print()
+        print(f"File size:      {size_mb:,.1f} MB")
+        print(f"Samples:        {samples:,}")
+        print(f"Workers:        {args.workers or os.cpu_count()}")
+        print(f"Wall time:      {elapsed:.2f} s")
+        print(f"Throughput:     {samples / elapsed:,.0f} rows/sec")
+        # Parallel ingestion parses in worker processes, which RUSAGE_SELF does not see
+        parent, workers = peak_rss_mb(), peak_rss_mb(resource.RUSAGE_CHILDREN)
+        print(f"Peak RSS:       {max(parent, workers):.1f} MB (parent {parent:.1f} MB, largest worker "
+              f"{workers:.1f} MB; parent before analysis: {rss_before:.1f} MB)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,151 @@
+"""Benchmark NumPy time-series analysis against a pure-Python baseline
+
+The synthetic run ramps from 1 to --threads threads against a target that
+saturates at --capacity, so the concurrency curve has a real knee.
+
+Usage:
+    python benchmarks/bench_jtl_timeseries.py --rows 2000000
+"""
+import argparse
+import math
+import os
+import random
+import sys
+import tempfile
+import time
+from collections import defaultdict
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+from jtl_analyzer import DEFAULT_CSV_COLUMNS, iter_samples  # noqa: E402
+from jtl_timeseries import (DEFAULT_APDEX_THRESHOLD_MS, DEFAULT_WINDOW_SECONDS, apdex,  # noqa: E402
+                            concurrency_curve, find_knee, format_curve, ingest_jtl, per_second,
+                            window_percentiles)
+
+LABELS = ['Home Page - /home', 'Login Page - /login', 'Search - /search', 'Checkout - /checkout']
+
+
+def write_ramp_jtl(path, rows, threads=400, capacity=200, base=50, seed=42):
+    """Write a CSV JTL whose load ramps linearly while latency follows a saturation curve"""
+    rng = random.Random(seed)
+    start = 1747657823000
+    clock = 0.0
+    with open(path, 'w', newline='') as f:
+        f.write(','.join(DEFAULT_CSV_COLUMNS) + '\n')
+        batch = []
+        for i in range(rows):
+            active = 1 + i * threads // rows
+            latency = base * (1 + (active / capacity) ** 4)
+            elapsed = int(latency * rng.lognormvariate(0, 0.3))
+            # Offered load is active / latency; the server cannot exceed capacity / base
+            clock += 1000.0 / min(active * 1000.0 / latency, capacity * 1000.0 / base)
+            success = rng.random() > 0.01
+            label = LABELS[i % len(LABELS)]
+            batch.append(
+                f"{start + int(clock)},{elapsed},{label},{200 if success else 500},"
+                f"{'OK' if success else 'Internal Server Error'},Thread Group 1-{i % active},text,"
+                f"{'true' if success else 'false'},,{rng.randint(500, 5000)},120,{active},{active},"
+                f"https://example.com/,{elapsed // 2},0,{rng.randint(0, 20)}\n"
+            )
+            if len(batch) == 10000:
+                f.writelines(batch)
+                batch = []
+        f.writelines(batch)
+
+
+def python_baseline(samples, window, threshold, points):
+    """The same analyses with plain loops, dicts and sorted lists"""
+    by_second = defaultdict(list)
+    for sample in samples:
+        by_second[(sample.timestamp + sample.elapsed) // 1000].append(sample)
+    first, last = min(by_second), max(by_second)
+
+    throughput = [len(by_second.get(second, ())) for second in range(first, last + 1)]
+    windows = []
+    for second in range(first, last + 1):
+        values = sorted(s.elapsed for t in range(second - window + 1, second + 1) for s in by_second.get(t, ()))
+        windows.append(tuple(values[max(0, math.ceil(len(values) * p / 100) - 1)] for p in (50, 95, 99))
+                       if values else None)
+
+    satisfied = tolerating = 0
+    for sample in samples:
+        if sample.success:
+            if sample.elapsed <= threshold:
+                satisfied += 1
+            elif sample.elapsed <= 4 * threshold:
+                tolerating += 1
+    score = (satisfied + tolerating / 2) / len(samples)
+
+    low = min(s.all_threads for s in samples)
+    high = max(s.all_threads for s in samples)
+    span = high - low + 1
+    levels = defaultdict(list)
+    seconds = defaultdict(set)
+    for sample in samples:
+        level = (sample.all_threads - low) * points // span if span > points else sample.all_threads - low
+        levels[level].append(sample)
+        seconds[level].add((sample.timestamp + sample.elapsed) // 1000)
+    curve = []
+    for level in sorted(levels):
+        group = levels[level]
+        elapsed = sorted(s.elapsed for s in group)
+        curve.append((sum(s.all_threads for s in group) / len(group), len(group) / len(seconds[level]),
+                      sum(elapsed) / len(elapsed), elapsed[math.ceil(len(elapsed) * 0.95) - 1]))
+    return throughput, windows, score, curve
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--rows', type=int, default=1000000)
+    parser.add_argument('--threads', type=int, default=400)
+    parser.add_argument('--capacity', type=int, default=200)
+    parser.add_argument('--file', help='Analyze an existing JTL instead of generating one')
+    parser.add_argument('--skip-python', action='store_true', help='Skip the pure-Python baseline')
+    args = parser.parse_args()
+
+    window, threshold, points = DEFAULT_WINDOW_SECONDS, DEFAULT_APDEX_THRESHOLD_MS, 40
+    with tempfile.TemporaryDirectory() as tmp:
+        path = args.file
+        if not path:
+            path = os.path.join(tmp, 'results.jtl')
+            t0 = time.perf_counter()
+            write_ramp_jtl(path, args.rows, args.threads, args.capacity)
+            print(f"Generated {args.rows:,} rows in {time.perf_counter() - t0:.1f}s")
+
+        t0 = time.perf_counter()
+        columns = ingest_jtl(path, os.path.join(tmp, 'columns'))
+        print(f"Ingest to .npy columns:  {time.perf_counter() - t0:.2f}s ({len(columns):,} rows)")
+
+        t0 = time.perf_counter()
+        seconds = per_second(columns)
+        windows = window_percentiles(columns, window)
+        scores = apdex(columns, threshold)
+        curve = concurrency_curve(columns, points)
+        knee = find_knee(curve)
+        numpy_elapsed = time.perf_counter() - t0
+        print(f"NumPy analysis:          {numpy_elapsed:.3f}s")
+
+        if not args.skip_python:
+            t0 = time.perf_counter()
+            samples = list(iter_samples(path))
+            load_elapsed = time.perf_counter() - t0
+            t0 = time.perf_counter()
+            throughput, python_windows, score, python_curve = python_baseline(samples, window, threshold, points)
+            python_elapsed = time.perf_counter() - t0
+            print(f"Pure-Python analysis:    {python_elapsed:.3f}s (+{load_elapsed:.2f}s to load samples)")
+            print(f"Speedup:                 {python_elapsed / numpy_elapsed:.0f}x")
+
+            assert list(seconds['samples']) == throughput
+            assert abs(scores['score'] - score) < 1e-9
+            worst = 0.0
+            for position, exact in enumerate(python_windows):
+                if exact:
+                    worst = max(worst, abs(windows['p95'][position] - exact[1]) / max(exact[1], 1))
+            print(f"Max window p95 error vs exact: {worst:.2%}")
+
+        print()
+        print(format_curve(curve, knee))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,128 @@
+"""Benchmark the native asyncio engine against a local HTTP stand-in server
+
+Measures sustained requests/sec per CPU core of the engine process with
+zero think time, and Python heap per virtual user with many mostly-idle
+users. The stand-in server runs in its own process so it does not share
+the engine's core.
+
+Usage:
+    python benchmarks/bench_native_runner.py --users 50 --duration 10
+    python benchmarks/bench_native_runner.py --idle-users 5000
+"""
+import argparse
+import asyncio
+import multiprocessing
+import os
+import socket
+import sys
+import tempfile
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+from jmx_templates import render_plan  # noqa: E402
+from jtl_analyzer import analyze_jtl, format_summary  # noqa: E402
+from native_runner import CompiledPlan, run_plan  # noqa: E402
+
+RESPONSE_BODY = b'{"status": "ok", "items": [1, 2, 3]}'
+
+
+class StandInProtocol(asyncio.Protocol):
+    """Answers every HTTP/1.1 request on a connection with a small JSON body"""
+
+    response = (b"HTTP/1.1 200 OK\r\nContent-Type: application/json\r\nContent-Length: "
+                + str(len(RESPONSE_BODY)).encode() + b"\r\n\r\n" + RESPONSE_BODY)
+
+    def connection_made(self, transport):
+        self.transport = transport
+        self.buffer = b''
+
+    def data_received(self, data):
+        self.buffer += data
+        while True:
+            end = self.buffer.find(b'\r\n\r\n')
+            if end < 0:
+                return
+            head = self.buffer[:end].lower()
+            length = 0
+            marker = head.find(b'content-length:')
+            if marker >= 0:
+                length = int(head[marker + 15:].split(b'\r\n', 1)[0])
+            if len(self.buffer) < end + 4 + length:
+                return
+            self.buffer = self.buffer[end + 4 + length:]
+            self.transport.write(self.response)
+
+
+def serve(port, ready):
+    async def main():
+        loop = asyncio.get_running_loop()
+        server = await loop.create_server(StandInProtocol, '127.0.0.1', port, backlog=4096)
+        ready.set()
+        async with server:
+            await server.serve_forever()
+
+    asyncio.run(main())
+
+
+def free_port():
+    with socket.socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        return sock.getsockname()[1]
+
+
+def write_plan(path, port, users, duration, think_time=0, ramp_up=0):
+    spec = {'test_type': 'load', 'name': 'Native Benchmark', 'threads': users, 'ramp_up': ramp_up,
+            'duration': duration, 'url': f"http://127.0.0.1:{port}/api/items", 'think_time': think_time}
+    with open(path, 'w', encoding='utf-8') as f:
+        f.write(render_plan(spec, use_plugins=False))
+    return path
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--users', type=int, default=50, help='Virtual users for the throughput run')
+    parser.add_argument('--duration', type=int, default=10, help='Seconds for the throughput run')
+    parser.add_argument('--idle-users', type=int, default=2000, help='Virtual users for the memory run')
+    args = parser.parse_args()
+
+    port = free_port()
+    ready = multiprocessing.Event()
+    server = multiprocessing.Process(target=serve, args=(port, ready), daemon=True)
+    server.start()
+    ready.wait(10)
+    try:
+        with tempfile.TemporaryDirectory() as tmp:
+            plan = write_plan(os.path.join(tmp, 'throughput.jmx'), port, args.users, args.duration)
+            results = os.path.join(tmp, 'throughput.jtl')
+            wall, cpu = time.perf_counter(), time.process_time()
+            engine = run_plan(plan, results)
+            wall, cpu = time.perf_counter() - wall, time.process_time() - cpu
+            print(f"Throughput run: {args.users} users, {args.duration}s, zero think time")
+            print(f"  {engine.samples:,} samples ({engine.errors} errors), "
+                  f"{engine.pool.opened} connections opened")
+            print(f"  {engine.samples / wall:,.0f} req/s wall, {engine.samples / cpu:,.0f} req/s per core "
+                  f"({cpu / wall:.0%} of one core)")
+            print()
+            print(format_summary(analyze_jtl(results)))
+
+            # Memory: users mostly sleep in a long think time, so the heap holds their state
+            plan = write_plan(os.path.join(tmp, 'idle.jmx'), port, args.idle_users, 4, think_time=2000)
+            compiled = CompiledPlan(plan)
+            tracemalloc.start()
+            before = tracemalloc.get_traced_memory()[0]
+            engine = run_plan(compiled, os.path.join(tmp, 'idle.jtl'))
+            peak = tracemalloc.get_traced_memory()[1]
+            tracemalloc.stop()
+            print()
+            print(f"Memory run: {args.idle_users} users, 2s think time")
+            print(f"  {engine.samples:,} samples, peak Python heap {(peak - before) / 1024 / 1024:.1f} MiB, "
+                  f"{(peak - before) / args.idle_users / 1024:.1f} KiB per virtual user")
+    finally:
+        server.terminate()
+        server.join()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,56 @@
+"""Benchmark linting a directory of plans: plans/sec
+
+Writes a mix of template-rendered plans and copies of the sample plans,
+then lints the whole directory the way `plan_lint.py DIR` does.
+
+Usage:
+    python benchmarks/bench_plan_lint.py --plans 500
+"""
+import argparse
+import glob
+import os
+import shutil
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+from jmx_templates import TEST_TYPES, render_plan  # noqa: E402
+from plan_lint import PlanLinter, iter_plan_files  # noqa: E402
+
+SAMPLE_PLANS = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'jmeter-tests', 'test-plans')
+
+
+def write_plans(directory, count):
+    samples = sorted(glob.glob(os.path.join(SAMPLE_PLANS, '*.jmx')))
+    for index in range(count):
+        path = os.path.join(directory, f"plan-{index:05d}.jmx")
+        if samples and index % 4 == 0:
+            shutil.copyfile(samples[index // 4 % len(samples)], path)
+            continue
+        spec = {'test_type': TEST_TYPES[index % len(TEST_TYPES)], 'threads': 50 + index % 500, 'ramp_up': 60,
+                'duration': 600, 'url': f"https://api.example.com/items/{index}", 'think_time': 1000,
+                'response_time': 2000}
+        with open(path, 'w', encoding='utf-8') as f:
+            f.write(render_plan(spec, use_plugins=index % 2 == 0))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--plans', type=int, default=500)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        write_plans(tmp, args.plans)
+        linter = PlanLinter()
+        started = time.perf_counter()
+        reports = [linter.lint_file(path) for path in iter_plan_files([tmp])]
+        elapsed = time.perf_counter() - started
+        findings = sum(len(report.findings) for report in reports)
+        print(f"Linted {len(reports)} plans in {elapsed:.2f}s ({len(reports) / elapsed:,.0f} plans/s), "
+              f"{findings} findings")
+
+
+if __name__ == "__main__":
+    main()
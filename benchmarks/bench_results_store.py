@@ -0,0 +1,80 @@
+"""Benchmark the results store: ingest rate and query latency over many runs
+
+Usage:
+    python benchmarks/bench_results_store.py --runs 1000 --labels 25
+"""
+import argparse
+import os
+import random
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+from results_store import ResultsStore, format_comparison  # noqa: E402
+
+PLAN = 'jmeter-tests/test-plans/load_test_20250519_124152.jmx'
+
+
+def synthetic_summary(labels, rng, slowdown=1.0):
+    """Summary rows shaped like jtl_analyzer output, with run-to-run noise"""
+    rows = []
+    for position, label in enumerate(labels + ['TOTAL']):
+        base = 80 + 15 * (position % 10)
+        mean = base * rng.uniform(0.95, 1.05) * slowdown
+        samples = rng.randint(5000, 20000)
+        errors = int(samples * rng.uniform(0, 0.002))
+        rows.append({
+            'label': label, 'samples': samples, 'errors': errors, 'error_rate': errors / samples,
+            'throughput': samples / 600, 'mean': mean, 'stddev': mean * 0.4, 'min': 5, 'max': mean * 8,
+            'p50': mean * 0.9, 'p90': mean * 1.5, 'p95': mean * 1.8 * rng.uniform(0.97, 1.03), 'p99': mean * 2.6,
+            'received_bytes': samples * 2048, 'sent_bytes': samples * 256, 'duration_ms': 600000,
+        })
+    return rows
+
+
+def timed(func, repeat=20):
+    started = time.perf_counter()
+    for _ in range(repeat):
+        result = func()
+    return result, (time.perf_counter() - started) / repeat * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--runs', type=int, default=1000)
+    parser.add_argument('--labels', type=int, default=25)
+    args = parser.parse_args()
+
+    rng = random.Random(42)
+    labels = [f"Step {i:02d} - /api/endpoint/{i}" for i in range(args.labels)]
+    with tempfile.TemporaryDirectory() as tmp:
+        store = ResultsStore(os.path.join(tmp, 'results.sqlite3'))
+        started_at = 1747657823000
+        started = time.perf_counter()
+        for run in range(args.runs):
+            slowdown = 1.3 if run == args.runs - 1 else 1.0
+            store.add_summary(synthetic_summary(labels, rng, slowdown), plan=PLAN,
+                              started_at=started_at + run * 3600000)
+        ingest_seconds = time.perf_counter() - started
+
+        history, history_ms = timed(lambda: store.history(labels[3], 'p95', plan=PLAN, last=50))
+        _, history_all_ms = timed(lambda: store.history(labels[3], 'p95', last=args.runs))
+        report, compare_ms = timed(lambda: store.compare(window=50))
+        _, runs_ms = timed(lambda: store.runs(plan=PLAN, limit=50))
+
+        print(format_comparison(report).splitlines()[0])
+        print(f"Regressions flagged in the slowed-down last run: {report['regressions']}")
+        print()
+        print(f"Runs stored:                  {args.runs:,} ({args.labels} labels each)")
+        print(f"Ingest:                       {args.runs / ingest_seconds:,.0f} runs/sec")
+        print(f"History, last 50 runs:        {history_ms:.2f} ms ({len(history)} rows)")
+        print(f"History, all {args.runs} runs:      {history_all_ms:.2f} ms")
+        print(f"Compare vs 50-run baseline:   {compare_ms:.2f} ms")
+        print(f"List last 50 runs:            {runs_ms:.2f} ms")
+        store.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,109 @@
+"""Benchmark CLI startup: wall time per typhon.py command and its import profile
+
+Each command runs in a fresh interpreter. Wall time is the best of --repeat
+runs; the import profile comes from one extra run under `python -X importtime`
+and lists the slowest top-level imports. Analysis commands must start in
+under --budget milliseconds and must not import the Gemini SDK or dotenv;
+the exit status is 1 when any of them does.
+
+Usage:
+    python benchmarks/bench_startup.py
+    python benchmarks/bench_startup.py --repeat 20 --top 5
+"""
+import argparse
+import os
+import re
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..')
+sys.path.insert(0, ROOT)
+
+from bench_jtl_analyzer import write_synthetic_jtl  # noqa: E402
+
+TYPHON = os.path.join(ROOT, 'typhon.py')
+SAMPLE_PLAN = os.path.join(ROOT, 'jmeter-tests', 'test-plans', 'my_20250519_124152.jmx')
+SAMPLE_LOG = os.path.join(ROOT, 'jmeter-tests', 'test-plans', 'jmeter.log')
+
+# Packages only the generate command may load
+FORBIDDEN_IMPORTS = ('google', 'dotenv')
+
+IMPORTTIME_LINE = re.compile(r'import time:\s+(\d+) \|\s+(\d+) \|( *)(\S+)')
+
+
+def run_wall(command, repeat):
+    """Best wall time in ms of running `python <command>` in a fresh interpreter"""
+    best = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        subprocess.run([sys.executable] + command, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+                       check=False)
+        elapsed = (time.perf_counter() - start) * 1000
+        best = elapsed if best is None else min(best, elapsed)
+    return best
+
+
+def import_profile(command):
+    """(module, cumulative ms) for every import, in load order, from -X importtime"""
+    result = subprocess.run([sys.executable, '-X', 'importtime'] + command, stdout=subprocess.DEVNULL,
+                            stderr=subprocess.PIPE, text=True, check=False)
+    profile = []
+    for line in result.stderr.splitlines():
+        match = IMPORTTIME_LINE.match(line)
+        if match:
+            depth = len(match.group(3)) // 2
+            profile.append((match.group(4), int(match.group(2)) / 1000, depth))
+    return profile
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--repeat', type=int, default=10, help='Runs per command; the best is reported')
+    parser.add_argument('--budget', type=float, default=100.0, help='Startup budget for analysis commands (ms)')
+    parser.add_argument('--top', type=int, default=3, help='Slowest top-level imports to list per command')
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        jtl = os.path.join(tmp, 'results.jtl')
+        write_synthetic_jtl(jtl, 1000)
+        plan = shutil.copy(SAMPLE_PLAN, os.path.join(tmp, 'plan.jmx'))
+
+        # (name, argv, held to the budget)
+        commands = [
+            ('python -c pass', ['-c', 'pass'], False),
+            ('analyze results.jtl', [TYPHON, 'analyze', jtl], True),
+            ('analyze jmeter.log', [TYPHON, 'analyze', SAMPLE_LOG], True),
+            ('analyze plan.jmx', [TYPHON, 'analyze', plan], True),
+            ('sanitize plan.jmx', [TYPHON, 'sanitize', plan], True),
+            ('generate --help', [TYPHON, 'generate', '--help'], False),
+        ]
+
+        failures = 0
+        print(f"{'Command':<22} {'Wall ms':>8} {'Imports ms':>11}  Slowest top-level imports")
+        print('-' * 90)
+        for name, command, budgeted in commands:
+            wall = run_wall(command, args.repeat)
+            profile = import_profile(command)
+            top_level = [(module, ms) for module, ms, depth in profile if depth == 0]
+            slowest = sorted(top_level, key=lambda item: -item[1])[:args.top]
+            loaded = {module.split('.')[0] for module, _, _ in profile}
+            notes = []
+            if budgeted and wall > args.budget:
+                notes.append(f"over {args.budget:.0f} ms budget")
+            if budgeted and loaded.intersection(FORBIDDEN_IMPORTS):
+                notes.append(f"imports {', '.join(sorted(loaded.intersection(FORBIDDEN_IMPORTS)))}")
+            failures += bool(notes)
+            print(f"{name:<22} {wall:8.1f} {sum(ms for _, ms in top_level):11.1f}  "
+                  + ', '.join(f"{module} {ms:.1f}" for module, ms in slowest)
+                  + (f"  <-- {'; '.join(notes)}" if notes else ''))
+
+    print()
+    print("All analysis commands within budget" if not failures else f"{failures} command(s) failed")
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,389 @@
+import argparse
+import csv
+import hashlib
+import json
+import math
+import os
+import sys
+from datetime import datetime
+
+from coordinator import PER_THREAD_CALC_MODE, RATE_THREAD_GROUPS, THREAD_COUNT_PROPS
+from jmeter_runner import JMeterRunner, format_windows
+from jmx_model import JMXDocument, ThreadGroup, format_number, parse_number, throughput_props
+from jmx_templates import render_plan, spec_from_setup
+from jtl_analyzer import JTLAnalyzer, iter_samples
+
+DEFAULT_OUTPUT_DIR = 'jmeter-tests/capacity'
+
+# Scaled plan variants, shared between searches and keyed by content
+PLAN_CACHE_DIR = os.getenv('TYPHON_PLAN_CACHE', '.typhon/plans')
+
+# Per-row response time thresholds used by the generated plans
+DEFAULT_DATA_CSV = 'jmeter-tests/data/test-data.csv'
+SLO_COLUMN = 'expected_response_time'
+
+DEFAULT_P95_MS = 2000
+DEFAULT_MAX_ERROR_RATE = 0.01
+DEFAULT_START_THREADS = 10
+DEFAULT_MAX_THREADS = 10000
+DEFAULT_GROWTH = 2.0
+# Stop once the pass/fail bracket is within this fraction of the passing level
+DEFAULT_PRECISION = 0.05
+DEFAULT_STEP_DURATION = 60
+DEFAULT_STEP_RAMP_UP = 10
+
+
+class SLO:
+    """Pass/fail criteria applied to one load level's TOTAL row"""
+
+    def __init__(self, p95_ms=DEFAULT_P95_MS, max_error_rate=DEFAULT_MAX_ERROR_RATE):
+        self.p95_ms = p95_ms
+        self.max_error_rate = max_error_rate
+
+    def breaches(self, row):
+        """Human-readable reasons the row misses the SLO (empty if it passes)"""
+        reasons = []
+        if row['p95'] > self.p95_ms:
+            reasons.append(f"p95 {row['p95']:.0f} ms > {self.p95_ms:g} ms")
+        if row['error_rate'] > self.max_error_rate:
+            reasons.append(f"errors {row['error_rate']:.2%} > {self.max_error_rate:.2%}")
+        return reasons
+
+    def __repr__(self):
+        return f"SLO(p95 < {self.p95_ms:g} ms, errors <= {self.max_error_rate:.2%})"
+
+
+def slo_from_csv(path, column=SLO_COLUMN):
+    """Strictest per-row response time threshold in a test data file, or None"""
+    if not os.path.exists(path):
+        return None
+    with open(path, newline='', encoding='utf-8') as f:
+        values = [parse_number(row.get(column)) for row in csv.DictReader(f)]
+    values = [value for value in values if value]
+    return min(values) if values else None
+
+
+def plan_from_setup(setup_text, output_dir):
+    """Render a setup block into a constant-load base plan
+
+    Each search step should hold one load level, so the plan is rendered
+    with a plain Thread Group even for stress and scalability setups.
+    Returns (plan path, spec); raises ValueError for setups the templates
+    cannot express.
+    """
+    spec = spec_from_setup(setup_text)
+    if spec is None:
+        raise ValueError("setup needs the LLM to render; generate a plan first and pass --plan")
+    if spec.get('csv_file') and os.path.exists(spec['csv_file']):
+        # The setup names the file relative to the working directory, not the plan
+        spec['csv_file'] = os.path.abspath(spec['csv_file'])
+    os.makedirs(output_dir, exist_ok=True)
+    path = os.path.join(output_dir, 'base.jmx')
+    with open(path, 'w', encoding='utf-8') as f:
+        f.write(render_plan(spec, use_plugins=False))
+    return path, spec
+
+
+def _distribute(total, weights):
+    """Split an integer total in proportion to weights (largest remainder)"""
+    weight_sum = sum(weights)
+    if not weight_sum:
+        return [0] * len(weights)
+    exact = [total * weight / weight_sum for weight in weights]
+    shares = [int(value) for value in exact]
+    order = sorted(range(len(weights)), key=lambda index: exact[index] - shares[index], reverse=True)
+    for index in order[:total - sum(shares)]:
+        shares[index] += 1
+    return shares
+
+
+def scale_plan(plan, threads, output, duration=None, ramp_up=None):
+    """Write a variant of a plan running `threads` threads in total
+
+    Thread counts are scaled in proportion across thread groups, and shared
+    throughput-timer targets by the same factor, so each thread keeps its
+    pacing. Optional duration and ramp-up overrides apply to plain Thread
+    Groups. CSV paths are made absolute so the variant can live anywhere.
+    Returns the thread count actually written.
+    """
+    document = JMXDocument.load(plan)
+    plan_dir = os.path.dirname(os.path.abspath(plan))
+    groups = [group for group in document.thread_groups() if group.enabled]
+    base = [int(parse_number(group.num_threads) or 0) for group in groups]
+    factor = threads / sum(base) if sum(base) else 1.0
+    shares = dict(zip((group.element for group in groups), _distribute(threads, base)))
+
+    for element in document.elements():
+        if isinstance(element, ThreadGroup) and element.element in shares:
+            _scale_thread_group(element, shares[element.element], factor)
+            if element.testclass == 'ThreadGroup':
+                if duration is not None:
+                    element.set_prop('ThreadGroup.scheduler', 'true', 'boolProp')
+                    element.set_prop('ThreadGroup.duration', int(duration))
+                if ramp_up is not None:
+                    element.set_prop('ThreadGroup.ramp_time', int(ramp_up))
+        elif element.testclass in ('ConstantThroughputTimer', 'PreciseThroughputTimer'):
+            if element.testclass == 'ConstantThroughputTimer' and element.get_prop('calcMode') == PER_THREAD_CALC_MODE:
+                continue
+            for prop in throughput_props(element.element):
+                value = parse_number(prop.text)
+                if value is not None:
+                    prop.text = format_number(value * factor)
+        elif element.testclass == 'CSVDataSet':
+            filename = element.get_prop('filename') or ''
+            if filename and '${' not in filename and not os.path.isabs(filename):
+                element.set_prop('filename', os.path.abspath(os.path.join(plan_dir, filename)))
+    document.save(output)
+    return sum(shares.values()) if groups else threads
+
+
+def _scale_thread_group(group, share, factor):
+    for name in THREAD_COUNT_PROPS:
+        value = parse_number(group.get_prop(name))
+        if value is None:
+            continue
+        if name == 'ThreadGroup.num_threads':
+            group.set_prop(name, share)
+        elif group.testclass in RATE_THREAD_GROUPS and name == 'TargetLevel':
+            group.set_prop(name, format_number(value * factor))
+        else:
+            group.set_prop(name, max(1, round(value * factor)))
+    rows = group.element.find("collectionProp[@name='ultimatethreadgroupdata']")
+    if rows is not None:
+        for row in rows:
+            props = row.findall('stringProp')
+            value = parse_number(props[0].text) if props else None
+            if value is not None:
+                props[0].text = str(max(1, round(value * factor)))
+
+
+class PlanCache:
+    """Scaled plan variants on disk, keyed by base plan content and overrides
+
+    Revisiting a load level, or rerunning a search against an unchanged
+    plan, reuses the variant written before instead of rewriting it.
+    """
+
+    def __init__(self, plan, directory=PLAN_CACHE_DIR, duration=None, ramp_up=None):
+        self.plan = plan
+        self.directory = directory
+        self.duration = duration
+        self.ramp_up = ramp_up
+        with open(plan, 'rb') as f:
+            digest = hashlib.sha256(f.read())
+        digest.update(os.path.dirname(os.path.abspath(plan)).encode())
+        digest.update(f"{duration}:{ramp_up}".encode())
+        self.key = digest.hexdigest()[:16]
+        self.hits = 0
+        self.misses = 0
+
+    def path(self, threads):
+        return os.path.join(self.directory, f"{self.key}-{threads}.jmx")
+
+    def get(self, threads):
+        path = self.path(threads)
+        if os.path.exists(path):
+            self.hits += 1
+            return path
+        self.misses += 1
+        os.makedirs(self.directory, exist_ok=True)
+        partial = path + '.part'
+        scale_plan(self.plan, threads, partial, self.duration, self.ramp_up)
+        os.replace(partial, path)
+        return path
+
+
+def measure(results, warmup_seconds=0):
+    """TOTAL row for a results file, ignoring samples in the warm-up period"""
+    analyzer = JTLAnalyzer()
+    cutoff = None
+    for sample in iter_samples(results):
+        if cutoff is None:
+            cutoff = sample.timestamp + warmup_seconds * 1000
+        if sample.timestamp >= cutoff:
+            analyzer.add(sample)
+    if not analyzer.total.count:
+        return None
+    return analyzer.summary()[-1]
+
+
+class CapacitySearch:
+    """Find the highest thread count a plan sustains within an SLO
+
+    Load grows geometrically from `start` until a level breaches the SLO,
+    then the bracket between the last passing and first failing level is
+    bisected until it is within `precision` of the passing level. Every
+    level runs the scaled plan from the PlanCache once; measurements are
+    kept in `steps`.
+    """
+
+    def __init__(self, plan, slo, jmeter=None, output_dir=None, start=DEFAULT_START_THREADS,
+                 max_threads=DEFAULT_MAX_THREADS, growth=DEFAULT_GROWTH, precision=DEFAULT_PRECISION,
+                 duration=DEFAULT_STEP_DURATION, ramp_up=DEFAULT_STEP_RAMP_UP, plan_cache=None):
+        self.plan = plan
+        self.slo = slo
+        self.jmeter = jmeter
+        self.output_dir = output_dir or os.path.join(
+            DEFAULT_OUTPUT_DIR, f"{os.path.splitext(os.path.basename(plan))[0]}_{datetime.now():%Y%m%d_%H%M%S}")
+        self.start = max(1, start)
+        self.max_threads = max_threads
+        self.growth = max(growth, 1.1)
+        self.precision = precision
+        self.ramp_up = ramp_up
+        self.plans = plan_cache or PlanCache(plan, duration=duration, ramp_up=ramp_up)
+        self.steps = {}
+        self.stopped = False
+
+    def run_level(self, threads, on_update=None):
+        """Run one load level (once) and return its step record"""
+        if threads in self.steps:
+            return self.steps[threads]
+        directory = os.path.join(self.output_dir, f"threads-{threads}")
+        os.makedirs(directory, exist_ok=True)
+        results = os.path.join(directory, 'results.jtl')
+        if os.path.exists(results):
+            os.remove(results)
+        runner = JMeterRunner(self.plans.get(threads), results, jmeter=self.jmeter,
+                              log_file=os.path.join(directory, 'jmeter.log'))
+        runner.run(on_update)
+        self.stopped = runner.stopped
+        row = measure(results, self.ramp_up or 0) if os.path.exists(results) else None
+        breaches = self.slo.breaches(row) if row else ['no samples']
+        step = {'threads': threads, 'row': row, 'breaches': breaches, 'passed': not breaches,
+                'results': results, 'returncode': runner.returncode}
+        self.steps[threads] = step
+        return step
+
+    def run(self, on_step=None, on_update=None):
+        """Search and return the highest passing step, or None if even one thread fails"""
+        def level(threads):
+            step = self.run_level(threads, on_update)
+            if on_step:
+                on_step(step)
+            return step
+
+        passing, failing = 0, None
+        threads = min(self.start, self.max_threads)
+        while failing is None and not self.stopped:
+            if level(threads)['passed']:
+                passing = threads
+                if threads >= self.max_threads:
+                    break
+                threads = min(self.max_threads, max(threads + 1, int(threads * self.growth)))
+            else:
+                failing = threads
+
+        while failing is not None and not self.stopped:
+            resolution = max(1, math.ceil(passing * self.precision))
+            if failing - passing <= resolution:
+                break
+            threads = (passing + failing) // 2
+            if level(threads)['passed']:
+                passing = threads
+            else:
+                failing = threads
+        return self.steps.get(passing)
+
+
+def format_steps(steps):
+    lines = [f"{'Threads':>8} {'Samples':>9} {'Thr/s':>9} {'p95':>8} {'Errors':>8}  Result",
+             '-' * 60]
+    for threads in sorted(steps):
+        step = steps[threads]
+        row = step['row']
+        if row is None:
+            lines.append(f"{threads:>8} {'-':>9} {'-':>9} {'-':>8} {'-':>8}  FAIL (no samples)")
+            continue
+        verdict = 'pass' if step['passed'] else 'FAIL (' + '; '.join(step['breaches']) + ')'
+        lines.append(f"{threads:>8} {row['samples']:>9} {row['throughput']:>9.1f} {row['p95']:>8.0f} "
+                     f"{row['error_rate']:>8.2%}  {verdict}")
+    return "\n".join(lines)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Search for the highest load a plan sustains within an SLO")
+    source = parser.add_mutually_exclusive_group(required=True)
+    source.add_argument('--plan', help='.jmx test plan to scale')
+    source.add_argument('--setup', help='File with a TEST TYPE / TEST PARAMETERS setup block to render')
+    parser.add_argument('--p95', type=float, help='p95 latency SLO in ms (default: from the data CSV or setup)')
+    parser.add_argument('--data-csv', default=DEFAULT_DATA_CSV,
+                        help=f'CSV with an {SLO_COLUMN} column (default {DEFAULT_DATA_CSV})')
+    parser.add_argument('--max-error-rate', type=float, default=DEFAULT_MAX_ERROR_RATE)
+    parser.add_argument('--start', type=int, default=DEFAULT_START_THREADS, help='First load level')
+    parser.add_argument('--max-threads', type=int, default=DEFAULT_MAX_THREADS)
+    parser.add_argument('--growth', type=float, default=DEFAULT_GROWTH, help='Load multiplier until the SLO breaks')
+    parser.add_argument('--precision', type=float, default=DEFAULT_PRECISION,
+                        help='Stop when the pass/fail bracket is within this fraction')
+    parser.add_argument('--duration', type=int, default=DEFAULT_STEP_DURATION, help='Seconds per load level')
+    parser.add_argument('--ramp-up', type=int, default=DEFAULT_STEP_RAMP_UP,
+                        help='Ramp-up seconds per level, excluded from measurements')
+    parser.add_argument('--jmeter', help='JMeter command (default: $JMETER_BIN, $JMETER_HOME or jmeter)')
+    parser.add_argument('--output-dir', help=f'Directory for per-level results (default under {DEFAULT_OUTPUT_DIR})')
+    parser.add_argument('--quiet', action='store_true', help='Hide live status lines')
+    parser.add_argument('--json', action='store_true', help='Print the search steps as JSON')
+    args = parser.parse_args(argv)
+
+    spec = {}
+    plan = args.plan
+    output_dir = args.output_dir
+    try:
+        if args.setup:
+            with open(args.setup, encoding='utf-8') as f:
+                setup_text = f.read()
+            name = os.path.splitext(os.path.basename(args.setup))[0]
+            output_dir = output_dir or os.path.join(DEFAULT_OUTPUT_DIR, f"{name}_{datetime.now():%Y%m%d_%H%M%S}")
+            plan, spec = plan_from_setup(setup_text, output_dir)
+        elif not os.path.exists(plan):
+            print(f"Error: file not found: {plan}")
+            return 1
+    except (OSError, ValueError) as e:
+        print(f"Error: {e}")
+        return 1
+
+    p95 = args.p95 or spec.get('response_time') or slo_from_csv(args.data_csv) or DEFAULT_P95_MS
+    slo = SLO(p95, args.max_error_rate)
+    search = CapacitySearch(plan, slo, jmeter=args.jmeter, output_dir=output_dir, start=args.start,
+                            max_threads=args.max_threads, growth=args.growth, precision=args.precision,
+                            duration=args.duration, ramp_up=args.ramp_up)
+    if not args.json:
+        print(f"Searching {plan} against {slo}")
+
+    def on_step(step):
+        row = step['row']
+        summary = (f"{row['throughput']:.1f} req/s, p95 {row['p95']:.0f} ms, errors {row['error_rate']:.2%}"
+                   if row else 'no samples')
+        verdict = 'pass' if step['passed'] else 'FAIL: ' + '; '.join(step['breaches'])
+        print(f"{step['threads']:>6} threads: {summary} -> {verdict}", flush=True)
+
+    on_update = None if args.quiet or args.json else (
+        lambda elapsed, snapshot: print('    ' + format_windows(elapsed, snapshot), flush=True))
+    try:
+        best = search.run(on_step=None if args.json else on_step, on_update=on_update)
+    except FileNotFoundError:
+        print("Error: JMeter not found. Set JMETER_HOME or JMETER_BIN, or pass --jmeter.")
+        return 1
+
+    if args.json:
+        print(json.dumps({'slo': {'p95_ms': slo.p95_ms, 'max_error_rate': slo.max_error_rate},
+                          'max_sustainable_threads': best['threads'] if best else 0,
+                          'steps': [search.steps[threads] for threads in sorted(search.steps)]}, indent=2))
+        return 0 if best else 2
+
+    print()
+    print(format_steps(search.steps))
+    print()
+    if search.stopped:
+        print("Search stopped by user; the result covers the levels run so far.")
+    if best is None:
+        print(f"No load level met the SLO (lowest tried: {min(search.steps)} threads).")
+        return 2
+    row = best['row']
+    limit = 'the --max-threads limit' if best['threads'] >= search.max_threads else 'the SLO'
+    print(f"Max sustainable load: {best['threads']} threads, {row['throughput']:.1f} req/s "
+          f"(p95 {row['p95']:.0f} ms, errors {row['error_rate']:.2%}); bounded by {limit}")
+    print(f"Results: {search.output_dir}   Plan cache: {search.plans.hits} reused, {search.plans.misses} written")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,189 @@
+from collections import deque
+
+# Rough token estimate used for budgeting; avoids a tokenizer dependency
+CHARS_PER_TOKEN = 4
+
+DEFAULT_TOKEN_BUDGET = 3000
+
+# Older user requests are kept as one-line notes once evicted from the window
+MAX_SUMMARY_NOTES = 10
+SUMMARY_NOTE_CHARS = 160
+
+SECTION_HEADINGS = ('TEST TYPE', 'TEST PARAMETERS', 'REQUIRED INFORMATION')
+
+
+def estimate_tokens(text):
+    return (len(text) + CHARS_PER_TOKEN - 1) // CHARS_PER_TOKEN
+
+
+def parse_setup(text):
+    """Parse a TEST TYPE / TEST PARAMETERS / REQUIRED INFORMATION block
+
+    Returns a dict with 'test_type' (str or None), 'parameters' and
+    'required_information' (ordered dicts of item -> value). Unknown lines
+    are ignored, so partial or chatty responses still yield what they can.
+    """
+    setup = {'test_type': None, 'parameters': {}, 'required_information': {}}
+    section = None
+    for raw_line in text.splitlines():
+        line = raw_line.strip().lstrip('*').strip()
+        if not line:
+            continue
+        heading, _, rest = line.partition(':')
+        heading = heading.strip().upper()
+        if heading in SECTION_HEADINGS and not line.startswith('-'):
+            if heading == 'TEST TYPE':
+                setup['test_type'] = rest.strip() or None
+                section = None
+            elif heading == 'TEST PARAMETERS':
+                section = 'parameters'
+            else:
+                section = 'required_information'
+            continue
+        if section and line[0] in '-•':
+            key, separator, value = line[1:].partition(':')
+            if separator and key.strip():
+                setup[section][key.strip()] = value.strip()
+    return setup
+
+
+def format_setup(setup):
+    """Render a parsed setup back into the plain-text format the prompts use"""
+    lines = []
+    if setup.get('test_type'):
+        lines.append(f"TEST TYPE: {setup['test_type']}")
+    if setup.get('parameters'):
+        lines.append("TEST PARAMETERS:")
+        lines.extend(f"- {key}: {value}" for key, value in setup['parameters'].items())
+    if setup.get('required_information'):
+        lines.append("REQUIRED INFORMATION:")
+        lines.extend(f"- {key}: {value}" for key, value in setup['required_information'].items())
+    return "\n".join(lines)
+
+
+class ConversationContext:
+    """Bounded, token-aware conversation state for prompt building
+
+    Keeps three things instead of the full history:
+    - the original requirement and the current structured setup (parsed from
+      the latest TEST PARAMETERS block the model returned)
+    - one-line notes for older user requests that fell out of the window
+    - a sliding window of the most recent messages, trimmed to fit the budget
+
+    The window text is appended to incrementally as messages arrive and only
+    rebuilt when older messages are evicted, so building a prompt does not
+    re-join the history each turn.
+    """
+
+    def __init__(self, token_budget=DEFAULT_TOKEN_BUDGET):
+        self.token_budget = token_budget
+        self.requirement = None
+        self.current_setup = None
+        self._setup_text = ''
+        self._notes = deque(maxlen=MAX_SUMMARY_NOTES)
+        self._window = deque()
+        self._window_text = ''
+        self._window_tokens = 0
+        self.evicted_messages = 0
+        self.prompt_calls = 0
+        self.prompt_bytes_last = 0
+        self.prompt_bytes_max = 0
+        self.prompt_bytes_total = 0
+
+    @property
+    def messages(self):
+        """Messages currently inside the sliding window"""
+        return list(self._window)
+
+    def add(self, role, content):
+        line = self._format_message(role, content)
+        if role == 'user' and self.requirement is None:
+            self.requirement = content
+        elif role == 'assistant':
+            setup = parse_setup(content)
+            if setup['parameters'] or setup['test_type']:
+                self._update_setup(setup)
+
+        self._window.append((role, content, line))
+        self._window_text += line
+        self._window_tokens += estimate_tokens(line)
+        self._trim()
+
+    def _format_message(self, role, content):
+        speaker = 'User' if role == 'user' else 'Assistant'
+        return f"{speaker}: {content}\n"
+
+    def _update_setup(self, setup):
+        if self.current_setup is None:
+            self.current_setup = setup
+        else:
+            # Keep parameters the model dropped; take everything it restated
+            if setup['test_type']:
+                self.current_setup['test_type'] = setup['test_type']
+            self.current_setup['parameters'].update(setup['parameters'])
+            self.current_setup['required_information'] = setup['required_information']
+        self._setup_text = format_setup(self.current_setup)
+
+    def _fixed_tokens(self):
+        """Tokens of the summary ahead of the window, which is only sent once messages were evicted"""
+        if not self.evicted_messages:
+            return 0
+        return estimate_tokens("\n".join(self._summary_parts()))
+
+    def _trim(self):
+        """Evict the oldest messages until the window fits the token budget"""
+        available = self.token_budget - self._fixed_tokens()
+        if self._window_tokens <= available:
+            return
+        # Always keep the latest exchange, even if it alone exceeds the budget
+        while self._window_tokens > available and len(self._window) > 2:
+            role, content, line = self._window.popleft()
+            self._window_tokens -= estimate_tokens(line)
+            self.evicted_messages += 1
+            if role == 'user' and content != self.requirement:
+                note = ' '.join(content.split())
+                if len(note) > SUMMARY_NOTE_CHARS:
+                    note = note[:SUMMARY_NOTE_CHARS - 3] + '...'
+                self._notes.append(note)
+            # The first eviction starts sending the summary, and notes grow it
+            available = self.token_budget - self._fixed_tokens()
+        self._window_text = ''.join(line for _, _, line in self._window)
+
+    def _summary_parts(self):
+        """Requirement, notes and setup, as sent ahead of the window after an eviction"""
+        parts = []
+        if self.requirement:
+            parts.append(f"Original requirement: {self.requirement}\n")
+        if self._notes:
+            parts.append("Earlier requests (summarized):\n" +
+                         "".join(f"- {note}\n" for note in self._notes))
+        if self._setup_text:
+            parts.append(f"Current test setup:\n{self._setup_text}\n")
+        return parts
+
+    def prompt_prefix(self):
+        """Context text to place ahead of a new request"""
+        parts = self._summary_parts() if self.evicted_messages else []
+        parts.append(self._window_text)
+        return "\n".join(parts).rstrip('\n')
+
+    def record_prompt(self, prompt):
+        """Track the size of a prompt sent to the model"""
+        size = len(prompt.encode('utf-8'))
+        self.prompt_calls += 1
+        self.prompt_bytes_last = size
+        self.prompt_bytes_max = max(self.prompt_bytes_max, size)
+        self.prompt_bytes_total += size
+
+    def metrics(self):
+        calls = self.prompt_calls
+        return {
+            'prompt_calls': calls,
+            'prompt_bytes_last': self.prompt_bytes_last,
+            'prompt_bytes_max': self.prompt_bytes_max,
+            'prompt_bytes_mean': self.prompt_bytes_total / calls if calls else 0.0,
+            'prompt_bytes_total': self.prompt_bytes_total,
+            'window_messages': len(self._window),
+            'window_tokens': self._window_tokens,
+            'evicted_messages': self.evicted_messages,
+        }
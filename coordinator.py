@@ -0,0 +1,404 @@
+import argparse
+import csv
+import heapq
+import os
+import signal
+import sys
+import tempfile
+import time
+from datetime import datetime
+
+from jmeter_runner import DEFAULT_WINDOWS, JMeterRunner, RollingWindows, format_windows
+from jmx_model import JMXDocument, ThreadGroup, format_number, parse_number, throughput_props
+from jtl_analyzer import JTLAnalyzer, format_summary, header_columns
+
+DEFAULT_OUTPUT_DIR = 'jmeter-tests/distributed'
+
+# Thread group properties holding a thread count, split across nodes
+THREAD_COUNT_PROPS = (
+    'ThreadGroup.num_threads',
+    'Start users count',     # Stepping Thread Group
+    'Stop users count',
+    'TargetLevel',           # Concurrency Thread Group
+)
+
+# Arrivals Thread Group's TargetLevel is a rate, not a thread count
+RATE_THREAD_GROUPS = frozenset(['com.blazemeter.jmeter.threads.arrivals.ArrivalsThreadGroup'])
+
+# merge_jtl sorts each node's rows in runs of this many, spilling all but
+# the last run of a file to disk
+MERGE_RUN_ROWS = 200000
+
+# ConstantThroughputTimer calcMode 0 is a per-thread target; splitting the
+# threads already splits it. Every other mode is a shared total.
+PER_THREAD_CALC_MODE = '0'
+
+
+def split_count(total, nodes):
+    """Split an integer total into `nodes` near-equal parts that sum to it"""
+    share, remainder = divmod(total, nodes)
+    return [share + (1 if index < remainder else 0) for index in range(nodes)]
+
+
+def partition_csv(path, output_paths, keep_header):
+    """Deal the rows of a CSV file round-robin into one file per node
+
+    Streams the source once; every partition gets the header line when
+    `keep_header` is set. Returns the number of data rows per partition.
+    """
+    counts = [0] * len(output_paths)
+    outputs = [open(output, 'w', encoding='utf-8', newline='') for output in output_paths]
+    try:
+        with open(path, encoding='utf-8', newline='') as source:
+            if keep_header:
+                header = source.readline()
+                for out in outputs:
+                    out.write(header)
+            for position, line in enumerate(source):
+                if not line.strip():
+                    continue
+                index = position % len(outputs)
+                outputs[index].write(line if line.endswith('\n') else line + '\n')
+                counts[index] += 1
+    finally:
+        for out in outputs:
+            out.close()
+    return counts
+
+
+class NodePlan:
+    """The plan file and data one node runs, plus where its results go"""
+
+    def __init__(self, index, directory):
+        self.index = index
+        self.directory = directory
+        self.plan = os.path.join(directory, 'plan.jmx')
+        self.results = os.path.join(directory, 'results.jtl')
+        self.log_file = os.path.join(directory, 'jmeter.log')
+        self.threads = 0
+        self.data_files = {}
+
+    def __repr__(self):
+        return f"NodePlan({self.index}, threads={self.threads})"
+
+
+def split_plan(plan, nodes, output_dir):
+    """Write one JMX variant per node with thread counts, throughput and CSV data split
+
+    Thread counts are dealt out so the nodes add up to the original plan;
+    shared throughput targets are divided by the node count; each CSV Data
+    Set gets a round-robin partition of its file per node; listener output
+    files are redirected into the node's directory. Returns (node_plans,
+    warnings).
+    """
+    warnings = []
+    plan_dir = os.path.dirname(os.path.abspath(plan))
+    node_plans = [NodePlan(index, os.path.join(output_dir, f"node-{index + 1}")) for index in range(nodes)]
+    for node in node_plans:
+        os.makedirs(node.directory, exist_ok=True)
+
+    # Partition every CSV data file once, up front
+    partitions = {}
+    used_names = set()
+    for element in JMXDocument.load(plan).elements():
+        if element.testclass != 'CSVDataSet' or not element.enabled:
+            continue
+        filename = element.get_prop('filename') or ''
+        if not filename or '${' in filename:
+            continue
+        source = filename if os.path.isabs(filename) else os.path.join(plan_dir, filename)
+        if source in partitions:
+            continue
+        if not os.path.exists(source):
+            warnings.append(f"CSV file not found, left unsplit: {filename}")
+            continue
+        keep_header = element.get_prop('ignoreFirstLine') == 'true' or not element.get_prop('variableNames')
+        base = _unique_name(os.path.basename(source), used_names)
+        outputs = [os.path.abspath(os.path.join(node.directory, base)) for node in node_plans]
+        counts = partition_csv(source, outputs, keep_header)
+        if min(counts) == 0:
+            warnings.append(f"{base} has fewer rows than nodes; some partitions are empty")
+        partitions[source] = outputs
+
+    for node in node_plans:
+        document = JMXDocument.load(plan)
+        for element in document.elements():
+            if isinstance(element, ThreadGroup):
+                node.threads += _split_thread_group(element, node.index, nodes, warnings)
+            elif element.testclass in ('ConstantThroughputTimer', 'PreciseThroughputTimer'):
+                per_thread = (element.testclass == 'ConstantThroughputTimer'
+                              and element.get_prop('calcMode') == PER_THREAD_CALC_MODE)
+                if not per_thread:
+                    for prop in throughput_props(element.element):
+                        value = parse_number(prop.text)
+                        if value is not None:
+                            prop.text = format_number(value / nodes)
+            elif element.testclass == 'CSVDataSet':
+                filename = element.get_prop('filename') or ''
+                source = filename if os.path.isabs(filename) else os.path.join(plan_dir, filename)
+                if source in partitions:
+                    # Relative to the node plan, so a node directory can be shipped elsewhere as is
+                    element.set_prop('filename', os.path.basename(partitions[source][node.index]))
+                    node.data_files[filename] = partitions[source][node.index]
+            elif element.testclass == 'ResultCollector' and element.get_prop('filename'):
+                name = os.path.basename(element.get_prop('filename'))
+                element.set_prop('filename', os.path.abspath(os.path.join(node.directory, name)))
+        document.save(node.plan)
+    return node_plans, list(dict.fromkeys(warnings))
+
+
+def _unique_name(name, used):
+    """`name`, or name_2, name_3, ... if an earlier file already took it"""
+    stem, extension = os.path.splitext(name)
+    candidate = name
+    suffix = 2
+    while candidate in used:
+        candidate = f"{stem}_{suffix}{extension}"
+        suffix += 1
+    used.add(candidate)
+    return candidate
+
+
+def _split_thread_group(group, index, nodes, warnings):
+    """Give this node its share of a thread group's load; returns its thread count"""
+    element = group.element
+    threads = 0
+    for name in THREAD_COUNT_PROPS:
+        value = group.get_prop(name)
+        if value is None:
+            continue
+        total = parse_number(value)
+        if total is None:
+            warnings.append(f"{group.name}: {name} is '{value}', which cannot be split; every node runs it in full")
+            continue
+        if group.testclass in RATE_THREAD_GROUPS and name == 'TargetLevel':
+            group.set_prop(name, format_number(total / nodes))
+            continue
+        share = split_count(int(total), nodes)[index]
+        group.set_prop(name, share)
+        if name in ('ThreadGroup.num_threads', 'TargetLevel'):
+            threads = share
+    rows = element.find("collectionProp[@name='ultimatethreadgroupdata']")
+    if rows is not None:
+        threads = 0
+        for row in rows:
+            props = row.findall('stringProp')
+            total = parse_number(props[0].text) if props else None
+            if total is not None:
+                props[0].text = str(split_count(int(total), nodes)[index])
+                threads += int(props[0].text)
+    if group.enabled and threads == 0 and group.num_threads is not None:
+        # More nodes than threads: this node sits the group out
+        element.set('enabled', 'false')
+    # Distinct thread names per node keep merged results attributable
+    element.set('testname', f"{group.name} [node {index + 1}]")
+    return threads
+
+
+def merge_jtl(paths, output, run_rows=None):
+    """Merge CSV JTL files into one, ordered by timestamp
+
+    JMeter writes rows as samples complete, so a file is not in timeStamp
+    (start time) order. Each input is sorted in runs of `run_rows` rows,
+    spilling full runs to temporary files, and all runs are combined with a
+    k-way heap merge, so memory stays bounded however large the node
+    outputs are. All inputs must share the same header (or have none).
+    """
+    run_rows = run_rows or MERGE_RUN_ROWS
+    files = [open(path, encoding='utf-8', newline='') for path in paths if os.path.exists(path)]
+    try:
+        header = None
+        readers = []
+        for f in files:
+            reader = csv.reader(f)
+            first = next(reader, None)
+            if first is None:
+                continue
+            columns = header_columns(first)
+            if columns is not None:
+                if header is not None and first != header:
+                    raise ValueError(f"{f.name} has different columns than the other node results")
+                header = first
+                readers.append(reader)
+            else:
+                readers.append(_prepend(first, reader))
+        position = header.index('timeStamp') if header else 0
+
+        def keyed(reader):
+            for row in reader:
+                try:
+                    yield int(row[position]), row
+                except (ValueError, IndexError):
+                    continue
+
+        runs = []
+        for reader in readers:
+            run = []
+            for item in keyed(reader):
+                run.append(item)
+                if len(run) >= run_rows:
+                    run.sort(key=_timestamp)
+                    spill = tempfile.TemporaryFile('w+', encoding='utf-8', newline='')
+                    files.append(spill)
+                    csv.writer(spill, lineterminator='\n').writerows(row for _, row in run)
+                    spill.seek(0)
+                    runs.append(keyed(csv.reader(spill)))
+                    run = []
+            run.sort(key=_timestamp)
+            runs.append(iter(run))
+
+        written = 0
+        with open(output, 'w', encoding='utf-8', newline='') as out:
+            writer = csv.writer(out, lineterminator='\n')
+            if header:
+                writer.writerow(header)
+            for _, row in heapq.merge(*runs, key=_timestamp):
+                writer.writerow(row)
+                written += 1
+        return written
+    finally:
+        for f in files:
+            f.close()
+
+
+def _timestamp(item):
+    return item[0]
+
+
+def _prepend(row, reader):
+    yield row
+    yield from reader
+
+
+class Coordinator:
+    """Run a plan across several JMeter nodes and aggregate their results
+
+    Each node is a JMeter process with its own split plan, results file and
+    log. By default nodes are local processes; pass one JMeter command per
+    node (e.g. wrappers that launch on other machines) to spread them out.
+    Results are tailed live from every node into one rolling view, and the
+    node outputs are merged into a single JTL at the end.
+    """
+
+    def __init__(self, plan, nodes=2, jmeter=None, output_dir=None, windows=DEFAULT_WINDOWS, interval=1.0):
+        self.plan = plan
+        if isinstance(nodes, int):
+            self.commands = [jmeter] * nodes
+        else:
+            self.commands = list(nodes)
+        self.output_dir = output_dir or os.path.join(
+            DEFAULT_OUTPUT_DIR, f"{os.path.splitext(os.path.basename(plan))[0]}_{datetime.now():%Y%m%d_%H%M%S}")
+        self.windows = windows
+        self.interval = interval
+        self.node_plans = []
+        self.runners = []
+        self.warnings = []
+        self.stopped = False
+
+    @property
+    def merged_results(self):
+        return os.path.join(self.output_dir, 'results.jtl')
+
+    def prepare(self):
+        self.node_plans, self.warnings = split_plan(self.plan, len(self.commands), self.output_dir)
+        return self.node_plans
+
+    def run(self, on_update=None):
+        """Run every node to completion and return (aggregate JTLAnalyzer, per-node analyzers)"""
+        if not self.node_plans:
+            self.prepare()
+        self.runners = [JMeterRunner(node.plan, node.results, jmeter=command, log_file=node.log_file)
+                        for node, command in zip(self.node_plans, self.commands)]
+        analyzers = [JTLAnalyzer() for _ in self.runners]
+        rolling = RollingWindows(self.windows)
+        previous_handler = signal.getsignal(signal.SIGINT)
+
+        def handle_interrupt(signum, frame):
+            signal.signal(signal.SIGINT, previous_handler)
+            self.stopped = True
+
+        started = time.monotonic()
+        try:
+            for runner in self.runners:
+                runner.start()
+        except Exception:
+            # Do not leave the nodes that did start running unattended
+            for runner in self.runners:
+                runner.stop()
+            raise
+        signal.signal(signal.SIGINT, handle_interrupt)
+        try:
+            while True:
+                finished = all(runner.process.poll() is not None for runner in self.runners)
+                if self.stopped and not finished:
+                    for runner in self.runners:
+                        runner.stop()
+                    finished = True
+                for runner, analyzer in zip(self.runners, analyzers):
+                    for sample in runner.tailer.poll():
+                        analyzer.add(sample)
+                        rolling.add(sample)
+                if on_update:
+                    on_update(time.monotonic() - started, rolling.snapshot())
+                if finished:
+                    break
+                time.sleep(self.interval)
+            for runner, analyzer in zip(self.runners, analyzers):
+                analyzer.feed(runner.tailer.poll())
+        finally:
+            signal.signal(signal.SIGINT, previous_handler)
+            for runner in self.runners:
+                if runner.process.poll() is None:
+                    runner.stop()
+
+        merge_jtl([node.results for node in self.node_plans], self.merged_results)
+        total = JTLAnalyzer()
+        for analyzer in analyzers:
+            total.merge(analyzer)
+        return total, analyzers
+
+    @property
+    def returncodes(self):
+        return [runner.returncode for runner in self.runners]
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Split a JMeter plan across several nodes and merge the results")
+    parser.add_argument('plan', help='.jmx test plan')
+    parser.add_argument('--nodes', type=int, default=2, help='Number of local JMeter processes')
+    parser.add_argument('--node-command', action='append',
+                        help='JMeter command for one node (repeat per node; overrides --nodes)')
+    parser.add_argument('--jmeter', help='JMeter command for local nodes (default: $JMETER_BIN, $JMETER_HOME or jmeter)')
+    parser.add_argument('--output-dir', help=f'Where node plans and results go (default: under {DEFAULT_OUTPUT_DIR})')
+    parser.add_argument('--split-only', action='store_true', help='Write the node plans without running them')
+    parser.add_argument('--interval', type=float, default=1.0, help='Seconds between status lines')
+    args = parser.parse_args(argv)
+
+    coordinator = Coordinator(args.plan, nodes=args.node_command or args.nodes, jmeter=args.jmeter,
+                              output_dir=args.output_dir, interval=args.interval)
+    for node in coordinator.prepare():
+        print(f"Node {node.index + 1}: {node.threads} threads -> {node.plan}")
+    for warning in coordinator.warnings:
+        print(f"Warning: {warning}")
+    if args.split_only:
+        return 0
+
+    try:
+        total, per_node = coordinator.run(
+            lambda elapsed, snapshot: print(format_windows(elapsed, snapshot), flush=True))
+    except FileNotFoundError:
+        print("Error: JMeter not found. Set JMETER_HOME or JMETER_BIN, or pass --jmeter.")
+        return 1
+    print()
+    if coordinator.stopped:
+        print("Test stopped by user.")
+    for node, analyzer in zip(coordinator.node_plans, per_node):
+        print(f"Node {node.index + 1}: {analyzer.total.count} samples, {analyzer.total.errors} errors")
+    print()
+    print(format_summary(total.summary()))
+    print(f"\nMerged results saved to: {coordinator.merged_results}")
+    return max([code or 0 for code in coordinator.returncodes], default=0)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
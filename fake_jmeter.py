@@ -0,0 +1,100 @@
+"""Stand-in for `jmeter -n -t PLAN -l RESULTS` that writes synthetic JTL rows
+
+Reads the thread count and sampler labels from the plan and appends CSV
+results in real time, so the runner and analysis tooling can be exercised
+without a JVM. Latency grows with load past FAKE_JMETER_CAPACITY threads,
+which gives capacity searches a knee to find.
+
+Environment:
+    FAKE_JMETER_DURATION   seconds to run (default: plan duration, max 5)
+    FAKE_JMETER_CAPACITY   threads the simulated target handles comfortably (default 200)
+    FAKE_JMETER_LATENCY    base latency in ms (default 50)
+"""
+import argparse
+import csv
+import os
+import random
+import signal
+import sys
+import time
+
+from jmx_model import JMXDocument, Sampler, ThreadGroup
+from jtl_analyzer import DEFAULT_CSV_COLUMNS
+
+# Upper bound on rows written per second, to keep result files small
+MAX_ROWS_PER_SECOND = 5000
+
+
+def plan_shape(path):
+    """Total threads, duration and sampler labels from a plan"""
+    document = JMXDocument.load(path)
+    threads = 0
+    duration = 0
+    for element in document.elements():
+        if isinstance(element, ThreadGroup):
+            try:
+                threads += int(float(element.num_threads or 1))
+            except ValueError:
+                threads += 1
+            try:
+                duration = max(duration, int(float(element.duration or 0)))
+            except ValueError:
+                pass
+    labels = [element.name or element.tag for element in document.elements() if isinstance(element, Sampler)]
+    return max(threads, 1), duration, labels or ['HTTP Request']
+
+
+def simulated_latency(threads, capacity, base, rng):
+    """Base latency that climbs steeply once threads exceed capacity"""
+    load = threads / capacity
+    scale = 1 + load ** 4
+    return max(1, int(rng.lognormvariate(0, 0.3) * base * scale))
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Fake JMeter for tests and local dry runs")
+    parser.add_argument('-n', action='store_true')
+    parser.add_argument('-t', dest='plan', required=True)
+    parser.add_argument('-l', dest='results', required=True)
+    parser.add_argument('-j', dest='log')
+    args, _ = parser.parse_known_args(argv)
+
+    threads, plan_duration, labels = plan_shape(args.plan)
+    duration = float(os.getenv('FAKE_JMETER_DURATION', min(plan_duration or 5, 5)))
+    capacity = float(os.getenv('FAKE_JMETER_CAPACITY', 200))
+    base = float(os.getenv('FAKE_JMETER_LATENCY', 50))
+    rng = random.Random(threads)
+
+    stopping = []
+    signal.signal(signal.SIGINT, lambda signum, frame: stopping.append(signum))
+    signal.signal(signal.SIGTERM, lambda signum, frame: stopping.append(signum))
+
+    write_header = not os.path.exists(args.results) or os.path.getsize(args.results) == 0
+    started = time.time()
+    with open(args.results, 'a', newline='') as f:
+        # csv.writer quotes labels with commas or quotes the way JMeter does
+        writer = csv.writer(f, lineterminator='\n')
+        if write_header:
+            writer.writerow(DEFAULT_CSV_COLUMNS)
+        while not stopping and time.time() - started < duration:
+            tick = time.time()
+            latency = simulated_latency(threads, capacity, base, rng)
+            # Closed model: each thread completes about 1000/latency requests per second
+            rate = min(MAX_ROWS_PER_SECOND, threads * 1000.0 / latency)
+            rows = max(1, int(rate / 10))
+            now_ms = int(tick * 1000)
+            for i in range(rows):
+                elapsed = simulated_latency(threads, capacity, base, rng)
+                success = elapsed < 30000 and rng.random() > 0.001 * (threads / capacity) ** 2
+                label = labels[i % len(labels)]
+                writer.writerow([now_ms - elapsed, elapsed, label, 200 if success else 500,
+                                 'OK' if success else 'Internal Server Error', f"Thread Group 1-{i % threads + 1}",
+                                 'text', 'true' if success else 'false', '', 1024, 128, threads, threads,
+                                 'https://example.com/', elapsed // 2, 0, rng.randint(0, 5)])
+            f.flush()
+            time.sleep(max(0.0, 0.1 - (time.time() - tick)))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
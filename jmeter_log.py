@@ -0,0 +1,475 @@
+import argparse
+import calendar
+import json
+import os
+import re
+import sys
+import time
+from array import array
+
+from telemetry import count, span
+
+# The log is read in blocks of this size, cut at the last complete line
+READ_BLOCK_SIZE = 8 * 1024 * 1024
+
+TIMESTAMP_FORMAT = '%Y-%m-%d %H:%M:%S'
+
+# Thread lifecycle lines are by far the most common events. The patterns
+# start with a literal, so the regex engine jumps between candidate lines
+# with a fast substring search instead of stepping through every character.
+# THREAD_RE groups: 1 event, 2 group name, 3 group number, 4 thread number.
+# STARTED_RE and FINISHED_RE, used in the hot loop so the event needs no
+# check: 1 group name, 2 group number, 3 thread number.
+THREAD_RE = re.compile(rb'JMeterThread: Thread (started|finished): (.*) (\d+)-(\d+)\r?$', re.MULTILINE)
+STARTED_RE = re.compile(rb'JMeterThread: Thread started: (.*) (\d+)-(\d+)\r?$', re.MULTILINE)
+FINISHED_RE = re.compile(rb'JMeterThread: Thread finished: (.*) (\d+)-(\d+)\r?$', re.MULTILINE)
+
+# Engine lifecycle lines are rare. Candidate lines are found by searching for
+# these literals, then classified with ENGINE_RE anchored at the line start.
+ENGINE_LITERALS = (b' test', b'thread group... ', b'Command: ')
+
+# Groups: 1 timestamp to the second, 2 millis, then one alternative each for
+# engine start (3), thread group config (4 number, 5 threads, 6 ramp-up),
+# stop request (7) and end of test (8). match.lastindex tells them apart.
+ENGINE_RE = re.compile(
+    rb'(\d{4}-\d\d-\d\d \d\d:\d\d:\d\d),(\d{3}) [A-Z]+ +\S+: (?:'
+    rb'(Running the test!)'
+    rb'|Starting thread group\.\.\. number=(\d+) threads=(\d+) ramp-up=(\d+)'
+    rb'|(Stopping test|Shutdown test|Command: (?:Shutdown|StopTestNow) received)'
+    rb'|(Notifying test listeners of end of test))'
+)
+
+RUN_START, GROUP_CONFIG, STOP_REQUEST, RUN_END = 3, 6, 7, 8
+
+# A thread start may drift this far (or RAMP_TOLERANCE of the ramp-up,
+# whichever is larger) from the linear ramp-up schedule before it is flagged
+RAMP_TOLERANCE_MS = 1000
+RAMP_TOLERANCE = 0.1
+
+# Threads that exit mid-test are expected now and then; more than this share is churn
+CHURN_THRESHOLD = 0.05
+
+# Without a stop request, threads finishing within this long of the last one
+# are part of the normal end of test rather than churn
+END_GRACE_MS = 5000
+
+# Time from a stop request to the end of test above which stopping counts as slow
+STOP_LATENCY_WARN_MS = 5000
+
+NOT_SEEN = -1
+
+
+class GroupTimeline:
+    """Thread lifecycle of one thread group within a test run
+
+    Start and finish offsets (ms from the run start) are stored by thread
+    number in typed arrays, so a group of 100k threads costs under 2 MB.
+    Counts and the per-second active-thread timeline are derived from them.
+    """
+
+    def __init__(self, number, name=None):
+        self.number = number
+        self.name = name
+        self.threads = None
+        self.ramp_up = None
+        self.starts = array('q')
+        self.ends = array('q')
+
+    def grow(self, thread):
+        """Make room for thread numbers up to `thread`
+
+        Capacity at least doubles, since threads usually appear one number
+        at a time; unused slots stay NOT_SEEN and count as never seen.
+        """
+        size = len(self.starts)
+        if thread > size:
+            filler = array('q', [NOT_SEEN]) * (max(thread, 2 * size) - size)
+            self.starts.extend(filler)
+            self.ends.extend(filler)
+
+    def thread_started(self, offset, thread):
+        self.grow(thread)
+        self.starts[thread - 1] = offset
+
+    def thread_finished(self, offset, thread):
+        self.grow(thread)
+        self.ends[thread - 1] = offset
+
+    @property
+    def started(self):
+        return len(self.starts) - self.starts.count(NOT_SEEN)
+
+    @property
+    def finished(self):
+        return len(self.ends) - self.ends.count(NOT_SEEN)
+
+    def active(self):
+        """Active threads at the end of every second since the run started"""
+        last = max(max(self.starts, default=0), max(self.ends, default=0))
+        timeline = array('l', [0] * (last // 1000 + 1 if self.starts else 0))
+        for start, end in zip(self.starts, self.ends):
+            if start != NOT_SEEN:
+                timeline[start // 1000] += 1
+            if end != NOT_SEEN:
+                timeline[end // 1000] -= 1
+        running = 0
+        for second, change in enumerate(timeline):
+            running += change
+            timeline[second] = running
+        return timeline
+
+    def started_before(self, cutoff):
+        return sum(1 for start in self.starts if start != NOT_SEEN and start < cutoff)
+
+    def ramp_lag(self, cutoff=None):
+        """Largest deviation (ms) of a thread start from the linear ramp-up schedule
+
+        Starts at or after `cutoff` are ignored: once a test is stopped JMeter
+        launches the remaining threads immediately, only to stop them again.
+        """
+        if not self.threads or self.ramp_up is None:
+            return None
+        starts = [(index, start) for index, start in enumerate(self.starts)
+                  if start != NOT_SEEN and (cutoff is None or start < cutoff)]
+        if not starts:
+            return None
+        first = min(start for _, start in starts)
+        interval = self.ramp_up * 1000 / self.threads
+        return max(abs(start - first - index * interval) for index, start in starts)
+
+    def early_finishes(self, cutoff):
+        """Threads that finished before `cutoff` ms, plus their mean lifetime"""
+        count = lifetime = 0
+        for start, end in zip(self.starts, self.ends):
+            if end != NOT_SEEN and end < cutoff:
+                count += 1
+                if start != NOT_SEEN:
+                    lifetime += end - start
+        return count, (lifetime / count if count else None)
+
+    def to_dict(self):
+        active = self.active()
+        ended = [end for end in self.ends if end != NOT_SEEN]
+        lifetimes = [end - start for start, end in zip(self.starts, self.ends)
+                     if start != NOT_SEEN and end != NOT_SEEN]
+        return {
+            'number': self.number,
+            'name': self.name,
+            'threads': self.threads,
+            'ramp_up': self.ramp_up,
+            'started': self.started,
+            'finished': self.finished,
+            'peak_active': max(active, default=0),
+            'last_finish_ms': max(ended, default=None),
+            'mean_lifetime_ms': sum(lifetimes) / len(lifetimes) if lifetimes else None,
+            'ramp_lag_ms': self.ramp_lag(),
+        }
+
+
+class TestRun:
+    """One `Running the test!` ... `end of test` section of a jmeter.log"""
+
+    def __init__(self, started_at):
+        self.started_at = started_at
+        self.stop_requested_at = None
+        self.ended_at = None
+        self.groups = {}
+
+    def group(self, number, name=None):
+        """Timeline for a group, keyed by its number as it appears in the log"""
+        group = self.groups.get(number)
+        if group is None:
+            group = self.groups[number] = GroupTimeline(int(number))
+        if group.name is None and name is not None:
+            group.name = name.decode('utf-8', errors='replace')
+        return group
+
+    def offset(self, timestamp):
+        return max(0, timestamp - self.started_at)
+
+    def active(self):
+        """Active threads per second across all thread groups"""
+        timelines = [group.active() for group in self.groups.values()]
+        length = max((len(timeline) for timeline in timelines), default=0)
+        total = array('l', [0] * length)
+        for timeline in timelines:
+            running = 0
+            for second in range(length):
+                if second < len(timeline):
+                    running = timeline[second]
+                total[second] += running
+        return total
+
+    def anomalies(self):
+        """Human-readable findings: ramp-up drift, thread churn, slow or hung stops"""
+        findings = []
+        stop = None if self.stop_requested_at is None else self.offset(self.stop_requested_at)
+        end = None if self.ended_at is None else self.offset(self.ended_at)
+        for group in self.groups.values():
+            name = group.name or f"thread group {group.number}"
+            started = group.started if stop is None else group.started_before(stop)
+            if group.threads and started < group.threads:
+                if stop is None:
+                    findings.append(f"{name}: only {started} of {group.threads} threads started")
+                else:
+                    findings.append(f"{name}: only {started} of {group.threads} threads started before "
+                                    f"the stop request (test stopped during ramp-up)")
+            lag = group.ramp_lag(stop)
+            if lag is not None and started > 1:
+                tolerance = max(RAMP_TOLERANCE_MS, RAMP_TOLERANCE * group.ramp_up * 1000)
+                if lag > tolerance:
+                    findings.append(f"{name}: thread starts drift up to {lag / 1000:.1f}s from the "
+                                    f"{group.ramp_up}s ramp-up schedule")
+            if stop is not None:
+                cutoff = stop
+            else:
+                last = max((e for e in group.ends if e != NOT_SEEN), default=None)
+                cutoff = None if last is None else last - END_GRACE_MS
+            if cutoff is not None and started:
+                count, lifetime = group.early_finishes(cutoff)
+                if count / started > CHURN_THRESHOLD:
+                    findings.append(f"{name}: {count} of {started} threads exited mid-test "
+                                    f"(mean lifetime {lifetime / 1000:.2f}s)")
+            running = group.started - group.finished
+            if running > 0 and end is not None:
+                findings.append(f"{name}: {running} threads never reported finishing")
+        if stop is not None:
+            if end is None:
+                findings.append("stop was requested but the end of test was never logged")
+            elif end - stop > STOP_LATENCY_WARN_MS:
+                findings.append(f"engine took {(end - stop) / 1000:.1f}s to stop after the stop request")
+        return findings
+
+    def to_dict(self):
+        stop_latency = None
+        if self.stop_requested_at is not None and self.ended_at is not None:
+            stop_latency = self.ended_at - self.stop_requested_at
+        return {
+            'started_at': format_timestamp(self.started_at),
+            'duration_ms': None if self.ended_at is None else self.ended_at - self.started_at,
+            'stop_requested_ms': None if self.stop_requested_at is None else self.offset(self.stop_requested_at),
+            'stop_latency_ms': stop_latency,
+            'peak_active': max(self.active(), default=0),
+            'groups': [group.to_dict() for group in sorted(self.groups.values(), key=lambda g: g.number)],
+            'anomalies': self.anomalies(),
+        }
+
+
+def find_engine_events(block):
+    """Sorted (line_start, kind, match) for the engine lifecycle lines of a block"""
+    events = {}
+    for literal in ENGINE_LITERALS:
+        position = block.find(literal)
+        while position >= 0:
+            start = block.rfind(b'\n', 0, position) + 1
+            if start not in events:
+                match = ENGINE_RE.match(block, start)
+                if match:
+                    events[start] = (start, match.lastindex, match)
+            end = block.find(b'\n', position)
+            position = block.find(literal, end) if end >= 0 else -1
+    return sorted(events.values(), key=lambda event: event[0])
+
+
+class JMeterLogAnalyzer:
+    """Streaming jmeter.log parser that builds per-run thread timelines
+
+    The log is read once, block by block. Lifecycle lines are located with
+    literal searches; every other line is never split, decoded or visited
+    by Python code.
+    """
+
+    def __init__(self):
+        self.runs = []
+        self.lines = 0
+        self._seconds = {}
+
+    def feed(self, block):
+        """Parse a block of complete log lines (bytes)
+
+        Engine events (run start, thread group config, stop, end of test) are
+        rare, so they are located first and split the block into segments in
+        which only thread events need handling, each for a single run.
+        """
+        self.lines += block.count(b'\n')
+        position = 0
+        for start, kind, match in find_engine_events(block):
+            self._feed_threads(block, position, start)
+            position = start
+            timestamp = self._timestamp(block, start)
+            if timestamp is None:
+                continue
+            run = self.runs[-1] if self.runs else None
+            if kind == RUN_START:
+                self.runs.append(TestRun(timestamp))
+            elif kind == GROUP_CONFIG:
+                number, threads, ramp_up = match.group(4, 5, 6)
+                group = self._current_run(timestamp).group(number)
+                group.threads = int(threads)
+                group.ramp_up = int(ramp_up)
+            elif run is not None and run.ended_at is None:
+                if kind == STOP_REQUEST:
+                    if run.stop_requested_at is None:
+                        run.stop_requested_at = timestamp
+                else:
+                    run.ended_at = timestamp
+        self._feed_threads(block, position, len(block))
+
+    def _timestamp(self, block, start):
+        """Epoch milliseconds of the log line at `start`, or None if it has no timestamp"""
+        key = block[start:start + 19]
+        second = self._seconds.get(key)
+        if second is None:
+            try:
+                second = calendar.timegm(time.strptime(key.decode('ascii'), TIMESTAMP_FORMAT)) * 1000
+                millis = int(block[start + 20:start + 23])
+            except (UnicodeDecodeError, ValueError):
+                return None
+            self._seconds[key] = second
+            return second + millis
+        return second + int(block[start + 20:start + 23])
+
+    def _current_run(self, timestamp):
+        if not self.runs or self.runs[-1].ended_at is not None:
+            # Log that starts mid-run, or thread events after the end of test
+            self.runs.append(TestRun(timestamp))
+        return self.runs[-1]
+
+    def _feed_threads(self, block, start, end):
+        """Record the thread events between two offsets of a block (hot loop)
+
+        The segment belongs to one run, found from its first event. Starts
+        and finishes fill separate slots, so each gets its own pass and the
+        loop never branches on the event. Offsets are cached per timestamp,
+        since threads tend to start and finish in bursts.
+        """
+        run = None
+        for match in THREAD_RE.finditer(block, start, end):
+            timestamp = self._timestamp(block, block.rfind(b'\n', 0, match.start()) + 1)
+            if timestamp is not None:
+                run = self._current_run(timestamp)
+                break
+        if run is None:
+            return
+        groups = run.groups
+        origin = run.started_at
+        seconds = self._seconds
+        offsets = {}
+        rfind = block.rfind
+        for pattern, started in ((STARTED_RE, True), (FINISHED_RE, False)):
+            number = None
+            for match in pattern.finditer(block, start, end):
+                line = rfind(b'\n', 0, match.start()) + 1
+                key = block[line:line + 23]
+                offset = offsets.get(key)
+                if offset is None:
+                    timestamp = seconds.get(key[:19])
+                    if timestamp is None:
+                        timestamp = self._timestamp(block, line)
+                        if timestamp is None:
+                            # Not a log line (e.g. inside a stack trace)
+                            continue
+                    else:
+                        timestamp += int(key[20:])
+                    offset = offsets[key] = timestamp - origin
+                name, group_number, thread = match.groups()
+                if group_number != number:
+                    number = group_number
+                    group = groups.get(number)
+                    if group is None or group.name is None:
+                        group = run.group(number, name)
+                    slots = group.starts if started else group.ends
+                # Inlined thread_started/thread_finished: this runs once per event
+                thread = int(thread)
+                if thread > len(slots):
+                    group.grow(thread)
+                slots[thread - 1] = offset
+
+    def feed_file(self, f, block_size=READ_BLOCK_SIZE):
+        """Read a binary file object block by block, cutting at line boundaries"""
+        lines = self.lines
+        size = 0
+        pending = b''
+        with span('log.parse'):
+            while True:
+                block = f.read(block_size)
+                if not block:
+                    break
+                size += len(block)
+                block = pending + block
+                cut = block.rfind(b'\n') + 1
+                if cut == 0:
+                    pending = block
+                    continue
+                pending = block[cut:]
+                self.feed(block[:cut])
+            if pending:
+                self.feed(pending + b'\n')
+        count('log.bytes', size)
+        count('log.lines', self.lines - lines)
+        return self
+
+    def summary(self):
+        # Timelines, peaks and anomalies are derived here, from the recorded events
+        with span('log.analyze'):
+            return [run.to_dict() for run in self.runs]
+
+
+def analyze_log(path):
+    """Parse a jmeter.log file and return its JMeterLogAnalyzer"""
+    with open(path, 'rb') as f:
+        return JMeterLogAnalyzer().feed_file(f)
+
+
+def format_timestamp(millis):
+    return time.strftime(TIMESTAMP_FORMAT, time.gmtime(millis // 1000)) + f",{millis % 1000:03d}"
+
+
+def format_report(runs):
+    """Plain-text report of every run in the log"""
+    lines = []
+    for position, run in enumerate(runs, 1):
+        duration = '-' if run['duration_ms'] is None else f"{run['duration_ms'] / 1000:.1f}s"
+        lines.append(f"Run {position}: started {run['started_at']}, duration {duration}, "
+                     f"peak {run['peak_active']} active threads")
+        if run['stop_requested_ms'] is not None:
+            latency = '-' if run['stop_latency_ms'] is None else f"{run['stop_latency_ms']} ms"
+            lines.append(f"  Stop requested at +{run['stop_requested_ms'] / 1000:.1f}s, engine stopped in {latency}")
+        for group in run['groups']:
+            configured = '' if group['threads'] is None else \
+                f" (configured {group['threads']} threads, ramp-up {group['ramp_up']}s)"
+            lifetime = '-' if group['mean_lifetime_ms'] is None else f"{group['mean_lifetime_ms'] / 1000:.2f}s"
+            lines.append(f"  {group['name'] or group['number']}{configured}: started {group['started']}, "
+                         f"finished {group['finished']}, peak {group['peak_active']}, mean lifetime {lifetime}")
+        for finding in run['anomalies']:
+            lines.append(f"  ! {finding}")
+        lines.append("")
+    return "\n".join(lines).rstrip()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Analyze thread lifecycle in a jmeter.log")
+    parser.add_argument('path', help='jmeter.log file')
+    parser.add_argument('--timeline', action='store_true', help='Print active threads per second for each run')
+    parser.add_argument('--json', action='store_true', help='Print the report as JSON')
+    args = parser.parse_args(argv)
+    if not os.path.exists(args.path):
+        print(f"Error: file not found: {args.path}")
+        return 1
+
+    analyzer = analyze_log(args.path)
+    runs = analyzer.summary()
+    if args.json:
+        print(json.dumps(runs, indent=2))
+    else:
+        print(format_report(runs) or "No test runs found.")
+    if args.timeline:
+        for position, run in enumerate(analyzer.runs, 1):
+            print(f"\nRun {position} active threads per second:")
+            for second, active in enumerate(run.active()):
+                print(f"  +{second:5d}s {active:7d}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,294 @@
+import argparse
+import csv
+import io
+import os
+import shlex
+import signal
+import subprocess
+import sys
+import time
+
+from jtl_analyzer import (DEFAULT_CSV_COLUMNS, PERCENTILES, JTLAnalyzer, LatencyHistogram,
+                          format_summary, header_columns, rows_to_samples)
+from results_store import DEFAULT_STORE_PATH, ResultsStore, format_comparison
+
+DEFAULT_WINDOWS = (1, 10)
+
+# Seconds to wait for JMeter to exit after a stop request before escalating
+STOP_TIMEOUT = 15
+
+
+def default_jmeter_command():
+    """JMeter launcher from JMETER_BIN, JMETER_HOME or PATH"""
+    if os.getenv('JMETER_BIN'):
+        return shlex.split(os.getenv('JMETER_BIN'))
+    if os.getenv('JMETER_HOME'):
+        name = 'jmeter.bat' if os.name == 'nt' else 'jmeter'
+        return [os.path.join(os.getenv('JMETER_HOME'), 'bin', name)]
+    return ['jmeter']
+
+
+class JTLTailer:
+    """Incrementally read samples appended to a CSV JTL file
+
+    Tracks a byte offset and keeps any incomplete trailing record until the
+    writer finishes it, so each poll() only parses new, complete rows. A
+    newline only ends a record outside a quoted field, using the same quote
+    parity rule as jtl_analyzer's parallel splits. If
+    the file already has rows when tailing starts (JMeter appends to an
+    existing results file), only rows written afterwards are returned.
+    """
+
+    def __init__(self, path, from_end=True):
+        self.path = path
+        self.offset = 0
+        self.columns = None
+        self._partial = b''
+        if from_end and os.path.exists(path) and os.path.getsize(path):
+            with open(path, 'rb') as f:
+                first = f.readline().decode('utf-8', errors='replace')
+                self._set_columns(next(csv.reader([first]), []))
+                f.seek(0, os.SEEK_END)
+                self.offset = f.tell()
+
+    def _set_columns(self, row):
+        self.columns = header_columns(row)
+        if self.columns is None:
+            self.columns = DEFAULT_CSV_COLUMNS
+            return [row]
+        return []
+
+    def poll(self):
+        """Return the Samples for complete rows written since the last poll"""
+        try:
+            with open(self.path, 'rb') as f:
+                f.seek(self.offset)
+                data = f.read()
+        except FileNotFoundError:
+            return []
+        if not data:
+            return []
+        self.offset += len(data)
+        data = self._partial + data
+        # The last newline preceded by an even number of quotes ends a record
+        end = data.rfind(b'\n')
+        quotes = data.count(b'"', 0, end) if end >= 0 else 0
+        while quotes % 2 and end >= 0:
+            previous = data.rfind(b'\n', 0, end)
+            quotes -= data.count(b'"', max(previous, 0), end)
+            end = previous
+        if end < 0:
+            self._partial = data
+            return []
+        self._partial = data[end + 1:]
+        reader = csv.reader(io.StringIO(data[:end + 1].decode('utf-8', errors='replace'), newline=''))
+        pending = []
+        if self.columns is None:
+            first = next(reader, None)
+            pending = self._set_columns(first) if first is not None else []
+        return list(rows_to_samples(self.columns, pending, reader))
+
+
+class RollingWindows:
+    """Throughput, error rate and latency over trailing time windows
+
+    Samples are bucketed per completion second into mergeable histograms;
+    a window is the merge of its most recent buckets, and buckets older
+    than the largest window are dropped, so memory stays constant.
+    """
+
+    def __init__(self, windows=DEFAULT_WINDOWS):
+        self.windows = tuple(sorted(windows))
+        self.buckets = {}
+        self.latest = None
+
+    def add(self, sample):
+        second = (sample.timestamp + sample.elapsed) // 1000
+        bucket = self.buckets.get(second)
+        if bucket is None:
+            bucket = self.buckets[second] = [0, 0, 0, LatencyHistogram()]
+        bucket[0] += 1
+        if not sample.success:
+            bucket[1] += 1
+        bucket[2] += sample.elapsed
+        bucket[3].record(sample.elapsed)
+        if self.latest is None or second > self.latest:
+            self.latest = second
+            oldest = second - self.windows[-1]
+            for stale in [key for key in self.buckets if key <= oldest]:
+                del self.buckets[stale]
+
+    def snapshot(self):
+        """Stats for each window, ending at the latest completed second"""
+        result = {}
+        for window in self.windows:
+            count = errors = elapsed = 0
+            histogram = LatencyHistogram()
+            if self.latest is not None:
+                for second in range(self.latest - window + 1, self.latest + 1):
+                    bucket = self.buckets.get(second)
+                    if bucket is None:
+                        continue
+                    count += bucket[0]
+                    errors += bucket[1]
+                    elapsed += bucket[2]
+                    histogram.merge(bucket[3])
+            percentiles = histogram.percentiles(PERCENTILES)
+            result[window] = {
+                'samples': count,
+                'throughput': count / window,
+                'error_rate': errors / count if count else 0.0,
+                'mean': elapsed / count if count else None,
+                'p50': percentiles[50],
+                'p95': percentiles[95],
+                'p99': percentiles[99],
+            }
+        return result
+
+
+def format_windows(elapsed_seconds, snapshot):
+    """One status line for the terminal"""
+    parts = [f"[{elapsed_seconds:6.0f}s]"]
+    for window, stats in snapshot.items():
+        p95 = '-' if stats['p95'] is None else f"{stats['p95']:.0f}ms"
+        parts.append(f"{window}s: {stats['throughput']:8.1f} req/s  p95 {p95:>7}  "
+                     f"err {stats['error_rate'] * 100:5.2f}%")
+    return "  |  ".join(parts)
+
+
+class JMeterRunner:
+    """Run a plan with JMeter in non-GUI mode and tail its results live
+
+    run() launches `jmeter -n -t PLAN -l RESULTS`, polls the JTL every
+    `interval` seconds and calls `on_update(elapsed, snapshot)` with rolling
+    window stats. Ctrl+C asks JMeter to stop, escalating to terminate/kill
+    if it does not exit in time; the samples written so far are still
+    aggregated. Returns the JTLAnalyzer covering the whole run.
+    """
+
+    def __init__(self, plan, results, jmeter=None, log_file=None, extra_args=None,
+                 windows=DEFAULT_WINDOWS, interval=1.0):
+        self.plan = plan
+        self.results = results
+        if isinstance(jmeter, str):
+            jmeter = shlex.split(jmeter)
+        self.jmeter = jmeter or default_jmeter_command()
+        self.log_file = log_file
+        self.extra_args = list(extra_args or [])
+        self.windows = windows
+        self.interval = interval
+        self.process = None
+        self.tailer = None
+        self.stopped = False
+
+    def command(self):
+        command = self.jmeter + ['-n', '-t', self.plan, '-l', self.results]
+        if self.log_file:
+            command += ['-j', self.log_file]
+        return command + self.extra_args
+
+    def start(self):
+        directory = os.path.dirname(self.results)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self.tailer = JTLTailer(self.results)
+        self.process = subprocess.Popen(self.command(), stdout=subprocess.DEVNULL)
+        return self.process
+
+    def stop(self, timeout=STOP_TIMEOUT):
+        """Ask JMeter to stop, escalating until the process has exited"""
+        self.stopped = True
+        if self.process is None or self.process.poll() is not None:
+            return
+        # SIGINT lets JMeter run its shutdown hooks and flush results
+        steps = [self.process.terminate]
+        if os.name != 'nt':
+            steps.insert(0, lambda: self.process.send_signal(signal.SIGINT))
+        for step in steps:
+            step()
+            try:
+                self.process.wait(timeout=timeout)
+                return
+            except subprocess.TimeoutExpired:
+                continue
+        self.process.kill()
+        self.process.wait()
+
+    def run(self, on_update=None):
+        analyzer = JTLAnalyzer()
+        rolling = RollingWindows(self.windows)
+        previous_handler = signal.getsignal(signal.SIGINT)
+
+        def handle_interrupt(signum, frame):
+            # Stop on the first Ctrl+C; a second one falls back to the default
+            signal.signal(signal.SIGINT, previous_handler)
+            self.stopped = True
+
+        started = time.monotonic()
+        self.start()
+        signal.signal(signal.SIGINT, handle_interrupt)
+        try:
+            while True:
+                finished = self.process.poll() is not None
+                if self.stopped and not finished:
+                    self.stop()
+                    finished = True
+                for sample in self.tailer.poll():
+                    analyzer.add(sample)
+                    rolling.add(sample)
+                if on_update:
+                    on_update(time.monotonic() - started, rolling.snapshot())
+                if finished:
+                    break
+                time.sleep(self.interval)
+            # Pick up rows flushed while JMeter shut down
+            for sample in self.tailer.poll():
+                analyzer.add(sample)
+        finally:
+            signal.signal(signal.SIGINT, previous_handler)
+            if self.process.poll() is None:
+                self.stop()
+        return analyzer
+
+    @property
+    def returncode(self):
+        return self.process.returncode if self.process else None
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Run a JMeter plan in non-GUI mode with live results")
+    parser.add_argument('plan', help='.jmx test plan')
+    parser.add_argument('--results', help='JTL output (default: next to the plan)')
+    parser.add_argument('--jmeter', help='JMeter command (default: $JMETER_BIN, $JMETER_HOME or jmeter)')
+    parser.add_argument('--log', help='JMeter log file')
+    parser.add_argument('--interval', type=float, default=1.0, help='Seconds between status lines')
+    parser.add_argument('--store', nargs='?', const=DEFAULT_STORE_PATH,
+                        help=f'Record the run in a results store and check for regressions '
+                             f'(default {DEFAULT_STORE_PATH})')
+    args = parser.parse_args(argv)
+
+    results = args.results or os.path.splitext(args.plan)[0] + '.jtl'
+    runner = JMeterRunner(args.plan, results, jmeter=args.jmeter, log_file=args.log, interval=args.interval)
+    print(f"Running: {' '.join(runner.command())}")
+    try:
+        analyzer = runner.run(lambda elapsed, snapshot: print(format_windows(elapsed, snapshot), flush=True))
+    except FileNotFoundError:
+        print("Error: JMeter not found. Set JMETER_HOME or JMETER_BIN, or pass --jmeter.")
+        return 1
+    print()
+    if runner.stopped:
+        print("Test stopped by user.")
+    print(format_summary(analyzer.summary()))
+    print(f"\nResults saved to: {results}")
+    if args.store:
+        store = ResultsStore(args.store)
+        run_id = store.add_run(analyzer, plan=args.plan, results=results,
+                               fingerprint=ResultsStore.fingerprint(results))
+        print()
+        print(format_comparison(store.compare(run_id)))
+        store.close()
+    return runner.returncode or 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,386 @@
+import xml.etree.ElementTree as ET
+
+XML_DECLARATION = '<?xml version="1.0" encoding="UTF-8"?>\n'
+
+# Elements that are not supported (or deprecated) in JMeter 5.6.3
+INCOMPATIBLE_ELEMENTS = frozenset([
+    'ResponseTimeAssertion',
+    'DebugSampler',
+    'BSFSampler',
+    'BSFPreProcessor',
+    'BSFPostProcessor',
+    'BSFAssertion',
+    'BeanShellSampler',  # Deprecated in newer versions
+    'AjpSampler',
+    'GraphVisualizer',   # Removed in newer versions
+    'ComparisonVisualizer',
+    'MonitorHealthVisualizer',
+    'DisableAction'
+])
+
+# Fields JMeter 5.6.3 rejects inside a SampleSaveConfiguration
+PROBLEMATIC_SAVE_FIELDS = frozenset([
+    'sampleCounts',
+    'errorCount',
+    'assertions',
+    'hostname',
+    'threadCounts',
+    'sampleCount'
+])
+
+PROPERTY_TAGS = frozenset(['stringProp', 'intProp', 'longProp', 'boolProp', 'doubleProp', 'floatProp'])
+
+THREAD_GROUP_CLASSES = frozenset([
+    'ThreadGroup',
+    'SetupThreadGroup',
+    'PostThreadGroup',
+    'kg.apc.jmeter.threads.SteppingThreadGroup',
+    'kg.apc.jmeter.threads.UltimateThreadGroup',
+    'com.blazemeter.jmeter.threads.concurrency.ConcurrencyThreadGroup',
+    'com.blazemeter.jmeter.threads.arrivals.ArrivalsThreadGroup',
+])
+
+
+class JMXParseError(ValueError):
+    """Raised when JMX content is not well-formed XML"""
+
+
+class TestElement:
+    """A JMeter test element paired with the hashTree holding its children"""
+
+    def __init__(self, element, hash_tree=None):
+        self.element = element
+        self.hash_tree = hash_tree
+
+    @property
+    def tag(self):
+        return self.element.tag
+
+    @property
+    def testclass(self):
+        return self.element.get('testclass', self.element.tag)
+
+    @property
+    def name(self):
+        return self.element.get('testname', '')
+
+    @property
+    def enabled(self):
+        return self.element.get('enabled', 'true') != 'false'
+
+    def get_prop(self, name, default=None):
+        """Return the text of a direct child property by its name attribute"""
+        for child in self.element:
+            if child.tag in PROPERTY_TAGS and child.get('name') == name:
+                return child.text if child.text is not None else ''
+        return default
+
+    def set_prop(self, name, value, prop_type='stringProp'):
+        """Set a direct child property, creating it if missing"""
+        for child in self.element:
+            if child.tag in PROPERTY_TAGS and child.get('name') == name:
+                child.text = str(value)
+                return child
+        prop = ET.SubElement(self.element, prop_type, {'name': name})
+        prop.text = str(value)
+        return prop
+
+    @property
+    def children(self):
+        """Child test elements, each paired with its own hashTree"""
+        if self.hash_tree is None:
+            return []
+        return list(iter_test_elements(self.hash_tree))
+
+    def walk(self):
+        """Yield this element and all descendant test elements depth-first"""
+        yield self
+        for child in self.children:
+            yield from child.walk()
+
+    def __repr__(self):
+        return f"{type(self).__name__}({self.testclass!r}, {self.name!r})"
+
+
+class TestPlan(TestElement):
+    """The root TestPlan element"""
+
+
+class ThreadGroup(TestElement):
+    """A thread group (standard, setUp/tearDown or plugin variants)"""
+
+    @property
+    def num_threads(self):
+        return self.get_prop('ThreadGroup.num_threads')
+
+    @property
+    def ramp_time(self):
+        return self.get_prop('ThreadGroup.ramp_time')
+
+    @property
+    def duration(self):
+        return self.get_prop('ThreadGroup.duration')
+
+
+class Sampler(TestElement):
+    """A sampler such as HTTPSamplerProxy or JDBCSampler"""
+
+
+def wrap(element, hash_tree=None):
+    """Return the typed TestElement wrapper for an ET element"""
+    testclass = element.get('testclass', element.tag)
+    if testclass == 'TestPlan':
+        return TestPlan(element, hash_tree)
+    if testclass in THREAD_GROUP_CLASSES or element.tag.endswith('ThreadGroup'):
+        return ThreadGroup(element, hash_tree)
+    if element.tag.endswith('Sampler') or element.tag.endswith('SamplerProxy'):
+        return Sampler(element, hash_tree)
+    return TestElement(element, hash_tree)
+
+
+def iter_test_elements(hash_tree):
+    """Yield (element, following hashTree) pairs from a hashTree as TestElements"""
+    children = list(hash_tree)
+    position = 0
+    while position < len(children):
+        element = children[position]
+        position += 1
+        if element.tag == 'hashTree':
+            continue
+        paired = None
+        if position < len(children) and children[position].tag == 'hashTree':
+            paired = children[position]
+            position += 1
+        yield wrap(element, paired)
+
+
+def parse_number(text):
+    """A property value as a float, or None if it is empty or not a number"""
+    try:
+        return float(text)
+    except (TypeError, ValueError):
+        return None
+
+
+def format_number(value):
+    """A number as property text, without a trailing .0"""
+    return f"{value:g}"
+
+
+def throughput_props(element):
+    """The throughput value elements of a timer, in either property form"""
+    for child in element:
+        if child.get('name') == 'throughput':
+            yield child
+        elif child.tag == 'doubleProp' and child.findtext('name') == 'throughput':
+            value = child.find('value')
+            if value is not None:
+                yield value
+
+
+class SanitizeReport:
+    """What a sanitize pass removed and whether the result is a usable plan"""
+
+    def __init__(self):
+        self.removed_elements = {}
+        self.removed_fields = 0
+        self.thread_groups = 0
+        self.valid_thread_groups = 0
+        self.problems = []
+
+    @property
+    def valid(self):
+        return not self.problems
+
+    def _remove_element(self, tag):
+        self.removed_elements[tag] = self.removed_elements.get(tag, 0) + 1
+
+    def finish(self, warn=True):
+        """Report removals and record thread group problems once traversal is done"""
+        if warn:
+            for tag in self.removed_elements:
+                print(f"Warning: Removing incompatible element '{tag}' from JMX")
+        if not self.thread_groups:
+            self.problems.append("no ThreadGroup element")
+        elif not self.valid_thread_groups:
+            self.problems.append("no ThreadGroup defines num_threads and ramp_time")
+        return self
+
+
+def check_thread_group(element, report):
+    """Count a thread group element and whether it defines its load shape"""
+    report.thread_groups += 1
+    group = ThreadGroup(element)
+    if group.num_threads is not None and (
+            group.ramp_time is not None or group.get_prop('Start users period') is not None):
+        report.valid_thread_groups += 1
+    elif element.find("collectionProp[@name='ultimatethreadgroupdata']") is not None:
+        report.valid_thread_groups += 1
+
+
+def sanitize_children(parent, report):
+    """Sanitize everything below `parent` in place, recording into `report`"""
+    children = list(parent)
+    in_hash_tree = parent.tag == 'hashTree'
+    in_save_config = parent.tag == 'value' and parent.get('class') == 'SampleSaveConfiguration'
+    position = 0
+    while position < len(children):
+        child = children[position]
+        position += 1
+        tag = child.tag
+        if in_hash_tree and tag in INCOMPATIBLE_ELEMENTS:
+            # Drop the element together with the hashTree holding its children
+            parent.remove(child)
+            if position < len(children) and children[position].tag == 'hashTree':
+                parent.remove(children[position])
+                position += 1
+            report._remove_element(tag)
+            continue
+        if in_save_config and tag in PROBLEMATIC_SAVE_FIELDS:
+            parent.remove(child)
+            report.removed_fields += 1
+            continue
+        if in_hash_tree and isinstance(wrap(child), ThreadGroup):
+            check_thread_group(child, report)
+        if len(child):
+            sanitize_children(child, report)
+
+
+class JMXDocument:
+    """Parsed JMeter test plan
+
+    The document is parsed once; sanitize() then performs compatibility
+    pruning, SampleSaveConfiguration cleanup and structural validation in a
+    single traversal before serialize() writes it back out.
+    """
+
+    def __init__(self, root):
+        self.root = root
+
+    @classmethod
+    def parse(cls, content):
+        if isinstance(content, bytes):
+            content = content.decode('utf-8', errors='replace')
+        try:
+            root = ET.fromstring(content.strip())
+        except ET.ParseError as e:
+            raise JMXParseError(str(e)) from e
+        return cls(root)
+
+    @classmethod
+    def load(cls, path):
+        try:
+            return cls(ET.parse(path).getroot())
+        except ET.ParseError as e:
+            raise JMXParseError(f"{path}: {e}") from e
+
+    @property
+    def hash_tree(self):
+        return self.root.find('hashTree')
+
+    @property
+    def test_plan(self):
+        if self.hash_tree is None:
+            return None
+        for element in iter_test_elements(self.hash_tree):
+            if isinstance(element, TestPlan):
+                return element
+        return None
+
+    def elements(self):
+        """Yield every test element in the plan depth-first"""
+        if self.hash_tree is None:
+            return
+        for element in iter_test_elements(self.hash_tree):
+            yield from element.walk()
+
+    def thread_groups(self):
+        return [element for element in self.elements() if isinstance(element, ThreadGroup)]
+
+    def samplers(self):
+        return [element for element in self.elements() if isinstance(element, Sampler)]
+
+    def sanitize(self, warn=True):
+        """Prune incompatible elements and bad save-config fields, then validate
+
+        Returns a SanitizeReport; the document is modified in place.
+        """
+        report = SanitizeReport()
+        if self.root.tag != 'jmeterTestPlan':
+            report.problems.append(f"root element is <{self.root.tag}>, expected <jmeterTestPlan>")
+        if self.root.find('hashTree') is None:
+            report.problems.append("missing top-level <hashTree>")
+        sanitize_children(self.root, report)
+        return report.finish(warn)
+
+    def serialize(self):
+        return XML_DECLARATION + ET.tostring(self.root, encoding='unicode')
+
+    def save(self, path):
+        with open(path, 'w', encoding='utf-8') as f:
+            f.write(self.serialize())
+        return path
+
+
+def extract_test_plan(content):
+    """Slice the <jmeterTestPlan> element out of free text (e.g. an LLM reply)"""
+    start = content.find('<jmeterTestPlan')
+    end = content.rfind('</jmeterTestPlan>')
+    if start < 0 or end < start:
+        return None
+    return content[start:end + len('</jmeterTestPlan>')]
+
+
+def sanitize_jmx(content, warn=True):
+    """Parse, sanitize and validate JMX text in one pass
+
+    Returns (serialized_jmx, report); serialized_jmx is None when the content
+    cannot be parsed or is not a usable JMeter test plan.
+    """
+    report = SanitizeReport()
+    try:
+        document = JMXDocument.parse(content)
+    except JMXParseError as e:
+        report.problems.append(f"not well-formed XML: {e}")
+        return None, report
+    report = document.sanitize(warn=warn)
+    if not report.valid:
+        return None, report
+    return document.serialize(), report
+
+
+def sanitize_file(path, output_path=None, warn=False):
+    """Sanitize a .jmx file in place (or to output_path); returns the report"""
+    with open(path, 'rb') as f:
+        content = f.read()
+    jmx_content, report = sanitize_jmx(content, warn=warn)
+    if jmx_content is not None:
+        with open(output_path or path, 'w', encoding='utf-8') as f:
+            f.write(jmx_content)
+    return report
+
+
+def main(argv=None):
+    import argparse
+    parser = argparse.ArgumentParser(description="Sanitize JMeter test plans for JMeter 5.6.3 compatibility")
+    parser.add_argument('paths', nargs='+', help='.jmx files to sanitize in place')
+    args = parser.parse_args(argv)
+    failures = 0
+    for path in args.paths:
+        try:
+            report = sanitize_file(path)
+        except OSError as e:
+            print(f"{path}: {e}")
+            failures += 1
+            continue
+        if report.valid:
+            removed = sum(report.removed_elements.values())
+            print(f"{path}: ok ({removed} incompatible elements, {report.removed_fields} save-config fields removed)")
+        else:
+            print(f"{path}: INVALID - {'; '.join(report.problems)}")
+            failures += 1
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,139 @@
+import html
+import xml.etree.ElementTree as ET
+
+from jmx_model import (INCOMPATIBLE_ELEMENTS, XML_DECLARATION, SanitizeReport, ThreadGroup,
+                       check_thread_group, sanitize_children, wrap)
+
+ROOT_TAG = 'jmeterTestPlan'
+
+# Give up if the model has not started a test plan within this much text
+MAX_PREAMBLE_CHARS = 16 * 1024
+
+# hashTrees down to this depth are streamed open/close; their children are
+# written (and released) as soon as each one closes. Depth 3 is the hashTree
+# under a ThreadGroup, so samplers, timers and listeners stream one by one.
+MAX_CONTAINER_DEPTH = 3
+
+
+# Whitespace a parser would normalize to spaces in an attribute value
+ATTRIBUTE_WHITESPACE = str.maketrans({'\n': '&#10;', '\r': '&#13;', '\t': '&#9;'})
+
+
+def quote_attribute(value):
+    """Quoted, escaped XML attribute value (xml.sax.saxutils is slow to import)"""
+    return '"' + html.escape(value, quote=True).translate(ATTRIBUTE_WHITESPACE) + '"'
+
+
+class StreamAborted(Exception):
+    """Raised when streamed model output clearly is not a JMeter test plan"""
+
+
+class StreamingJMXWriter:
+    """Incrementally extract, sanitize and write a JMX plan from text chunks
+
+    feed() accepts arbitrary slices of model output. Text before
+    <jmeterTestPlan> (prose, markdown fences) is skipped; from there the XML
+    goes through an XMLPullParser. Top-level containers are written as they
+    open, and each child element is sanitized and written the moment it
+    closes, then dropped from memory. Anything after </jmeterTestPlan> is
+    ignored. StreamAborted is raised as soon as the output cannot be a valid
+    plan (no plan start within MAX_PREAMBLE_CHARS, or malformed XML).
+    """
+
+    def __init__(self, out, max_preamble=MAX_PREAMBLE_CHARS):
+        self.out = out
+        self.max_preamble = max_preamble
+        self.report = SanitizeReport()
+        self.bytes_in = 0
+        self.started = False
+        self.finished = False
+        self._preamble = ''
+        self._parser = ET.XMLPullParser(events=('start', 'end'))
+        # Stack of [element, is_container, skip_next_hash_tree]
+        self._stack = []
+
+    def feed(self, text):
+        if self.finished or not text:
+            return
+        self.bytes_in += len(text)
+        if not self.started:
+            self._preamble += text
+            start = self._preamble.find('<' + ROOT_TAG)
+            if start < 0:
+                if self.bytes_in > self.max_preamble:
+                    raise StreamAborted(f"no <{ROOT_TAG}> in the first {self.max_preamble} characters")
+                # Keep just enough to match a start tag split across chunks
+                self._preamble = self._preamble[-len(ROOT_TAG):]
+                return
+            self.started = True
+            self.out.write(XML_DECLARATION)
+            text = self._preamble[start:]
+            self._preamble = ''
+        self._parser.feed(text)
+        self._drain()
+
+    def _drain(self):
+        try:
+            for event, element in self._parser.read_events():
+                if self.finished:
+                    return
+                if event == 'start':
+                    self._start(element)
+                else:
+                    self._end(element)
+        except ET.ParseError as e:
+            if not self.finished:
+                raise StreamAborted(f"malformed XML: {e}") from e
+
+    def _start(self, element):
+        depth = len(self._stack)
+        is_container = depth == 0
+        if element.tag == 'hashTree' and 0 < depth <= MAX_CONTAINER_DEPTH:
+            parent = self._stack[-1]
+            # A hashTree that belongs to a dropped element is buffered and discarded
+            is_container = parent[1] and not parent[2]
+        if is_container:
+            self._write_start_tag(element, depth)
+        self._stack.append([element, is_container, False])
+
+    def _end(self, element):
+        _, is_container, _ = self._stack.pop()
+        depth = len(self._stack)
+        if is_container:
+            self.out.write('\n' + '  ' * depth + f'</{element.tag}>')
+            if depth == 0:
+                self.finished = True
+                self.out.write('\n')
+            return
+        parent = self._stack[-1]
+        if not parent[1]:
+            # Still inside a buffered element; it is handled when that closes
+            return
+        parent_element = parent[0]
+        parent_element.remove(element)
+        if parent[2] and element.tag == 'hashTree':
+            parent[2] = False
+            return
+        parent[2] = False
+        if parent_element.tag == 'hashTree' and element.tag in INCOMPATIBLE_ELEMENTS:
+            self.report._remove_element(element.tag)
+            parent[2] = True
+            return
+        if parent_element.tag == 'hashTree' and isinstance(wrap(element), ThreadGroup):
+            check_thread_group(element, self.report)
+        sanitize_children(element, self.report)
+        element.tail = None
+        self.out.write('\n' + '  ' * depth + ET.tostring(element, encoding='unicode'))
+
+    def _write_start_tag(self, element, depth):
+        attributes = ''.join(f' {name}={quote_attribute(value)}' for name, value in element.attrib.items())
+        prefix = '\n' + '  ' * depth if depth else ''
+        self.out.write(f'{prefix}<{element.tag}{attributes}>')
+
+    def close(self, warn=True):
+        """Finish the stream and return the SanitizeReport"""
+        if not self.started:
+            self.report.problems.append(f"no <{ROOT_TAG}> found in model output")
+        elif not self.finished:
+            self.report.problems.append(f"model output ended before </{ROOT_TAG}>")
+        return self.report.finish(warn)
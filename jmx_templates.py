@@ -0,0 +1,514 @@
+import csv
+import functools
+import html
+import os
+import re
+from string import Template
+from urllib.parse import urlsplit
+
+from conversation_context import parse_setup
+from jmx_model import JMXDocument, JMXParseError
+
+
+def escape(text):
+    """Escape text for XML element content and attribute values
+
+    Quotes are escaped too, since names end up in testname="..." attributes.
+    (xml.sax.saxutils is avoided because it imports urllib.request.)
+    """
+    return html.escape(text, quote=True)
+
+
+TEST_TYPES = ('load', 'stress', 'spike', 'endurance', 'scalability')
+TEST_TYPE_ALIASES = {'soak': 'endurance'}
+
+DEFAULT_DOMAIN = 'example.com'
+
+# Parameter names the model uses, normalised (lowercase alphanumerics only)
+PARAMETER_ALIASES = {
+    'threads': ('usersthreads', 'users', 'threads', 'numberofusers', 'concurrentusers',
+                'virtualusers', 'numberofthreads', 'maxusers', 'peakusers', 'targetusers'),
+    'ramp_up': ('rampupperiod', 'rampup', 'rampuptime', 'rampupduration'),
+    'duration': ('duration', 'testduration', 'holdduration', 'steadystateduration'),
+    'think_time': ('thinktime', 'delaybetweenrequests', 'pacing', 'timer'),
+    'url': ('targeturl', 'url', 'baseurl', 'endpoint', 'targetendpoint', 'applicationurl', 'apiendpoint'),
+    'method': ('httpmethod', 'method', 'requestmethod'),
+    'response_time': ('expectedresponsetime', 'responsetimethreshold', 'maxresponsetime',
+                      'responsetimesla', 'sla', 'durationassertion', 'acceptableresponsetime'),
+    'throughput': ('throughput', 'targetthroughput', 'requestspersecond', 'rps', 'targetrps'),
+    'spike_threads': ('spikeusers', 'spikethreads', 'spikeload', 'spikeuserload'),
+    'spike_duration': ('spikeduration', 'spikeholdtime', 'spikehold'),
+    'step_threads': ('stepusers', 'usersperstep', 'threadincrement', 'userincrement', 'stepsize'),
+    'step_duration': ('stepduration', 'stepdelay', 'stepinterval', 'timeperstep'),
+    'csv_file': ('csvfile', 'datafile', 'testdata', 'csvdataset', 'testdatafile'),
+    'loops': ('loopcount', 'iterations', 'loops'),
+    'assertion': ('assertion', 'assertions', 'responseassertion', 'expectedstatuscode', 'statuscode'),
+}
+
+# Parameters that describe pass/fail criteria or monitoring rather than plan shape
+IGNORED_PARAMETERS = frozenset([
+    'errorrate', 'errorratethreshold', 'acceptableerrorrate', 'successcriteria', 'monitoring',
+    'testtype', 'errorthreshold', 'maxerrorrate',
+])
+
+ALIAS_LOOKUP = {alias: field for field, aliases in PARAMETER_ALIASES.items() for alias in aliases}
+
+NUMBER_RE = re.compile(r'(\d+(?:\.\d+)?)\s*([a-zA-Z]*)')
+
+TIME_UNITS = {
+    '': 1, 's': 1, 'sec': 1, 'secs': 1, 'second': 1, 'seconds': 1,
+    'm': 60, 'min': 60, 'mins': 60, 'minute': 60, 'minutes': 60,
+    'h': 3600, 'hr': 3600, 'hrs': 3600, 'hour': 3600, 'hours': 3600,
+    'ms': 0.001, 'millisecond': 0.001, 'milliseconds': 0.001,
+}
+
+
+def _normalise(key):
+    return ''.join(c for c in key.lower() if c.isalnum())
+
+
+def parse_count(value):
+    """'1000 users' -> 1000; returns None if there is no number"""
+    match = NUMBER_RE.search(value.replace(',', ''))
+    return int(float(match.group(1))) if match else None
+
+
+def parse_seconds(value):
+    """'10 minutes' -> 600, '30s' -> 30, '1h 30m' -> 5400
+
+    Only the first duration expression counts: parts are added up while they
+    follow each other directly ('1h 30m', '1 hour and 30 minutes'), so
+    '10 minutes (600 seconds)' is 600, not 1200.
+    """
+    text = value.replace(',', '')
+    total = None
+    end = None
+    for match in NUMBER_RE.finditer(text):
+        factor = TIME_UNITS.get(match.group(2).lower())
+        if factor is None:
+            if total is not None:
+                break
+            continue
+        if end is not None and text[end:match.start()].strip().lower() not in ('', 'and'):
+            break
+        total = (total or 0) + float(match.group(1)) * factor
+        end = match.end()
+    return int(round(total)) if total is not None else None
+
+
+def parse_millis(value):
+    """Think times and thresholds: '2 seconds' -> 2000, '500ms' -> 500
+
+    A bare number of 100 or more is taken as milliseconds, a smaller one as
+    seconds, matching how the model usually writes think times.
+    """
+    match = NUMBER_RE.search(value.replace(',', ''))
+    if not match:
+        return None
+    number, unit = float(match.group(1)), match.group(2).lower()
+    if unit in ('ms', 'millisecond', 'milliseconds'):
+        return int(number)
+    if unit == '':
+        return int(number) if number >= 100 else int(number * 1000)
+    factor = TIME_UNITS.get(unit)
+    return int(number * factor * 1000) if factor is not None else None
+
+
+def parse_throughput(value):
+    """Requests per minute for ConstantThroughputTimer ('50 req/s' -> 3000)"""
+    match = NUMBER_RE.search(value.replace(',', ''))
+    if not match:
+        return None
+    number = float(match.group(1))
+    lowered = value.lower()
+    if '/min' in lowered or 'per minute' in lowered or 'rpm' in lowered:
+        return number
+    return number * 60
+
+
+def detect_test_type(text, types=TEST_TYPES):
+    """Test type named by a heading such as 'Stress Test - ramp up the load'
+
+    The name before ' - ' or ':' wins over the description, and within either
+    the earliest keyword wins, since descriptions usually mention "load".
+    """
+    lowered = (text or '').lower()
+    name = re.split(r'\s+-\s+|:', lowered, maxsplit=1)[0]
+    pattern = '|'.join(types + tuple(TEST_TYPE_ALIASES))
+    for part in (name, lowered):
+        match = re.search(f'({pattern})', part)
+        if match:
+            return TEST_TYPE_ALIASES.get(match.group(1), match.group(1))
+    return None
+
+
+@functools.lru_cache(maxsize=64)
+def csv_variable_names(path):
+    """Header row of a CSV data file, if it exists locally"""
+    if not os.path.exists(path):
+        return None
+    with open(path, newline='', encoding='utf-8') as f:
+        header = next(csv.reader(f), None)
+    return ','.join(name.strip() for name in header) if header else None
+
+
+def spec_from_setup(setup_text):
+    """Build a plan spec from a TEST TYPE / TEST PARAMETERS block
+
+    Returns None when the setup is non-standard (unknown test type, no user
+    count, or parameters the templates cannot express), in which case the
+    caller should fall back to the LLM.
+    """
+    setup = parse_setup(setup_text)
+    test_type = detect_test_type(setup['test_type'])
+    if test_type is None:
+        return None
+
+    spec = {'test_type': test_type, 'name': setup['test_type']}
+    for key, value in setup['parameters'].items():
+        normalised = _normalise(key)
+        field = ALIAS_LOOKUP.get(normalised)
+        if field is None:
+            if normalised in IGNORED_PARAMETERS:
+                continue
+            return None
+        spec[field] = value
+
+    # Required information often carries the target URL
+    if 'url' not in spec:
+        for key, value in setup['required_information'].items():
+            if ALIAS_LOOKUP.get(_normalise(key)) == 'url' and '://' in value:
+                spec['url'] = value
+
+    threads = parse_count(spec.get('threads', ''))
+    if not threads:
+        return None
+    spec['threads'] = threads
+    spec['ramp_up'] = parse_seconds(spec.get('ramp_up', '')) or 0
+    spec['duration'] = parse_seconds(spec.get('duration', '')) or 300
+    for field in ('think_time', 'response_time'):
+        if field in spec:
+            spec[field] = parse_millis(spec[field])
+    for field in ('spike_threads', 'step_threads', 'loops'):
+        if field in spec:
+            spec[field] = parse_count(spec[field])
+    for field in ('spike_duration', 'step_duration'):
+        if field in spec:
+            spec[field] = parse_seconds(spec[field])
+    if 'throughput' in spec:
+        spec['throughput'] = parse_throughput(spec['throughput'])
+    if 'method' in spec:
+        spec['method'] = spec['method'].split()[0].upper() if spec['method'].split() else 'GET'
+    if 'assertion' in spec:
+        spec['assertion'] = str(parse_count(spec['assertion']) or 200)
+    if 'url' in spec:
+        match = re.search(r'https?://\S+', spec['url'])
+        spec['url'] = match.group(0).rstrip('.,;)') if match else None
+    if 'csv_file' in spec:
+        match = re.search(r'[\w./\\-]+\.csv', spec['csv_file'])
+        spec['csv_file'] = match.group(0) if match else None
+    return spec
+
+
+# Precompiled fragments -------------------------------------------------------
+
+PLAN_TEMPLATE = Template("""<?xml version="1.0" encoding="UTF-8"?>
+<jmeterTestPlan version="1.2" properties="5.0" jmeter="5.6.3">
+  <hashTree>
+    <TestPlan guiclass="TestPlanGui" testclass="TestPlan" testname="$plan_name" enabled="true">
+      <stringProp name="TestPlan.comments">Generated from template: $test_type test</stringProp>
+      <boolProp name="TestPlan.functional_mode">false</boolProp>
+      <boolProp name="TestPlan.tearDown_on_shutdown">true</boolProp>
+      <boolProp name="TestPlan.serialize_threadgroups">false</boolProp>
+      <elementProp name="TestPlan.user_defined_variables" elementType="Arguments" guiclass="ArgumentsPanel" testclass="Arguments" testname="User Defined Variables" enabled="true">
+        <collectionProp name="Arguments.arguments"/>
+      </elementProp>
+      <stringProp name="TestPlan.user_define_classpath"></stringProp>
+    </TestPlan>
+    <hashTree>
+$config$thread_group      <hashTree>
+$children      </hashTree>
+$listeners    </hashTree>
+  </hashTree>
+</jmeterTestPlan>
+""")
+
+LOOP_CONTROLLER = Template("""        <elementProp name="ThreadGroup.main_controller" elementType="LoopController" guiclass="LoopControlPanel" testclass="LoopController" testname="Loop Controller" enabled="true">
+          <boolProp name="LoopController.continue_forever">false</boolProp>
+          <intProp name="LoopController.loops">$loops</intProp>
+        </elementProp>
+""")
+
+THREAD_GROUP = Template("""      <ThreadGroup guiclass="ThreadGroupGui" testclass="ThreadGroup" testname="$name" enabled="true">
+        <stringProp name="ThreadGroup.on_sample_error">continue</stringProp>
+$loop_controller        <stringProp name="ThreadGroup.num_threads">$threads</stringProp>
+        <stringProp name="ThreadGroup.ramp_time">$ramp_up</stringProp>
+        <boolProp name="ThreadGroup.scheduler">true</boolProp>
+        <stringProp name="ThreadGroup.duration">$duration</stringProp>
+        <stringProp name="ThreadGroup.delay">0</stringProp>
+        <boolProp name="ThreadGroup.same_user_on_next_iteration">true</boolProp>
+      </ThreadGroup>
+""")
+
+STEPPING_THREAD_GROUP = Template("""      <kg.apc.jmeter.threads.SteppingThreadGroup guiclass="kg.apc.jmeter.threads.SteppingThreadGroupGui" testclass="kg.apc.jmeter.threads.SteppingThreadGroup" testname="$name" enabled="true">
+        <stringProp name="ThreadGroup.on_sample_error">continue</stringProp>
+        <stringProp name="ThreadGroup.num_threads">$threads</stringProp>
+        <stringProp name="Threads initial delay">0</stringProp>
+        <stringProp name="Start users count">$step_threads</stringProp>
+        <stringProp name="Start users count burst">0</stringProp>
+        <stringProp name="Start users period">$step_duration</stringProp>
+        <stringProp name="Stop users count">$step_threads</stringProp>
+        <stringProp name="Stop users period">1</stringProp>
+        <stringProp name="flighttime">$hold</stringProp>
+        <stringProp name="rampUp">$step_ramp</stringProp>
+$loop_controller      </kg.apc.jmeter.threads.SteppingThreadGroup>
+""")
+
+ULTIMATE_THREAD_GROUP = Template("""      <kg.apc.jmeter.threads.UltimateThreadGroup guiclass="kg.apc.jmeter.threads.UltimateThreadGroupGui" testclass="kg.apc.jmeter.threads.UltimateThreadGroup" testname="$name" enabled="true">
+        <collectionProp name="ultimatethreadgroupdata">
+$schedule        </collectionProp>
+$loop_controller        <stringProp name="ThreadGroup.on_sample_error">continue</stringProp>
+      </kg.apc.jmeter.threads.UltimateThreadGroup>
+""")
+
+ULTIMATE_ROW = Template("""          <collectionProp name="row$index">
+            <stringProp name="threads">$threads</stringProp>
+            <stringProp name="delay">$delay</stringProp>
+            <stringProp name="startup">$startup</stringProp>
+            <stringProp name="hold">$hold</stringProp>
+            <stringProp name="shutdown">$shutdown</stringProp>
+          </collectionProp>
+""")
+
+CSV_DATA_SET = Template("""      <CSVDataSet guiclass="TestBeanGUI" testclass="CSVDataSet" testname="CSV Data Set Config" enabled="true">
+        <stringProp name="filename">$filename</stringProp>
+        <stringProp name="fileEncoding">UTF-8</stringProp>
+        <stringProp name="variableNames">$variables</stringProp>
+        <boolProp name="ignoreFirstLine">$ignore_first_line</boolProp>
+        <stringProp name="delimiter">,</stringProp>
+        <boolProp name="quotedData">false</boolProp>
+        <boolProp name="recycle">true</boolProp>
+        <boolProp name="stopThread">false</boolProp>
+        <stringProp name="shareMode">shareMode.all</stringProp>
+      </CSVDataSet>
+      <hashTree/>
+""")
+
+HTTP_DEFAULTS = Template("""      <ConfigTestElement guiclass="HttpDefaultsGui" testclass="ConfigTestElement" testname="HTTP Request Defaults" enabled="true">
+        <elementProp name="HTTPsampler.Arguments" elementType="Arguments" guiclass="HTTPArgumentsPanel" testclass="Arguments" testname="User Defined Variables" enabled="true">
+          <collectionProp name="Arguments.arguments"/>
+        </elementProp>
+        <stringProp name="HTTPSampler.domain">$domain</stringProp>
+        <stringProp name="HTTPSampler.port">$port</stringProp>
+        <stringProp name="HTTPSampler.protocol">$protocol</stringProp>
+        <stringProp name="HTTPSampler.connect_timeout">10000</stringProp>
+        <stringProp name="HTTPSampler.response_timeout">30000</stringProp>
+      </ConfigTestElement>
+      <hashTree/>
+""")
+
+HTTP_SAMPLER = Template("""        <HTTPSamplerProxy guiclass="HttpTestSampleGui" testclass="HTTPSamplerProxy" testname="$name" enabled="true">
+          <elementProp name="HTTPsampler.Arguments" elementType="Arguments" guiclass="HTTPArgumentsPanel" testclass="Arguments" testname="User Defined Variables" enabled="true">
+            <collectionProp name="Arguments.arguments"/>
+          </elementProp>
+          <stringProp name="HTTPSampler.domain">$domain</stringProp>
+          <stringProp name="HTTPSampler.port">$port</stringProp>
+          <stringProp name="HTTPSampler.protocol">$protocol</stringProp>
+          <stringProp name="HTTPSampler.contentEncoding"></stringProp>
+          <stringProp name="HTTPSampler.path">$path</stringProp>
+          <stringProp name="HTTPSampler.method">$method</stringProp>
+          <boolProp name="HTTPSampler.follow_redirects">true</boolProp>
+          <boolProp name="HTTPSampler.auto_redirects">false</boolProp>
+          <boolProp name="HTTPSampler.use_keepalive">true</boolProp>
+          <boolProp name="HTTPSampler.DO_MULTIPART_POST">false</boolProp>
+          <stringProp name="HTTPSampler.embedded_url_re"></stringProp>
+          <stringProp name="HTTPSampler.connect_timeout"></stringProp>
+          <stringProp name="HTTPSampler.response_timeout"></stringProp>
+        </HTTPSamplerProxy>
+        <hashTree>
+$assertions        </hashTree>
+""")
+
+RESPONSE_ASSERTION = Template("""          <ResponseAssertion guiclass="AssertionGui" testclass="ResponseAssertion" testname="Response Code $code" enabled="true">
+            <collectionProp name="Asserion.test_strings">
+              <stringProp name="code">$code</stringProp>
+            </collectionProp>
+            <stringProp name="Assertion.custom_message"></stringProp>
+            <stringProp name="Assertion.test_field">Assertion.response_code</stringProp>
+            <boolProp name="Assertion.assume_success">false</boolProp>
+            <intProp name="Assertion.test_type">8</intProp>
+          </ResponseAssertion>
+          <hashTree/>
+""")
+
+DURATION_ASSERTION = Template("""          <DurationAssertion guiclass="DurationAssertionGui" testclass="DurationAssertion" testname="Duration Assertion" enabled="true">
+            <stringProp name="DurationAssertion.duration">$duration</stringProp>
+          </DurationAssertion>
+          <hashTree/>
+""")
+
+CONSTANT_TIMER = Template("""        <ConstantTimer guiclass="ConstantTimerGui" testclass="ConstantTimer" testname="Think Time" enabled="true">
+          <stringProp name="ConstantTimer.delay">$delay</stringProp>
+        </ConstantTimer>
+        <hashTree/>
+""")
+
+THROUGHPUT_TIMER = Template("""        <ConstantThroughputTimer guiclass="TestBeanGUI" testclass="ConstantThroughputTimer" testname="Constant Throughput Timer" enabled="true">
+          <intProp name="calcMode">2</intProp>
+          <doubleProp>
+            <name>throughput</name>
+            <value>$per_minute</value>
+            <savedValue>0.0</savedValue>
+          </doubleProp>
+        </ConstantThroughputTimer>
+        <hashTree/>
+""")
+
+SUMMARY_REPORT = Template("""      <ResultCollector guiclass="SummaryReport" testclass="ResultCollector" testname="Summary Report" enabled="true">
+        <boolProp name="ResultCollector.error_logging">false</boolProp>
+        <objProp>
+          <name>saveConfig</name>
+          <value class="SampleSaveConfiguration">
+            <time>true</time>
+            <latency>true</latency>
+            <timestamp>true</timestamp>
+            <success>true</success>
+            <label>true</label>
+            <code>true</code>
+            <message>true</message>
+            <threadName>true</threadName>
+            <dataType>true</dataType>
+            <encoding>false</encoding>
+            <subresults>false</subresults>
+            <responseData>false</responseData>
+            <samplerData>false</samplerData>
+            <xml>false</xml>
+            <fieldNames>true</fieldNames>
+            <responseHeaders>false</responseHeaders>
+            <requestHeaders>false</requestHeaders>
+            <responseDataOnError>false</responseDataOnError>
+            <saveAssertionResultsFailureMessage>true</saveAssertionResultsFailureMessage>
+            <assertionsResultsToSave>0</assertionsResultsToSave>
+            <bytes>true</bytes>
+            <sentBytes>true</sentBytes>
+            <url>true</url>
+            <idleTime>true</idleTime>
+            <connectTime>true</connectTime>
+          </value>
+        </objProp>
+        <stringProp name="filename">$filename</stringProp>
+      </ResultCollector>
+      <hashTree/>
+""")
+
+
+def _split_url(url):
+    parts = urlsplit(url or f'https://{DEFAULT_DOMAIN}/')
+    path = parts.path or '/'
+    if parts.query:
+        path += '?' + parts.query
+    return {
+        'protocol': parts.scheme or 'https',
+        'domain': parts.hostname or DEFAULT_DOMAIN,
+        'port': str(parts.port) if parts.port else '',
+        'path': path,
+    }
+
+
+def _thread_group(spec, name, use_plugins):
+    loops = spec.get('loops') or -1
+    loop_controller = LOOP_CONTROLLER.substitute(loops=loops)
+    threads = spec['threads']
+    ramp_up = spec['ramp_up']
+    duration = spec['duration']
+    test_type = spec['test_type']
+
+    if use_plugins and test_type in ('stress', 'scalability'):
+        step_threads = spec.get('step_threads') or max(1, threads // 10)
+        steps = -(-threads // step_threads)
+        step_duration = spec.get('step_duration') or max(1, duration // (steps + 1))
+        hold = max(0, duration - steps * step_duration)
+        return STEPPING_THREAD_GROUP.substitute(
+            name=name, threads=threads, step_threads=step_threads, step_duration=step_duration,
+            hold=hold, step_ramp=min(step_duration, ramp_up or 5), loop_controller=loop_controller)
+
+    if use_plugins and test_type == 'spike':
+        baseline = threads
+        spike = spec.get('spike_threads') or threads * 5
+        spike_hold = spec.get('spike_duration') or 60
+        # Baseline for the whole run; spike arrives once the baseline has settled
+        rows = [
+            ULTIMATE_ROW.substitute(index=0, threads=baseline, delay=0, startup=ramp_up,
+                                    hold=duration, shutdown=10),
+            ULTIMATE_ROW.substitute(index=1, threads=max(0, spike - baseline),
+                                    delay=ramp_up + max(0, (duration - spike_hold) // 2),
+                                    startup=5, hold=spike_hold, shutdown=5),
+        ]
+        return ULTIMATE_THREAD_GROUP.substitute(name=name, schedule=''.join(rows),
+                                                loop_controller=loop_controller)
+
+    if test_type == 'spike':
+        # Without plugins, approximate the spike with a near-instant ramp-up
+        threads = spec.get('spike_threads') or threads
+        ramp_up = min(ramp_up, 5)
+    return THREAD_GROUP.substitute(name=name, threads=threads, ramp_up=ramp_up, duration=duration,
+                                   loop_controller=loop_controller)
+
+
+def render_plan(spec, use_plugins=True, results_file=''):
+    """Render a JMX plan from a spec produced by spec_from_setup
+
+    Raises JMXParseError if the result is not well-formed XML.
+    """
+    target = {key: escape(value) for key, value in _split_url(spec.get('url')).items()}
+    test_type = spec['test_type']
+    name = escape(spec.get('name') or f"{test_type.title()} Test")
+
+    config = HTTP_DEFAULTS.substitute(target)
+    csv_file = spec.get('csv_file')
+    csv_variables = None
+    if csv_file:
+        csv_variables = csv_variable_names(csv_file)
+        config += CSV_DATA_SET.substitute(
+            filename=escape(csv_file),
+            variables=escape(csv_variables or ''),
+            ignore_first_line='true' if csv_variables else 'false')
+
+    assertions = RESPONSE_ASSERTION.substitute(code=escape(spec.get('assertion') or '200'))
+    if spec.get('response_time'):
+        assertions += DURATION_ASSERTION.substitute(duration=spec['response_time'])
+    elif csv_variables and 'expected_response_time' in csv_variables.split(','):
+        # Per-row thresholds from the data file
+        assertions += DURATION_ASSERTION.substitute(duration='${expected_response_time}')
+
+    children = HTTP_SAMPLER.substitute(
+        target, name=f"{escape(spec.get('method', 'GET'))} {target['path']}",
+        method=escape(spec.get('method', 'GET')), assertions=assertions)
+    if spec.get('think_time'):
+        children += CONSTANT_TIMER.substitute(delay=spec['think_time'])
+    if spec.get('throughput'):
+        children += THROUGHPUT_TIMER.substitute(per_minute=f"{spec['throughput']:.1f}")
+
+    plan = PLAN_TEMPLATE.substitute(
+        plan_name=name,
+        test_type=test_type,
+        config=config,
+        thread_group=_thread_group(spec, name, use_plugins),
+        children=children,
+        listeners=SUMMARY_REPORT.substitute(filename=escape(results_file)),
+    )
+    # Catch anything a spec value could still break before the plan is saved
+    JMXDocument.parse(plan)
+    return plan
+
+
+def render_from_setup(setup_text, use_plugins=True):
+    """Render a plan straight from a setup block, or None if it needs the LLM"""
+    spec = spec_from_setup(setup_text)
+    if spec is None:
+        return None
+    try:
+        return render_plan(spec, use_plugins=use_plugins)
+    except JMXParseError as e:
+        print(f"Warning: Template rendering produced invalid XML ({e}), falling back to the model")
+        return None
@@ -0,0 +1,557 @@
+import argparse
+import csv
+import io
+import mmap
+import os
+import sys
+import xml.etree.ElementTree as ET
+from collections import namedtuple
+
+from telemetry import count, span
+
+# A single JMeter sample, normalised from either CSV or XML JTL output.
+# Times are in milliseconds, timestamp is epoch milliseconds (sample start).
+Sample = namedtuple('Sample', [
+    'timestamp',
+    'elapsed',
+    'label',
+    'success',
+    'response_code',
+    'bytes',
+    'sent_bytes',
+    'latency',
+    'connect',
+    'grp_threads',
+    'all_threads',
+])
+
+# Default column order JMeter writes when jmeter.save.saveservice.print_field_names=false
+DEFAULT_CSV_COLUMNS = [
+    'timeStamp', 'elapsed', 'label', 'responseCode', 'responseMessage',
+    'threadName', 'dataType', 'success', 'failureMessage', 'bytes',
+    'sentBytes', 'grpThreads', 'allThreads', 'URL', 'Latency', 'IdleTime',
+    'Connect'
+]
+
+# XML JTL attribute names for the same fields
+XML_SAMPLE_TAGS = ('httpSample', 'sample')
+
+PERCENTILES = (50, 90, 95, 99)
+
+# Byte-range chunks are parsed in blocks of this size to keep worker memory flat
+PARALLEL_BLOCK_SIZE = 8 * 1024 * 1024
+
+# Files smaller than this are not worth the process pool start-up cost
+PARALLEL_MIN_FILE_SIZE = 16 * 1024 * 1024
+
+
+class LatencyHistogram:
+    """Mergeable log-linear latency histogram (HDR-histogram style)
+
+    Values below 2**SUB_BUCKET_BITS are recorded exactly; larger values fall
+    into buckets whose width is at most 1/2**(SUB_BUCKET_BITS - 1) of the value,
+    so percentiles carry a bounded relative error (~0.4%) while the histogram
+    itself never grows beyond a few thousand buckets no matter how many
+    samples are recorded.
+    """
+
+    SUB_BUCKET_BITS = 8
+    SUB_BUCKET_COUNT = 1 << SUB_BUCKET_BITS
+    HALF_SUB_BUCKET_COUNT = SUB_BUCKET_COUNT >> 1
+
+    def __init__(self):
+        self.counts = {}
+        self.total = 0
+        self.min = None
+        self.max = None
+
+    @classmethod
+    def bucket_index(cls, value):
+        if value < cls.SUB_BUCKET_COUNT:
+            return value if value > 0 else 0
+        shift = value.bit_length() - cls.SUB_BUCKET_BITS
+        return shift * cls.HALF_SUB_BUCKET_COUNT + (value >> shift)
+
+    @classmethod
+    def bucket_value(cls, index):
+        """Return the midpoint value represented by a bucket index"""
+        if index < cls.SUB_BUCKET_COUNT:
+            return index
+        shift = index // cls.HALF_SUB_BUCKET_COUNT - 1
+        top = index - shift * cls.HALF_SUB_BUCKET_COUNT
+        return (top << shift) + ((1 << shift) >> 1)
+
+    def record(self, value, count=1):
+        index = value if 0 <= value < self.SUB_BUCKET_COUNT else self.bucket_index(value)
+        counts = self.counts
+        counts[index] = counts.get(index, 0) + count
+        self.total += count
+        if self.min is None or value < self.min:
+            self.min = value
+        if self.max is None or value > self.max:
+            self.max = value
+
+    def merge(self, other):
+        """Fold another histogram into this one (exact, order independent)"""
+        counts = self.counts
+        for index, count in other.counts.items():
+            counts[index] = counts.get(index, 0) + count
+        self.total += other.total
+        if other.min is not None and (self.min is None or other.min < self.min):
+            self.min = other.min
+        if other.max is not None and (self.max is None or other.max > self.max):
+            self.max = other.max
+        return self
+
+    def percentile(self, pct):
+        if not self.total:
+            return None
+        rank = max(1, -(-self.total * pct // 100))
+        seen = 0
+        for index in sorted(self.counts):
+            seen += self.counts[index]
+            if seen >= rank:
+                value = self.bucket_value(index)
+                # Never report a value outside the observed range
+                return min(max(value, self.min), self.max)
+        return self.max
+
+    def percentiles(self, pcts=PERCENTILES):
+        """Compute several percentiles in a single pass over the buckets"""
+        result = {}
+        if not self.total:
+            return {pct: None for pct in pcts}
+        ranks = sorted((max(1, -(-self.total * pct // 100)), pct) for pct in pcts)
+        seen = 0
+        position = 0
+        for index in sorted(self.counts):
+            seen += self.counts[index]
+            while position < len(ranks) and seen >= ranks[position][0]:
+                value = self.bucket_value(index)
+                result[ranks[position][1]] = min(max(value, self.min), self.max)
+                position += 1
+            if position == len(ranks):
+                break
+        return result
+
+
+class LabelStats:
+    """Running aggregate for one sampler label"""
+
+    def __init__(self, label):
+        self.label = label
+        self.count = 0
+        self.errors = 0
+        self.elapsed_sum = 0
+        self.elapsed_sq_sum = 0
+        self.bytes = 0
+        self.sent_bytes = 0
+        self.first_timestamp = None
+        self.last_end = None
+        self.histogram = LatencyHistogram()
+
+    def add(self, sample):
+        elapsed = sample.elapsed
+        self.count += 1
+        if not sample.success:
+            self.errors += 1
+        self.elapsed_sum += elapsed
+        self.elapsed_sq_sum += elapsed * elapsed
+        self.bytes += sample.bytes
+        self.sent_bytes += sample.sent_bytes
+        start = sample.timestamp
+        end = start + elapsed
+        if self.first_timestamp is None or start < self.first_timestamp:
+            self.first_timestamp = start
+        if self.last_end is None or end > self.last_end:
+            self.last_end = end
+        self.histogram.record(elapsed)
+
+    def merge(self, other):
+        self.count += other.count
+        self.errors += other.errors
+        self.elapsed_sum += other.elapsed_sum
+        self.elapsed_sq_sum += other.elapsed_sq_sum
+        self.bytes += other.bytes
+        self.sent_bytes += other.sent_bytes
+        if other.first_timestamp is not None and (
+                self.first_timestamp is None or other.first_timestamp < self.first_timestamp):
+            self.first_timestamp = other.first_timestamp
+        if other.last_end is not None and (self.last_end is None or other.last_end > self.last_end):
+            self.last_end = other.last_end
+        self.histogram.merge(other.histogram)
+        return self
+
+    def to_dict(self):
+        duration_ms = (self.last_end - self.first_timestamp) if self.count else 0
+        mean = self.elapsed_sum / self.count if self.count else None
+        stddev = None
+        if self.count:
+            variance = self.elapsed_sq_sum / self.count - mean * mean
+            stddev = max(variance, 0) ** 0.5
+        percentiles = self.histogram.percentiles()
+        return {
+            'label': self.label,
+            'samples': self.count,
+            'errors': self.errors,
+            'error_rate': self.errors / self.count if self.count else 0.0,
+            'throughput': self.count / (duration_ms / 1000.0) if duration_ms > 0 else float(self.count),
+            'mean': mean,
+            'stddev': stddev,
+            'min': self.histogram.min,
+            'max': self.histogram.max,
+            'p50': percentiles[50],
+            'p90': percentiles[90],
+            'p95': percentiles[95],
+            'p99': percentiles[99],
+            'received_bytes': self.bytes,
+            'sent_bytes': self.sent_bytes,
+            'duration_ms': duration_ms,
+        }
+
+
+class JTLAnalyzer:
+    """Constant-memory aggregation of JMeter samples, grouped by label
+
+    Memory is proportional to the number of distinct labels, never to the
+    number of samples, so multi-GB result files can be analysed in one pass.
+    """
+
+    TOTAL_LABEL = 'TOTAL'
+
+    def __init__(self):
+        self.labels = {}
+        self.total = LabelStats(self.TOTAL_LABEL)
+        # Per-second buckets keyed by epoch second: [samples, errors]
+        self.time_buckets = {}
+
+    def add(self, sample):
+        stats = self.labels.get(sample.label)
+        if stats is None:
+            stats = self.labels[sample.label] = LabelStats(sample.label)
+        stats.add(sample)
+        self.total.add(sample)
+        second = sample.timestamp // 1000
+        bucket = self.time_buckets.get(second)
+        if bucket is None:
+            bucket = self.time_buckets[second] = [0, 0]
+        bucket[0] += 1
+        if not sample.success:
+            bucket[1] += 1
+
+    def feed(self, samples):
+        before = self.total.count
+        add = self.add
+        # Rows are parsed lazily as they are added, so this times both
+        with span('jtl.parse'):
+            for sample in samples:
+                add(sample)
+        count('jtl.samples', self.total.count - before)
+        return self
+
+    def merge(self, other):
+        """Fold the aggregates of another analyzer into this one"""
+        for label, stats in other.labels.items():
+            mine = self.labels.get(label)
+            if mine is None:
+                mine = self.labels[label] = LabelStats(label)
+            mine.merge(stats)
+        self.total.merge(other.total)
+        buckets = self.time_buckets
+        for second, (count, errors) in other.time_buckets.items():
+            bucket = buckets.get(second)
+            if bucket is None:
+                buckets[second] = [count, errors]
+            else:
+                bucket[0] += count
+                bucket[1] += errors
+        return self
+
+    def timeline(self):
+        """Return (epoch_second, samples, errors) tuples in time order"""
+        return [(second, count, errors) for second, (count, errors) in sorted(self.time_buckets.items())]
+
+    def summary(self):
+        """Return per-label statistics plus an overall TOTAL row"""
+        with span('jtl.summary'):
+            rows = [self.labels[label].to_dict() for label in sorted(self.labels)]
+            rows.append(self.total.to_dict())
+        return rows
+
+
+def _to_int(value):
+    try:
+        return int(value)
+    except (TypeError, ValueError):
+        try:
+            return int(float(value))
+        except (TypeError, ValueError):
+            return 0
+
+
+def _is_xml_file(path):
+    with open(path, 'rb') as f:
+        head = f.read(512).lstrip()
+    return head.startswith(b'<')
+
+
+def iter_csv_samples(path):
+    """Yield Samples from a CSV JTL file one row at a time"""
+    with open(path, newline='', encoding='utf-8', errors='replace') as f:
+        reader = csv.reader(f)
+        first = next(reader, None)
+        if first is None:
+            return
+        columns = header_columns(first)
+        pending = []
+        if columns is None:
+            columns = DEFAULT_CSV_COLUMNS
+            pending = [first]
+        yield from rows_to_samples(columns, pending, reader)
+
+
+def header_columns(row):
+    """Return the column names for a JTL's first CSV row, or None if it is data"""
+    if row and row[0].strip().isdigit():
+        return None
+    return [name.strip() for name in row]
+
+
+def rows_to_samples(columns, pending, reader):
+    """Convert CSV rows to Samples using a header-derived column map"""
+    index = {name: position for position, name in enumerate(columns)}
+
+    def column(name):
+        return index.get(name, -1)
+
+    ts_col = column('timeStamp')
+    elapsed_col = column('elapsed')
+    label_col = column('label')
+    success_col = column('success')
+    code_col = column('responseCode')
+    bytes_col = column('bytes')
+    sent_col = column('sentBytes')
+    latency_col = column('Latency')
+    connect_col = column('Connect')
+    grp_col = column('grpThreads')
+    all_col = column('allThreads')
+    width = len(columns)
+
+    for rows in (pending, reader):
+        for row in rows:
+            if len(row) < width:
+                # Truncated trailing line (e.g. file still being written)
+                continue
+            try:
+                timestamp = int(row[ts_col])
+                elapsed = int(row[elapsed_col])
+            except ValueError:
+                continue
+            yield Sample(
+                timestamp,
+                elapsed,
+                row[label_col] if label_col >= 0 else '',
+                row[success_col] == 'true' if success_col >= 0 else True,
+                row[code_col] if code_col >= 0 else '',
+                _to_int(row[bytes_col]) if bytes_col >= 0 else 0,
+                _to_int(row[sent_col]) if sent_col >= 0 else 0,
+                _to_int(row[latency_col]) if latency_col >= 0 else 0,
+                _to_int(row[connect_col]) if connect_col >= 0 else 0,
+                _to_int(row[grp_col]) if grp_col >= 0 else 0,
+                _to_int(row[all_col]) if all_col >= 0 else 0,
+            )
+
+
+def iter_xml_samples(path):
+    """Yield top-level Samples from an XML JTL file using iterparse
+
+    Elements are cleared as soon as they are consumed so memory stays flat;
+    sub-samples (embedded resources, transaction children) are skipped.
+    """
+    depth = 0
+    context = ET.iterparse(path, events=('start', 'end'))
+    root = None
+    for event, elem in context:
+        if event == 'start':
+            if root is None:
+                root = elem
+            depth += 1
+            continue
+        depth -= 1
+        if depth == 1 and elem.tag in XML_SAMPLE_TAGS:
+            attrs = elem.attrib
+            yield Sample(
+                _to_int(attrs.get('ts')),
+                _to_int(attrs.get('t')),
+                attrs.get('lb', ''),
+                attrs.get('s', 'true') == 'true',
+                attrs.get('rc', ''),
+                _to_int(attrs.get('by')),
+                _to_int(attrs.get('sby')),
+                _to_int(attrs.get('lt')),
+                _to_int(attrs.get('ct')),
+                _to_int(attrs.get('ng')),
+                _to_int(attrs.get('na')),
+            )
+            root.clear()
+
+
+def iter_samples(path):
+    """Yield Samples from a CSV or XML JTL file, detecting the format"""
+    if _is_xml_file(path):
+        return iter_xml_samples(path)
+    return iter_csv_samples(path)
+
+
+def analyze_jtl(path):
+    """Stream a JTL file and return per-label summary rows"""
+    return JTLAnalyzer().feed(iter_samples(path)).summary()
+
+
+def _read_csv_header(mm):
+    """Return (columns, data_offset) for a mmap'd CSV JTL"""
+    end = mm.find(b'\n')
+    if end < 0:
+        end = len(mm)
+    first = mm[:end].decode('utf-8', errors='replace').rstrip('\r')
+    columns = header_columns(next(csv.reader([first]), []))
+    if columns is None:
+        return DEFAULT_CSV_COLUMNS, 0
+    return columns, min(end + 1, len(mm))
+
+
+def _count_quotes(mm, start, end):
+    """Number of '"' bytes in [start, end), counted one bounded block at a time"""
+    total = 0
+    for block in range(start, end, PARALLEL_BLOCK_SIZE):
+        total += mm[block:min(end, block + PARALLEL_BLOCK_SIZE)].count(b'"')
+    return total
+
+
+def _split_at_lines(mm, start, end, parts):
+    """Split [start, end) into up to `parts` byte ranges ending on record boundaries
+
+    `start` must be a record boundary. A newline only ends a record when
+    it is outside a quoted field, i.e. when an even number of quote bytes
+    precede it in the range (an escaped "" counts twice, so parity holds).
+    """
+    if end <= start:
+        return []
+    step = max(1, (end - start) // parts)
+    ranges = []
+    position = start
+    while position < end:
+        target = position + step
+        if target >= end or len(ranges) == parts - 1:
+            ranges.append((position, end))
+            break
+        newline = mm.find(b'\n', target, end)
+        if newline >= 0:
+            quotes = _count_quotes(mm, position, newline)
+            while quotes % 2 and newline >= 0:
+                following = mm.find(b'\n', newline + 1, end)
+                if following >= 0:
+                    quotes += _count_quotes(mm, newline, following)
+                newline = following
+        if newline < 0:
+            ranges.append((position, end))
+            break
+        ranges.append((position, newline + 1))
+        position = newline + 1
+    return ranges
+
+
+def _iter_range_lines(mm, start, end):
+    """Yield decoded lines from a byte range, one bounded block at a time
+
+    Lines are split exactly as the serial path's open(newline='') does, so
+    csv.reader sees the same input and joins quoted multi-line fields.
+    """
+    for block_start, block_end in _split_at_lines(mm, start, end, max(1, -(-(end - start) // PARALLEL_BLOCK_SIZE))):
+        yield from io.StringIO(mm[block_start:block_end].decode('utf-8', errors='replace'), newline='')
+
+
+def _analyze_csv_range(path, columns, start, end):
+    """Worker: aggregate the samples in one byte range of a CSV JTL"""
+    analyzer = JTLAnalyzer()
+    with open(path, 'rb') as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+        reader = csv.reader(_iter_range_lines(mm, start, end))
+        analyzer.feed(rows_to_samples(columns, [], reader))
+    return analyzer
+
+
+def analyze_jtl_parallel_aggregate(path, workers=None):
+    """Aggregate a CSV JTL across CPU cores and return the merged JTLAnalyzer
+
+    The file is mmap'd and split into byte ranges at line boundaries; each
+    range is parsed by a worker process into a partial JTLAnalyzer and the
+    partials are merged in file order. Because every aggregate (counts, sums,
+    histogram buckets, time buckets) merges exactly, the result is identical
+    to the serial path, including quoted fields that span lines. XML JTL
+    files fall back to the serial path.
+    """
+    workers = workers or os.cpu_count() or 1
+    size = os.path.getsize(path)
+    if workers <= 1 or size == 0 or _is_xml_file(path):
+        return JTLAnalyzer().feed(iter_samples(path))
+
+    with span('jtl.split'), open(path, 'rb') as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+        columns, data_start = _read_csv_header(mm)
+        ranges = _split_at_lines(mm, data_start, len(mm), workers)
+
+    # Imported here: concurrent.futures.process costs more than the serial CLI's startup
+    from concurrent.futures import ProcessPoolExecutor
+    analyzer = JTLAnalyzer()
+    with ProcessPoolExecutor(max_workers=min(workers, len(ranges) or 1)) as pool:
+        futures = [pool.submit(_analyze_csv_range, path, columns, start, end) for start, end in ranges]
+        with span('jtl.parse'):
+            partials = [future.result() for future in futures]
+    with span('jtl.merge'):
+        for partial in partials:
+            analyzer.merge(partial)
+    # Workers record into their own processes' telemetry
+    count('jtl.samples', analyzer.total.count)
+    return analyzer
+
+
+def analyze_jtl_parallel(path, workers=None):
+    """Parallel equivalent of analyze_jtl for large CSV JTL files"""
+    if os.path.getsize(path) < PARALLEL_MIN_FILE_SIZE:
+        return analyze_jtl(path)
+    return analyze_jtl_parallel_aggregate(path, workers).summary()
+
+
+def format_summary(rows):
+    """Format summary rows as a plain-text table for the terminal"""
+    header = f"{'Label':<30} {'Samples':>9} {'Err %':>7} {'Thr/s':>9} {'Mean':>8} {'p50':>7} {'p90':>7} {'p95':>7} {'p99':>7} {'Max':>7}"
+    lines = [header, '-' * len(header)]
+    for row in rows:
+        def ms(value):
+            return '-' if value is None else f"{value:.0f}"
+        lines.append(
+            f"{row['label'][:30]:<30} {row['samples']:>9} {row['error_rate'] * 100:>6.2f}% "
+            f"{row['throughput']:>9.2f} {ms(row['mean']):>8} {ms(row['p50']):>7} {ms(row['p90']):>7} "
+            f"{ms(row['p95']):>7} {ms(row['p99']):>7} {ms(row['max']):>7}"
+        )
+    return "\n".join(lines)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Summarize a JMeter JTL results file")
+    parser.add_argument('path', help='CSV or XML JTL file')
+    parser.add_argument('--workers', type=int, default=1,
+                        help='Parse CSV files across this many processes (0 = all cores)')
+    args = parser.parse_args(argv)
+    if not os.path.exists(args.path):
+        print(f"Error: file not found: {args.path}")
+        return 1
+    if args.workers == 1:
+        rows = analyze_jtl(args.path)
+    else:
+        rows = analyze_jtl_parallel(args.path, args.workers or None)
+    print(format_summary(rows))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,397 @@
+import argparse
+import json
+import math
+import os
+import sys
+from array import array
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+from jtl_analyzer import iter_samples
+
+# Column name, NumPy dtype and the array typecode used while ingesting
+COLUMNS = (
+    ('timestamp', 'i8', 'q'),
+    ('elapsed', 'i4', 'i'),
+    ('latency', 'i4', 'i'),
+    ('connect', 'i4', 'i'),
+    ('bytes', 'i8', 'q'),
+    ('sent_bytes', 'i8', 'q'),
+    ('success', '?', 'b'),
+    ('label', 'i4', 'i'),
+    ('all_threads', 'i4', 'i'),
+)
+
+# Rows buffered per column before they are appended to disk
+INGEST_CHUNK_ROWS = 1 << 20
+
+# Latencies are bucketed on a log scale 1% wide for windowed percentiles
+BUCKET_LOG_BASE = math.log(1.01)
+
+# Upper bound on time steps x latency buckets held in memory for windowed
+# percentiles; longer runs are aggregated into coarser steps to stay under it
+MAX_HISTOGRAM_CELLS = 20_000_000
+
+DEFAULT_WINDOW_SECONDS = 10
+DEFAULT_APDEX_THRESHOLD_MS = 500
+DEFAULT_CURVE_POINTS = 40
+
+# The latency knee is the first load level whose p95 exceeds this multiple of
+# the p95 at the lowest load
+LATENCY_KNEE_FACTOR = 2.0
+
+
+def require_numpy():
+    if np is None:
+        raise RuntimeError("NumPy is required for time-series analysis: pip install numpy")
+
+
+class RunColumns:
+    """One run's samples as memory-mapped NumPy columns
+
+    Each column lives in its own .npy file inside a directory, next to a
+    labels.json listing label names by code, so opening a run costs nothing
+    and analyses only page in the columns they use.
+    """
+
+    def __init__(self, directory):
+        require_numpy()
+        self.directory = directory
+        with open(os.path.join(directory, 'meta.json')) as f:
+            self.meta = json.load(f)
+        with open(os.path.join(directory, 'labels.json')) as f:
+            self.labels = json.load(f)
+        for name, _, _ in COLUMNS:
+            setattr(self, name, np.load(os.path.join(directory, f"{name}.npy"), mmap_mode='r'))
+
+    def __len__(self):
+        return self.meta['rows']
+
+    @property
+    def end_seconds(self):
+        """Completion second of every sample (epoch seconds)"""
+        return (self.timestamp + self.elapsed) // 1000
+
+
+def ingest_jtl(path, directory):
+    """Convert a CSV or XML JTL file into a directory of .npy columns
+
+    Samples are streamed and buffered per column in typed arrays, flushed to
+    raw files every INGEST_CHUNK_ROWS rows, then copied into .npy files
+    chunk by chunk, so memory stays flat regardless of file size.
+    """
+    require_numpy()
+    os.makedirs(directory, exist_ok=True)
+    buffers = {name: array(code) for name, _, code in COLUMNS}
+    parts = {name: open(os.path.join(directory, f"{name}.part"), 'wb') for name, _, _ in COLUMNS}
+    labels = {}
+    rows = 0
+
+    def flush():
+        for name, buffer in buffers.items():
+            buffer.tofile(parts[name])
+            del buffer[:]
+
+    try:
+        timestamp, elapsed, latency, connect = (buffers[name].append for name in
+                                                ('timestamp', 'elapsed', 'latency', 'connect'))
+        received, sent, success, label, threads = (buffers[name].append for name in
+                                                   ('bytes', 'sent_bytes', 'success', 'label', 'all_threads'))
+        for sample in iter_samples(path):
+            code = labels.get(sample.label)
+            if code is None:
+                code = labels[sample.label] = len(labels)
+            timestamp(sample.timestamp)
+            elapsed(sample.elapsed)
+            latency(sample.latency)
+            connect(sample.connect)
+            received(sample.bytes)
+            sent(sample.sent_bytes)
+            success(1 if sample.success else 0)
+            label(code)
+            threads(sample.all_threads)
+            rows += 1
+            if rows % INGEST_CHUNK_ROWS == 0:
+                flush()
+        flush()
+    finally:
+        for part in parts.values():
+            part.close()
+
+    for name, dtype, _ in COLUMNS:
+        part = os.path.join(directory, f"{name}.part")
+        column = np.lib.format.open_memmap(os.path.join(directory, f"{name}.npy"), mode='w+',
+                                           dtype=dtype, shape=(rows,))
+        with open(part, 'rb') as f:
+            for start in range(0, rows, INGEST_CHUNK_ROWS):
+                chunk = np.fromfile(f, dtype='i1' if dtype == '?' else dtype, count=INGEST_CHUNK_ROWS)
+                column[start:start + len(chunk)] = chunk
+        column.flush()
+        del column
+        os.remove(part)
+
+    stat = os.stat(path)
+    with open(os.path.join(directory, 'labels.json'), 'w') as f:
+        json.dump(sorted(labels, key=labels.get), f)
+    with open(os.path.join(directory, 'meta.json'), 'w') as f:
+        json.dump({'source': os.path.abspath(path), 'source_size': stat.st_size,
+                   'source_mtime_ns': stat.st_mtime_ns, 'rows': rows}, f)
+    return RunColumns(directory)
+
+
+def load_columns(path, directory=None):
+    """Open a column directory, converting a JTL file first if needed
+
+    For a .jtl path the columns are cached in `<path>.cols` and rebuilt
+    whenever the JTL file changes.
+    """
+    require_numpy()
+    if os.path.isdir(path):
+        return RunColumns(path)
+    directory = directory or path + '.cols'
+    meta_path = os.path.join(directory, 'meta.json')
+    if os.path.exists(meta_path):
+        with open(meta_path) as f:
+            meta = json.load(f)
+        stat = os.stat(path)
+        if meta.get('source_size') == stat.st_size and meta.get('source_mtime_ns') == stat.st_mtime_ns:
+            return RunColumns(directory)
+    return ingest_jtl(path, directory)
+
+
+def per_second(columns):
+    """Samples, errors and peak active threads for every completion second"""
+    end = columns.end_seconds
+    origin = int(end.min())
+    index = end - origin
+    samples = np.bincount(index)
+    errors = np.bincount(index, weights=~columns.success, minlength=len(samples)).astype(np.int64)
+    # Matching the column dtype keeps ufunc.at on its fast path
+    threads = np.zeros(len(samples), dtype=columns.all_threads.dtype)
+    np.maximum.at(threads, index, columns.all_threads)
+    return {
+        'second': np.arange(origin, origin + len(samples)),
+        'samples': samples,
+        'errors': errors,
+        'threads': threads,
+    }
+
+
+def latency_buckets(values):
+    return (np.log1p(np.asarray(values, dtype=np.float64)) / BUCKET_LOG_BASE).astype(np.int64)
+
+
+def bucket_values(buckets):
+    """Representative latency (geometric bucket midpoint) for bucket indexes"""
+    return np.expm1((buckets + 0.5) * BUCKET_LOG_BASE)
+
+
+def histogram_percentile(cumulative, pct):
+    """Percentile of every row of a cumulative bucket-count matrix (NaN for empty rows)"""
+    totals = cumulative[:, -1]
+    target = np.ceil(totals * pct / 100.0)
+    position = (cumulative < target[:, None]).sum(axis=1)
+    values = bucket_values(np.minimum(position, cumulative.shape[1] - 1))
+    return np.where(totals > 0, values, np.nan)
+
+
+def window_percentiles(columns, window=DEFAULT_WINDOW_SECONDS, percentiles=(50, 95, 99)):
+    """Latency percentiles over a sliding window, one point per time step
+
+    Samples are binned into a (time step x log-latency bucket) count matrix
+    with a single bincount; a cumulative sum along time turns it into
+    sliding-window histograms, and a cumulative sum along latency turns
+    those into percentiles, all without a Python loop over samples.
+    Percentiles carry at most ~0.5% relative error from the bucketing.
+    """
+    end = columns.end_seconds
+    origin = int(end.min())
+    seconds = int(end.max()) - origin + 1
+    buckets = latency_buckets(columns.elapsed)
+    width = int(buckets.max()) + 1
+    step = max(1, math.ceil(seconds * width / MAX_HISTOGRAM_CELLS))
+    steps = math.ceil(seconds / step)
+    window_steps = max(1, math.ceil(window / step))
+
+    index = (end - origin) // step
+    counts = np.bincount(index * width + buckets, minlength=steps * width).reshape(steps, width)
+    windowed = np.cumsum(counts, axis=0)
+    windowed[window_steps:] -= windowed[:-window_steps].copy()
+    cumulative = np.cumsum(windowed, axis=1)
+    totals = cumulative[:, -1]
+
+    result = {'second': origin + np.arange(steps) * step + step - 1, 'samples': totals, 'step': step}
+    for pct in percentiles:
+        result[f"p{pct}"] = histogram_percentile(cumulative, pct)
+    return result
+
+
+def apdex(columns, threshold_ms=DEFAULT_APDEX_THRESHOLD_MS):
+    """Apdex score overall, per label and per second
+
+    Satisfied: successful and within T; tolerating: successful and within 4T;
+    everything else (including errors) is frustrated.
+    """
+    elapsed = columns.elapsed
+    success = columns.success
+    satisfied = success & (elapsed <= threshold_ms)
+    tolerating = success & (elapsed > threshold_ms) & (elapsed <= 4 * threshold_ms)
+    score = satisfied + 0.5 * tolerating
+
+    label_counts = np.bincount(columns.label, minlength=len(columns.labels))
+    label_scores = np.bincount(columns.label, weights=score, minlength=len(columns.labels))
+    end = columns.end_seconds
+    index = end - end.min()
+    second_counts = np.bincount(index)
+    second_scores = np.bincount(index, weights=score, minlength=len(second_counts))
+    with np.errstate(invalid='ignore', divide='ignore'):
+        return {
+            'threshold_ms': threshold_ms,
+            'score': float(score.sum() / len(score)) if len(score) else None,
+            'satisfied': int(satisfied.sum()),
+            'tolerating': int(tolerating.sum()),
+            'frustrated': int(len(score) - satisfied.sum() - tolerating.sum()),
+            'labels': {label: float(label_scores[code] / label_counts[code])
+                       for code, label in enumerate(columns.labels) if label_counts[code]},
+            'per_second': second_scores / second_counts,
+        }
+
+
+def concurrency_curve(columns, points=DEFAULT_CURVE_POINTS):
+    """Throughput and latency against the number of active threads
+
+    Samples are grouped by JMeter's allThreads value (binned into at most
+    `points` levels). For each level: mean active threads, throughput
+    (samples / seconds spent at that level), mean and p95 latency.
+    """
+    threads = np.asarray(columns.all_threads, dtype=np.int64)
+    elapsed = np.asarray(columns.elapsed, dtype=np.int64)
+    low, high = int(threads.min()), int(threads.max())
+    if high - low + 1 > points:
+        codes = (threads - low) * points // (high - low + 1)
+    else:
+        codes = threads - low
+    # Drop empty levels without sorting: map each code to its rank among present codes
+    present = np.bincount(codes) > 0
+    codes = (np.cumsum(present) - 1)[codes]
+    levels = int(present.sum())
+
+    counts = np.bincount(codes, minlength=levels)
+    mean_threads = np.bincount(codes, weights=threads, minlength=levels) / counts
+    mean_latency = np.bincount(codes, weights=elapsed, minlength=levels) / counts
+
+    # p95 per level from a (level x log-latency bucket) histogram
+    buckets = latency_buckets(elapsed)
+    width = int(buckets.max()) + 1
+    histogram = np.bincount(codes * width + buckets, minlength=levels * width).reshape(levels, width)
+    p95 = histogram_percentile(np.cumsum(histogram, axis=1), 95)
+
+    # Seconds spent at each level: distinct (completion second, level) pairs
+    end = columns.end_seconds
+    index = end - end.min()
+    occupied = np.zeros((int(index.max()) + 1) * levels, dtype=bool)
+    occupied[index * levels + codes] = True
+    seconds = occupied.reshape(-1, levels).sum(axis=0)
+    return {
+        'threads': mean_threads,
+        'samples': counts,
+        'throughput': counts / seconds,
+        'mean': mean_latency,
+        'p95': p95,
+    }
+
+
+def find_knee(curve):
+    """Saturation point of a concurrency curve, or None with too few levels
+
+    The throughput knee is where normalized throughput rises furthest above
+    the straight line from the lowest to the highest load (Kneedle); beyond
+    it extra threads mostly add queueing. The latency knee is the first level
+    whose p95 exceeds LATENCY_KNEE_FACTOR times the p95 at the lowest load.
+    """
+    x = curve['threads']
+    y = curve['throughput']
+    if len(x) < 3 or x[-1] == x[0] or y.max() == y.min():
+        return None
+    xn = (x - x[0]) / (x[-1] - x[0])
+    yn = (y - y.min()) / (y.max() - y.min())
+    knee = int(np.argmax(yn - xn))
+    over = np.nonzero(curve['p95'] > curve['p95'][0] * LATENCY_KNEE_FACTOR)[0]
+    return {
+        'threads': float(x[knee]),
+        'throughput': float(y[knee]),
+        'p95': float(curve['p95'][knee]),
+        'latency_knee_threads': float(x[over[0]]) if len(over) else None,
+    }
+
+
+def format_curve(curve, knee):
+    lines = [f"{'Threads':>9} {'Samples':>9} {'Thr/s':>9} {'Mean':>8} {'p95':>8}",
+             '-' * 47]
+    for threads, samples, throughput, mean, p95 in zip(
+            curve['threads'], curve['samples'], curve['throughput'], curve['mean'], curve['p95']):
+        marker = '  <- knee' if knee and abs(threads - knee['threads']) < 1e-9 else ''
+        lines.append(f"{threads:>9.0f} {samples:>9} {throughput:>9.1f} {mean:>8.0f} {p95:>8.0f}{marker}")
+    if knee:
+        lines.append("")
+        lines.append(f"Throughput saturates near {knee['threads']:.0f} threads "
+                     f"({knee['throughput']:.1f} req/s, p95 {knee['p95']:.0f} ms)")
+        if knee['latency_knee_threads'] is not None:
+            lines.append(f"p95 latency doubles from its low-load value at {knee['latency_knee_threads']:.0f} threads")
+    return "\n".join(lines)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Vectorized time-series analysis of a JMeter results file")
+    parser.add_argument('path', help='CSV/XML JTL file, or a column directory from a previous run')
+    parser.add_argument('--columns', help='Column cache directory (default: <path>.cols)')
+    parser.add_argument('--window', type=int, default=DEFAULT_WINDOW_SECONDS, help='Sliding window in seconds')
+    parser.add_argument('--apdex', type=int, default=DEFAULT_APDEX_THRESHOLD_MS, help='Apdex threshold T in ms')
+    parser.add_argument('--points', type=int, default=DEFAULT_CURVE_POINTS, help='Max load levels in the curve')
+    parser.add_argument('--timeline', action='store_true', help='Print per-second throughput and window percentiles')
+    args = parser.parse_args(argv)
+
+    if not os.path.exists(args.path):
+        print(f"Error: file not found: {args.path}")
+        return 1
+    try:
+        columns = load_columns(args.path, args.columns)
+    except RuntimeError as e:
+        print(f"Error: {e}")
+        return 1
+    if not len(columns):
+        print("No samples found.")
+        return 1
+
+    scores = apdex(columns, args.apdex)
+    print(f"Samples: {len(columns):,}   Apdex (T={args.apdex} ms): {scores['score']:.3f}  "
+          f"[{scores['satisfied']} satisfied, {scores['tolerating']} tolerating, {scores['frustrated']} frustrated]")
+    for label, score in sorted(scores['labels'].items()):
+        print(f"  {label[:40]:<40} {score:.3f}")
+
+    if args.timeline:
+        seconds = per_second(columns)
+        windows = window_percentiles(columns, args.window)
+        print(f"\n{'Second':>8} {'Samples':>8} {'Errors':>7} {'Threads':>8}   "
+              f"{args.window}s window p50/p95/p99 (ms)")
+        offsets = {int(second): position for position, second in enumerate(windows['second'])}
+        for position, second in enumerate(seconds['second']):
+            line = (f"{second - seconds['second'][0]:>8} {seconds['samples'][position]:>8} "
+                    f"{seconds['errors'][position]:>7} {seconds['threads'][position]:>8}")
+            window = offsets.get(int(second))
+            if window is not None and windows['samples'][window]:
+                line += (f"   {windows['p50'][window]:.0f} / {windows['p95'][window]:.0f} / "
+                         f"{windows['p99'][window]:.0f}")
+            print(line)
+
+    curve = concurrency_curve(columns, args.points)
+    print()
+    print(format_curve(curve, find_knee(curve)))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
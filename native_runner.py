@@ -0,0 +1,858 @@
+"""Lightweight asyncio execution engine for generated JMeter plans
+
+Interprets the HTTP parts of a JMX plan (Thread Groups, HTTP Request
+samplers and defaults with their redirects, Header Managers, Constant
+Timers, CSV Data Sets and response/duration assertions) and drives them
+with asyncio over pooled keep-alive connections, writing a JMeter-compatible
+CSV JTL. Elements it does not understand are reported and skipped.
+
+Accepts JMeter's non-GUI arguments, so it can stand in for JMeter anywhere
+a launcher is configured:
+
+    python native_runner.py -n -t plan.jmx -l results.jtl [-j run.log]
+    python jmeter_runner.py plan.jmx --jmeter "python native_runner.py"
+"""
+import argparse
+import asyncio
+import csv
+import itertools
+import os
+import re
+import signal
+import ssl
+import sys
+import time
+from urllib.parse import quote, urlencode, urljoin, urlsplit
+
+from jmx_model import JMXDocument, TestElement, ThreadGroup, iter_test_elements
+from jtl_analyzer import DEFAULT_CSV_COLUMNS
+
+# Seconds between flushes of buffered JTL rows, so tailers see live results
+FLUSH_INTERVAL = 0.5
+
+# Used when neither the sampler nor HTTP Request Defaults set a timeout (ms)
+DEFAULT_CONNECT_TIMEOUT = 10000
+DEFAULT_RESPONSE_TIMEOUT = 60000
+
+# Seconds in-flight requests get to finish once a scheduled run ends
+END_GRACE = 5
+
+USER_AGENT = 'Typhon-Native/1.0'
+
+# JMeter's httpsampler.max_redirects default
+MAX_REDIRECTS = 20
+REDIRECT_CODES = frozenset(['301', '302', '303', '307', '308'])
+
+# Characters left as is when percent-encoding a request target
+URL_SAFE = "/?&=%:@!$'()*+,;~-._"
+
+VARIABLE_RE = re.compile(r'\$\{([^}]+)\}')
+
+# Thread group variants run as a plain Thread Group from their num_threads
+PLAIN_THREAD_GROUPS = frozenset(['ThreadGroup', 'SetupThreadGroup', 'PostThreadGroup'])
+
+# Elements with nothing to execute
+PASSIVE_ELEMENTS = frozenset(['ResultCollector', 'Arguments', 'TestPlan'])
+
+# ResponseAssertion test_type bits
+MATCH, CONTAINS, NOT, EQUALS, SUBSTRING, OR = 1, 2, 4, 8, 16, 32
+
+HTTP_MESSAGES = {
+    200: 'OK', 201: 'Created', 202: 'Accepted', 204: 'No Content', 301: 'Moved Permanently',
+    302: 'Found', 304: 'Not Modified', 400: 'Bad Request', 401: 'Unauthorized', 403: 'Forbidden',
+    404: 'Not Found', 429: 'Too Many Requests', 500: 'Internal Server Error', 502: 'Bad Gateway',
+    503: 'Service Unavailable', 504: 'Gateway Timeout',
+}
+
+
+def compile_template(text):
+    """A constant string, or a list of literal/variable parts for ${var} text"""
+    if not text or '${' not in text:
+        return text or ''
+    parts = []
+    position = 0
+    for match in VARIABLE_RE.finditer(text):
+        if match.start() > position:
+            parts.append((False, text[position:match.start()]))
+        parts.append((True, match.group(1)))
+        position = match.end()
+    if position < len(text):
+        parts.append((False, text[position:]))
+    return parts
+
+
+def expand(template, variables):
+    if isinstance(template, str):
+        return template
+    # Unknown variables are left as written, as JMeter does
+    return ''.join(variables.get(value, f"${{{value}}}") if is_variable else value
+                   for is_variable, value in template)
+
+
+def _prop(element, name, default=''):
+    value = TestElement(element).get_prop(name)
+    return default if value is None else value
+
+
+def _collection(element, name):
+    collection = element.find(f"collectionProp[@name='{name}']")
+    return list(collection) if collection is not None else []
+
+
+class DataSet:
+    """A CSV Data Set: rows loaded once, handed out per iteration
+
+    shareMode.all shares one cursor per file across every virtual user,
+    shareMode.group one per thread group and shareMode.thread one per user.
+    """
+
+    def __init__(self, element, plan_dir):
+        filename = _prop(element, 'filename')
+        self.path = filename if os.path.isabs(filename) else os.path.join(plan_dir, filename)
+        self.recycle = _prop(element, 'recycle', 'true') != 'false'
+        self.stop_thread = _prop(element, 'stopThread', 'false') == 'true'
+        self.share_mode = _prop(element, 'shareMode', 'shareMode.all')
+        delimiter = _prop(element, 'delimiter', ',') or ','
+        delimiter = '\t' if delimiter == '\\t' else delimiter
+        with open(self.path, newline='', encoding=_prop(element, 'fileEncoding') or 'utf-8') as f:
+            if _prop(element, 'quotedData', 'false') == 'true':
+                rows = list(csv.reader(f, delimiter=delimiter))
+            else:
+                rows = [line.rstrip('\r\n').split(delimiter) for line in f]
+        rows = [row for row in rows if any(row)]
+        names = _prop(element, 'variableNames')
+        if names:
+            self.names = [name.strip() for name in names.split(delimiter if delimiter != '\t' else ',')]
+            if _prop(element, 'ignoreFirstLine', 'false') == 'true':
+                rows = rows[1:]
+        else:
+            self.names = [name.strip() for name in rows[0]] if rows else []
+            rows = rows[1:]
+        self.rows = rows
+        self.cursors = {}
+
+    def next_row(self, key):
+        """Variables for the next row, or None when the file is exhausted for good"""
+        position = self.cursors.get(key, 0)
+        if position >= len(self.rows):
+            if not self.recycle or not self.rows:
+                return None if self.stop_thread else {name: '<EOF>' for name in self.names}
+            position = 0
+        self.cursors[key] = position + 1
+        return dict(zip(self.names, self.rows[position]))
+
+    def cursor_key(self, group, user):
+        if self.share_mode == 'shareMode.thread':
+            return (group, user)
+        if self.share_mode == 'shareMode.group':
+            return group
+        return None
+
+
+class HTTPRequest:
+    """One HTTP Request sampler with everything in scope resolved"""
+
+    def __init__(self, element, defaults, headers, timers, assertions):
+        def field(name):
+            # Sampler values win over HTTP Request Defaults, innermost defaults first
+            value = _prop(element, name)
+            for config in defaults:
+                if value:
+                    break
+                value = _prop(config, name)
+            return value
+
+        self.label = element.get('testname', 'HTTP Request')
+        self.label_template = compile_template(self.label)
+        self.method = (_prop(element, 'HTTPSampler.method') or 'GET').upper()
+        self.protocol = compile_template((field('HTTPSampler.protocol') or 'http').lower())
+        self.domain = compile_template(field('HTTPSampler.domain'))
+        self.port = compile_template(field('HTTPSampler.port'))
+        self.path = compile_template(field('HTTPSampler.path') or '/')
+        # JMeter only reuses connections when the sampler asks for it
+        self.keepalive = _prop(element, 'HTTPSampler.use_keepalive', 'false') == 'true'
+        self.follow_redirects = (_prop(element, 'HTTPSampler.follow_redirects') == 'true'
+                                 or _prop(element, 'HTTPSampler.auto_redirects') == 'true')
+        self.connect_timeout = int(field('HTTPSampler.connect_timeout') or DEFAULT_CONNECT_TIMEOUT) / 1000.0
+        self.response_timeout = int(field('HTTPSampler.response_timeout') or DEFAULT_RESPONSE_TIMEOUT) / 1000.0
+
+        self.raw_body = _prop(element, 'HTTPSampler.postBodyRaw', 'false') == 'true'
+        self.arguments = []
+        for config in [element] + defaults:
+            arguments = config.find("elementProp[@name='HTTPsampler.Arguments']")
+            if arguments is None:
+                continue
+            for argument in _collection(arguments, 'Arguments.arguments'):
+                self.arguments.append((compile_template(_prop(argument, 'Argument.name')),
+                                       compile_template(_prop(argument, 'Argument.value'))))
+            if self.arguments:
+                break
+
+        # Outer managers first, so inner ones override headers of the same name
+        merged = {}
+        for name, value in headers:
+            merged[name.lower()] = (name, compile_template(value))
+        self.headers = list(merged.values())
+        self.delay = sum(timers)
+        self.assertions = assertions
+
+    def build(self, variables):
+        """(scheme, host, port, request target, URL, body bytes) for these variables"""
+        scheme = expand(self.protocol, variables) or 'http'
+        host = expand(self.domain, variables)
+        port = expand(self.port, variables)
+        port = int(port) if port else (443 if scheme == 'https' else 80)
+        path = expand(self.path, variables)
+        if '://' in path:
+            # Absolute URL in the path field
+            scheme, rest = path.split('://', 1)
+            authority, _, path = rest.partition('/')
+            path = '/' + path
+            host, _, explicit = authority.partition(':')
+            port = int(explicit) if explicit else (443 if scheme == 'https' else 80)
+        if not path.startswith('/'):
+            path = '/' + path
+
+        body = b''
+        if self.arguments:
+            if self.raw_body:
+                body = ''.join(expand(value, variables) for _, value in self.arguments).encode('utf-8')
+            else:
+                query = urlencode([(expand(name, variables), expand(value, variables))
+                                   for name, value in self.arguments])
+                if self.method in ('GET', 'HEAD', 'DELETE', 'OPTIONS'):
+                    path += ('&' if '?' in path else '?') + query
+                else:
+                    body = query.encode('ascii')
+        return scheme, host, port, quote(path, safe=URL_SAFE), authority_for(scheme, host, port), body
+
+    def head(self, method, target, authority, body, variables):
+        """Request line and headers as bytes; UnicodeEncodeError if a value is not latin-1"""
+        lines = [f"{method} {target} HTTP/1.1", f"Host: {authority}", f"User-Agent: {USER_AGENT}"]
+        lines += [f"{name}: {expand(value, variables)}" for name, value in self.headers]
+        if body or method in ('POST', 'PUT', 'PATCH'):
+            lines.append(f"Content-Length: {len(body)}")
+            if not any(name.lower() == 'content-type' for name, _ in self.headers) and not self.raw_body:
+                lines.append('Content-Type: application/x-www-form-urlencoded')
+        if not self.keepalive:
+            lines.append('Connection: close')
+        return ('\r\n'.join(lines) + '\r\n\r\n').encode('iso-8859-1')
+
+
+def authority_for(scheme, host, port):
+    """Host header value, with internationalized domain names IDNA-encoded"""
+    if not host.isascii():
+        host = host.encode('idna').decode('ascii')
+    return host if port == (443 if scheme == 'https' else 80) else f"{host}:{port}"
+
+
+def redirect_target(url, location):
+    """(URL, scheme, host, port, request target, authority) a Location header points to"""
+    url = urljoin(url, location)
+    parts = urlsplit(url)
+    scheme = parts.scheme.lower() or 'http'
+    host = parts.hostname or ''
+    port = parts.port or (443 if scheme == 'https' else 80)
+    target = quote((parts.path or '/') + (f"?{parts.query}" if parts.query else ''), safe=URL_SAFE)
+    authority = authority_for(scheme, host, port)
+    return f"{scheme}://{authority}{target}", scheme, host, port, target, authority
+
+
+def non_http_error(error):
+    """JTL response code and message for a request that got no HTTP response"""
+    return f"Non HTTP response code: {type(error).__name__}", f"Non HTTP response message: {error}"
+
+
+class GroupPlan:
+    """A thread group's schedule and the requests each virtual user runs"""
+
+    def __init__(self, number, element, requests, data_sets):
+        group = ThreadGroup(element)
+        self.number = number
+        self.name = group.name
+        self.threads = int(float(group.num_threads or 1))
+        self.ramp_up = float(group.ramp_time or _prop(element, 'rampUp') or 0)
+        scheduler = _prop(element, 'ThreadGroup.scheduler', 'false') == 'true'
+        self.duration = float(group.duration or 0) if scheduler and group.duration else None
+        self.delay = float(_prop(element, 'ThreadGroup.delay') or 0) if scheduler else 0.0
+        self.on_error = _prop(element, 'ThreadGroup.on_sample_error', 'continue')
+        controller = element.find("elementProp[@name='ThreadGroup.main_controller']")
+        loops = _prop(controller, 'LoopController.loops', '1') if controller is not None else '1'
+        forever = controller is not None and _prop(controller, 'LoopController.continue_forever') == 'true'
+        try:
+            self.loops = int(float(loops))
+        except ValueError:
+            self.loops = 1
+        if forever and self.loops < 0:
+            self.loops = -1
+        self.requests = requests
+        self.data_sets = data_sets
+
+
+class CompiledPlan:
+    """A JMX plan reduced to what the native engine executes"""
+
+    def __init__(self, path):
+        self.path = path
+        self.plan_dir = os.path.dirname(os.path.abspath(path))
+        self.groups = []
+        self.data_sets = []
+        self.variables = {}
+        self.warnings = []
+        document = JMXDocument.load(path)
+        test_plan = document.test_plan
+        if test_plan is not None:
+            variables = test_plan.element.find("elementProp[@name='TestPlan.user_defined_variables']")
+            if variables is not None:
+                for argument in _collection(variables, 'Arguments.arguments'):
+                    self.variables[_prop(argument, 'Argument.name')] = _prop(argument, 'Argument.value')
+        scope = {'defaults': [], 'headers': [], 'timers': [], 'assertions': [], 'data_sets': []}
+        self._compile_level(test_plan.hash_tree if test_plan is not None else None, scope, group=None)
+
+    def _warn(self, message):
+        if message not in self.warnings:
+            self.warnings.append(message)
+
+    def _compile_level(self, hash_tree, outer, group):
+        """Compile one hashTree level; returns (HTTPRequests in order, CSV data sets in scope)"""
+        if hash_tree is None:
+            return [], list(outer['data_sets'])
+        children = [child for child in iter_test_elements(hash_tree) if child.enabled]
+        # Config, timers and assertions apply to every sampler at their level and below
+        scope = {key: list(value) for key, value in outer.items()}
+        for child in children:
+            testclass = child.testclass
+            if testclass == 'ConfigTestElement' and child.element.get('guiclass') == 'HttpDefaultsGui':
+                scope['defaults'].insert(0, child.element)
+            elif testclass == 'HeaderManager':
+                scope['headers'] += [(_prop(header, 'Header.name'), _prop(header, 'Header.value'))
+                                     for header in _collection(child.element, 'HeaderManager.headers')]
+            elif testclass == 'ConstantTimer':
+                scope['timers'].append(float(_prop(child.element, 'ConstantTimer.delay') or 0))
+            elif testclass in ('ResponseAssertion', 'DurationAssertion'):
+                scope['assertions'].append(child.element)
+            elif testclass == 'CSVDataSet':
+                try:
+                    data_set = DataSet(child.element, self.plan_dir)
+                except OSError as e:
+                    self._warn(f"CSV Data Set '{child.name}' skipped: {e}")
+                    continue
+                # As in JMeter, data sets reading the same file share its cursors
+                for other in self.data_sets:
+                    if other.path == data_set.path:
+                        data_set.cursors = other.cursors
+                        break
+                self.data_sets.append(data_set)
+                scope['data_sets'].append(data_set)
+            elif testclass == 'Arguments':
+                for argument in _collection(child.element, 'Arguments.arguments'):
+                    self.variables[_prop(argument, 'Argument.name')] = _prop(argument, 'Argument.value')
+
+        requests = []
+        for child in children:
+            testclass = child.testclass
+            if isinstance(child, ThreadGroup):
+                if group is not None:
+                    continue
+                if testclass not in PLAIN_THREAD_GROUPS:
+                    self._warn(f"{testclass} '{child.name}' runs as a plain Thread Group "
+                               f"({child.num_threads or 1} threads)")
+                group_requests, data_sets = self._compile_level(child.hash_tree, scope, group=child)
+                self.groups.append(GroupPlan(len(self.groups) + 1, child.element, group_requests, data_sets))
+            elif testclass == 'HTTPSamplerProxy':
+                sampler_scope = {key: list(value) for key, value in scope.items()}
+                # Children of the sampler apply to it alone
+                for inner in iter_test_elements(child.hash_tree) if child.hash_tree is not None else ():
+                    if not inner.enabled:
+                        continue
+                    if inner.testclass == 'ConstantTimer':
+                        sampler_scope['timers'].append(float(_prop(inner.element, 'ConstantTimer.delay') or 0))
+                    elif inner.testclass in ('ResponseAssertion', 'DurationAssertion'):
+                        sampler_scope['assertions'].append(inner.element)
+                    elif inner.testclass == 'HeaderManager':
+                        sampler_scope['headers'] += [
+                            (_prop(header, 'Header.name'), _prop(header, 'Header.value'))
+                            for header in _collection(inner.element, 'HeaderManager.headers')]
+                    else:
+                        self._warn(f"Unsupported element skipped: {inner.testclass} '{inner.name}'")
+                requests.append(HTTPRequest(child.element, sampler_scope['defaults'], sampler_scope['headers'],
+                                            sampler_scope['timers'], compile_assertions(sampler_scope['assertions'])))
+            elif testclass.endswith('Controller'):
+                if group is None:
+                    continue
+                if testclass not in ('GenericController', 'TransactionController'):
+                    self._warn(f"{testclass} '{child.name}' runs its children once per iteration")
+                # Data sets inside a controller still advance once per iteration
+                inner_requests, data_sets = self._compile_level(child.hash_tree, scope, group)
+                requests += inner_requests
+                scope['data_sets'] += [data_set for data_set in data_sets if data_set not in scope['data_sets']]
+            elif testclass in PASSIVE_ELEMENTS or testclass in (
+                    'ConfigTestElement', 'HeaderManager', 'ConstantTimer', 'ResponseAssertion',
+                    'DurationAssertion', 'CSVDataSet'):
+                continue
+            else:
+                self._warn(f"Unsupported element skipped: {testclass} '{child.name}'")
+        return requests, scope['data_sets']
+
+
+def compile_assertions(elements):
+    """Assertion checks as (kind, data) tuples evaluated per sample"""
+    checks = []
+    for element in elements:
+        if element.get('testclass') == 'DurationAssertion':
+            checks.append(('duration', compile_template(_prop(element, 'DurationAssertion.duration'))))
+            continue
+        strings = [compile_template(prop.text or '') for prop in _collection(element, 'Asserion.test_strings')]
+        try:
+            test_type = int(_prop(element, 'Assertion.test_type', '16'))
+        except ValueError:
+            test_type = SUBSTRING
+        field = _prop(element, 'Assertion.test_field', 'Assertion.response_data')
+        checks.append(('response', (field, test_type, strings,
+                                    _prop(element, 'Assertion.assume_success', 'false') == 'true')))
+    return checks
+
+
+def check_assertions(checks, code, message, body, elapsed, variables):
+    """Failure message for the first failing assertion, or None"""
+    for kind, data in checks:
+        if kind == 'duration':
+            limit = expand(data, variables)
+            try:
+                limit = int(float(limit))
+            except ValueError:
+                continue
+            if limit > 0 and elapsed > limit:
+                return (f"The operation lasted too long: It took {elapsed} milliseconds, "
+                        f"but should not have lasted longer than {limit} milliseconds.")
+            continue
+        field, test_type, strings, _ = data
+        if field == 'Assertion.response_code':
+            subject = code
+        elif field == 'Assertion.response_message':
+            subject = message
+        else:
+            subject = body.decode('utf-8', 'replace')
+        results = []
+        for template in strings:
+            pattern = expand(template, variables)
+            if test_type & EQUALS:
+                matched = subject == pattern
+            elif test_type & SUBSTRING:
+                matched = pattern in subject
+            elif test_type & MATCH:
+                matched = re.fullmatch(pattern, subject, re.DOTALL) is not None
+            else:
+                matched = re.search(pattern, subject) is not None
+            results.append(matched != bool(test_type & NOT))
+        passed = any(results) if test_type & OR else all(results)
+        if not passed:
+            return f"Test failed: {field.split('.')[-1].replace('_', ' ')} expected {strings and expand(strings[0], variables)!r}"
+    return None
+
+
+class ConnectionPool:
+    """Keep-alive connections per origin, reused across virtual users
+
+    Idle connections are handed out most-recently-used first; `limit` caps
+    connections checked out at once across all origins (None: unlimited).
+    """
+
+    def __init__(self, limit=None, ssl_context=None):
+        self.idle = {}
+        self.slots = asyncio.Semaphore(limit) if limit else None
+        self.ssl_context = ssl_context
+        self.opened = 0
+
+    async def acquire(self, scheme, host, port, timeout):
+        """(reader, writer, connect_ms, reused) for an origin"""
+        if self.slots is not None:
+            await self.slots.acquire()
+        idle = self.idle.get((scheme, host, port))
+        while idle:
+            reader, writer = idle.pop()
+            if not writer.is_closing() and not reader.at_eof():
+                return reader, writer, 0, True
+            writer.close()
+        started = time.perf_counter()
+        try:
+            context = None
+            if scheme == 'https':
+                context = self.ssl_context or ssl.create_default_context()
+            reader, writer = await asyncio.wait_for(
+                asyncio.open_connection(host, port, ssl=context, server_hostname=host if context else None),
+                timeout)
+        except BaseException:
+            if self.slots is not None:
+                self.slots.release()
+            raise
+        self.opened += 1
+        return reader, writer, int((time.perf_counter() - started) * 1000), False
+
+    def release(self, scheme, host, port, reader, writer, reusable):
+        if reusable:
+            self.idle.setdefault((scheme, host, port), []).append((reader, writer))
+        else:
+            writer.close()
+        if self.slots is not None:
+            self.slots.release()
+
+    def close(self):
+        for connections in self.idle.values():
+            for _, writer in connections:
+                writer.close()
+        self.idle.clear()
+
+
+async def read_response(reader, method, timeout):
+    """Read one HTTP/1.x response: (code, message, headers, body, bytes, first-byte time, keep-alive)"""
+    head = await asyncio.wait_for(reader.readuntil(b'\r\n\r\n'), timeout)
+    first_byte = time.perf_counter()
+    lines = head.decode('iso-8859-1').split('\r\n')
+    version, _, rest = lines[0].partition(' ')
+    code, _, message = rest.partition(' ')
+    headers = {}
+    for line in lines[1:]:
+        name, _, value = line.partition(':')
+        if name:
+            headers[name.strip().lower()] = value.strip()
+    size = len(head)
+    connection = headers.get('connection', '').lower()
+    keepalive = connection != 'close' and (version == 'HTTP/1.1' or connection == 'keep-alive')
+
+    body = b''
+    if method == 'HEAD' or code in ('204', '304') or code.startswith('1'):
+        pass
+    elif 'content-length' in headers:
+        body = await asyncio.wait_for(reader.readexactly(int(headers['content-length'])), timeout)
+    elif 'chunked' in headers.get('transfer-encoding', '').lower():
+        chunks = []
+        while True:
+            line = await asyncio.wait_for(reader.readline(), timeout)
+            size += len(line)
+            length = int(line.split(b';')[0].strip() or b'0', 16)
+            if length == 0:
+                trailer = await asyncio.wait_for(reader.readuntil(b'\r\n'), timeout)
+                while trailer != b'\r\n':
+                    size += len(trailer)
+                    trailer = await asyncio.wait_for(reader.readuntil(b'\r\n'), timeout)
+                size += 2
+                break
+            chunks.append(await asyncio.wait_for(reader.readexactly(length), timeout))
+            await asyncio.wait_for(reader.readexactly(2), timeout)
+            size += 2
+        body = b''.join(chunks)
+    else:
+        body = await asyncio.wait_for(reader.read(), timeout)
+        keepalive = False
+    return code, message, headers, body, size + len(body), first_byte, keepalive
+
+
+class JTLWriter:
+    """Buffered CSV JTL output in JMeter's default column order"""
+
+    def __init__(self, path):
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self.file = open(path, 'w', newline='', encoding='utf-8')
+        self.writer = csv.writer(self.file, lineterminator='\n')
+        self.writer.writerow(DEFAULT_CSV_COLUMNS)
+        self.rows = 0
+
+    def write(self, row):
+        self.writer.writerow(row)
+        self.rows += 1
+
+    def flush(self):
+        self.file.flush()
+
+    def close(self):
+        self.file.close()
+
+
+class RunLog:
+    """jmeter.log-style lines for the events jmeter_log.py reads"""
+
+    def __init__(self, path):
+        self.file = open(path, 'w', encoding='utf-8') if path else None
+
+    def write(self, logger, message):
+        if self.file is None:
+            return
+        now = time.time()
+        stamp = time.strftime('%Y-%m-%d %H:%M:%S', time.localtime(now))
+        self.file.write(f"{stamp},{int(now * 1000) % 1000:03d} INFO {logger}: {message}\n")
+
+    def close(self):
+        if self.file is not None:
+            self.file.close()
+
+
+class NativeEngine:
+    """Run a CompiledPlan with one asyncio task per virtual user
+
+    Every user follows its thread group's schedule (start delay, ramp-up,
+    loop count and duration), runs the group's requests in order with
+    their timers, and appends one JTL row per sample. stop() ends the run
+    gracefully: users finish their current request and exit.
+    """
+
+    def __init__(self, plan, results, log_file=None, max_connections=None, ssl_context=None):
+        self.plan = plan
+        self.results = results
+        self.log = RunLog(log_file)
+        self.max_connections = max_connections
+        self.ssl_context = ssl_context
+        self.active = 0
+        self.group_active = {}
+        self.stopping = None
+        self.samples = 0
+        self.errors = 0
+
+    def stop(self):
+        if self.stopping is not None and not self.stopping.is_set():
+            self.log.write('o.a.j.e.StandardJMeterEngine', 'Stopping test')
+            self.stopping.set()
+
+    async def run(self):
+        """Run every thread group to completion; returns the number of samples"""
+        self.stopping = asyncio.Event()
+        self.pool = ConnectionPool(self.max_connections, self.ssl_context)
+        self.writer = JTLWriter(self.results)
+        self.log.write('o.a.j.e.StandardJMeterEngine', 'Running the test!')
+        started = time.monotonic()
+        users = []
+        for group in self.plan.groups:
+            self.group_active[group.number] = 0
+            self.log.write('o.a.j.t.ThreadGroup', f"Starting thread group... number={group.number} "
+                                                  f"threads={group.threads} ramp-up={int(group.ramp_up)}")
+            for index in range(group.threads):
+                users.append(asyncio.ensure_future(self._user(group, index, started)))
+        flusher = asyncio.ensure_future(self._flush_periodically())
+        try:
+            deadlines = [group.delay + group.ramp_up + group.duration + END_GRACE
+                         for group in self.plan.groups if group.duration is not None]
+            unbounded = any(group.duration is None for group in self.plan.groups)
+            if users:
+                timeout = None if unbounded or not deadlines else max(deadlines)
+                done, pending = await asyncio.wait(users, timeout=timeout)
+                for task in pending:
+                    task.cancel()
+                if pending:
+                    await asyncio.wait(pending)
+                for task in done:
+                    if not task.cancelled() and task.exception() is not None:
+                        raise task.exception()
+        finally:
+            flusher.cancel()
+            self.pool.close()
+            self.writer.close()
+            self.log.write('o.a.j.r.Summariser', f"summary = {self.samples} samples, {self.errors} errors")
+            self.log.write('o.a.j.e.StandardJMeterEngine', 'Notifying test listeners of end of test')
+            self.log.close()
+        return self.samples
+
+    async def _flush_periodically(self):
+        while True:
+            await asyncio.sleep(FLUSH_INTERVAL)
+            self.writer.flush()
+
+    async def _sleep(self, seconds, deadline):
+        """Sleep unless the run stops or the deadline passes first; False if the user should exit"""
+        if deadline is not None:
+            seconds = min(seconds, deadline - time.monotonic())
+        if seconds > 0:
+            try:
+                await asyncio.wait_for(self.stopping.wait(), seconds)
+            except asyncio.TimeoutError:
+                pass
+        return not self.stopping.is_set() and (deadline is None or time.monotonic() < deadline)
+
+    async def _user(self, group, index, started):
+        thread_name = f"{group.name} {group.number}-{index + 1}"
+        offset = group.delay + (group.ramp_up * index / group.threads if group.threads else 0)
+        deadline = started + group.delay + group.duration if group.duration is not None else None
+        if not await self._sleep(started + offset - time.monotonic(), deadline):
+            return
+        self.active += 1
+        self.group_active[group.number] += 1
+        self.log.write('o.a.j.t.JMeterThread', f"Thread started: {thread_name}")
+        variables = dict(self.plan.variables)
+        try:
+            for iteration in itertools.count():
+                if group.loops >= 0 and iteration >= group.loops:
+                    break
+                for data_set in group.data_sets:
+                    row = data_set.next_row(data_set.cursor_key(group.number, index))
+                    if row is None:
+                        return
+                    variables.update(row)
+                for request in group.requests:
+                    if request.delay and not await self._sleep(request.delay / 1000.0, deadline):
+                        return
+                    if self.stopping.is_set() or (deadline is not None and time.monotonic() >= deadline):
+                        return
+                    success = await self._sample(request, variables, thread_name, group)
+                    if not success and group.on_error != 'continue':
+                        if group.on_error == 'stoptest' or group.on_error == 'stoptestnow':
+                            self.stop()
+                            return
+                        if group.on_error == 'stopthread':
+                            return
+                        break
+        finally:
+            self.active -= 1
+            self.group_active[group.number] -= 1
+            self.log.write('o.a.j.t.JMeterThread', f"Thread finished: {thread_name}")
+
+    async def _sample(self, request, variables, thread_name, group):
+        timestamp = int(time.time() * 1000)
+        started = time.perf_counter()
+        url = ''
+        method = request.method
+        connect = 0
+        latency = 0
+        received = 0
+        sent = 0
+        response_body = b''
+        try:
+            scheme, host, port, target, authority, body = request.build(variables)
+            url = f"{scheme}://{authority}{target}"
+            payload = request.head(method, target, authority, body, variables) + body
+        except UnicodeError as e:
+            # A value that cannot be sent fails this sample, not the run
+            code, message = non_http_error(e)
+            payload = None
+        redirects = 0
+        while payload is not None:
+            sent += len(payload)
+            code, message, headers, response_body, size, connect_ms, first_byte = await self._exchange(
+                request, method, scheme, host, port, payload)
+            received += size
+            connect = connect or connect_ms
+            if first_byte is not None and not latency:
+                latency = int((first_byte - started) * 1000)
+            location = headers.get('location')
+            if not (request.follow_redirects and code in REDIRECT_CODES and location) or redirects >= MAX_REDIRECTS:
+                break
+            redirects += 1
+            if code not in ('307', '308'):
+                # As browsers do: everything but 307/308 repeats as a GET without a body
+                method = 'HEAD' if method == 'HEAD' else 'GET'
+                body = b''
+            try:
+                url, scheme, host, port, target, authority = redirect_target(url, location)
+                payload = request.head(method, target, authority, body, variables) + body
+            except (UnicodeError, ValueError) as e:
+                code, message = non_http_error(e)
+                break
+        elapsed = int((time.perf_counter() - started) * 1000)
+
+        failure = ''
+        success = code.isdigit() and 200 <= int(code) < 400
+        if code.isdigit() and request.assertions:
+            if any(kind == 'response' and data[3] for kind, data in request.assertions):
+                success = True
+            failure = check_assertions(request.assertions, code, message or HTTP_MESSAGES.get(int(code), ''),
+                                       response_body, elapsed, variables) or ''
+            success = success and not failure
+        self.samples += 1
+        if not success:
+            self.errors += 1
+        self.writer.write((timestamp, elapsed, expand(request.label_template, variables), code,
+                           message, thread_name, 'text', 'true' if success else 'false', failure,
+                           received, sent, self.group_active[group.number], self.active, url,
+                           latency, 0, connect))
+        return success
+
+    async def _exchange(self, request, method, scheme, host, port, payload):
+        """Send one request and read its response, retrying once on a stale keep-alive connection
+
+        Returns (code, message, headers, body, bytes received, connect ms,
+        first-byte time or None).
+        """
+        connect = 0
+        error = None
+        for attempt in range(2):
+            try:
+                reader, writer, connect, reused = await self.pool.acquire(
+                    scheme, host, port, request.connect_timeout)
+            except (OSError, asyncio.TimeoutError) as e:
+                return non_http_error(e) + ({}, b'', 0, connect, None)
+            try:
+                writer.write(payload)
+                await writer.drain()
+                code, message, headers, body, received, first_byte, keepalive = await read_response(
+                    reader, method, request.response_timeout)
+                self.pool.release(scheme, host, port, reader, writer, keepalive and request.keepalive)
+                return code, message, headers, body, received, connect, first_byte
+            except (OSError, asyncio.IncompleteReadError, asyncio.LimitOverrunError, asyncio.TimeoutError,
+                    ValueError) as e:
+                self.pool.release(scheme, host, port, reader, writer, False)
+                error = e
+                # A reused keep-alive connection may have been closed by the server; retry once fresh
+                if not reused:
+                    break
+        return non_http_error(error) + ({}, b'', 0, connect, None)
+
+
+def run_plan(plan, results, log_file=None, max_connections=None, ssl_context=None):
+    """Run a plan (path or CompiledPlan), stopping cleanly on SIGINT/SIGTERM; returns the engine"""
+    if not isinstance(plan, CompiledPlan):
+        plan = CompiledPlan(plan)
+    engine = NativeEngine(plan, results, log_file=log_file, max_connections=max_connections,
+                          ssl_context=ssl_context)
+
+    async def main():
+        loop = asyncio.get_running_loop()
+        for signum in (signal.SIGINT, signal.SIGTERM):
+            try:
+                loop.add_signal_handler(signum, engine.stop)
+            except (NotImplementedError, RuntimeError):
+                signal.signal(signum, lambda *_: loop.call_soon_threadsafe(engine.stop))
+        return await engine.run()
+
+    asyncio.run(main())
+    return engine
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Run the HTTP parts of a JMeter plan with asyncio")
+    parser.add_argument('-n', action='store_true', help='Accepted for JMeter compatibility')
+    parser.add_argument('-t', dest='plan', required=True, help='.jmx test plan')
+    parser.add_argument('-l', dest='results', required=True, help='JTL output file (CSV)')
+    parser.add_argument('-j', dest='log', help='Run log in jmeter.log format')
+    parser.add_argument('--max-connections', type=int, help='Cap on concurrent connections (default: unlimited)')
+    parser.add_argument('--insecure', action='store_true', help='Skip TLS certificate verification, as JMeter does')
+    args, _ = parser.parse_known_args(argv)
+
+    if not os.path.exists(args.plan):
+        print(f"Error: file not found: {args.plan}")
+        return 1
+    context = None
+    if args.insecure:
+        context = ssl.create_default_context()
+        context.check_hostname = False
+        context.verify_mode = ssl.CERT_NONE
+    try:
+        plan = CompiledPlan(args.plan)
+    except ValueError as e:
+        print(f"Error: {e}")
+        return 1
+    for warning in plan.warnings:
+        print(f"Warning: {warning}")
+    if not any(group.requests for group in plan.groups):
+        print("Error: no HTTP samplers to run")
+        return 1
+    started = time.monotonic()
+    engine = run_plan(plan, args.results, log_file=args.log, max_connections=args.max_connections,
+                      ssl_context=context)
+    elapsed = time.monotonic() - started
+    print(f"{engine.samples} samples, {engine.errors} errors in {elapsed:.1f}s "
+          f"({engine.samples / elapsed if elapsed else 0:.1f}/s) -> {args.results}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,21 +1,92 @@
 import os
-import google.generativeai as genai
-from dotenv import load_dotenv
+import sys
 import json
 from datetime import datetime
-import re
 
-# Load environment variables
-load_dotenv()
+from conversation_context import ConversationContext, estimate_tokens
+from jmx_model import JMXDocument, JMXParseError, extract_test_plan, sanitize_jmx
+from jmx_stream import StreamAborted, StreamingJMXWriter
+from jmx_templates import render_from_setup
+from plan_lint import PlanLinter, format_report
+from response_cache import CachedModel, ResponseCache
+from telemetry import count, span
+
+MODEL_NAME = 'gemini-2.0-flash'
+
+# Defaults for the optional on-disk response cache (TYPHON_CACHE_PATH, e.g.
+# .typhon/cache.sqlite3) and the conversation context included in prompts
+DEFAULT_CACHE_TTL = 7 * 24 * 3600
+DEFAULT_CONTEXT_TOKENS = 3000
+
+_environment_loaded = False
+_genai = None
+
+
+def load_environment():
+    """Load .env into os.environ once; a no-op when python-dotenv is missing"""
+    global _environment_loaded
+    if not _environment_loaded:
+        _environment_loaded = True
+        try:
+            from dotenv import load_dotenv
+        except ImportError:
+            return
+        load_dotenv()
+
+
+def gemini_model(model_name=MODEL_NAME):
+    """Build a Gemini model, importing and configuring the SDK on first use"""
+    global _genai
+    if _genai is None:
+        import google.generativeai as genai
+        load_environment()
+        genai.configure(api_key=os.getenv('GOOGLE_API_KEY'))
+        _genai = genai
+    return _genai.GenerativeModel(model_name)
+
+
+def cache_from_environment():
+    """ResponseCache at TYPHON_CACHE_PATH, or None when the variable is unset"""
+    load_environment()
+    cache_path = os.getenv('TYPHON_CACHE_PATH')
+    if not cache_path:
+        return None
+    return ResponseCache(cache_path, ttl=int(os.getenv('TYPHON_CACHE_TTL', DEFAULT_CACHE_TTL)))
 
-# Configure Gemini API
-GOOGLE_API_KEY = os.getenv('GOOGLE_API_KEY')
-genai.configure(api_key=GOOGLE_API_KEY)
 
 class PerformanceTestAssistant:
-    def __init__(self):
-        self.model = genai.GenerativeModel('gemini-2.0-flash')
-        self.conversation_history = []
+    def __init__(self, model=None, cache=None, context_token_budget=None, use_templates=True):
+        """Create the assistant
+
+        model: object with a generate_content(prompt) method, defaults to Gemini
+        cache: ResponseCache used to serve repeated prompts, defaults to
+               TYPHON_CACHE_PATH when that environment variable is set
+        context_token_budget: approximate tokens of conversation carried into
+               refine/generate prompts, defaults to TYPHON_CONTEXT_TOKENS
+        use_templates: render standard load/stress/spike/endurance/scalability
+               setups from local templates instead of calling the model
+        """
+        load_environment()
+        self.cache = cache if cache is not None else cache_from_environment()
+        self._base_model = model
+        self._model = None
+        if context_token_budget is None:
+            context_token_budget = int(os.getenv('TYPHON_CONTEXT_TOKENS', DEFAULT_CONTEXT_TOKENS))
+        self.context = ConversationContext(context_token_budget)
+        self.use_templates = use_templates
+
+    @property
+    def model(self):
+        """The (cached) model, created on first use so template-only runs never load the SDK"""
+        if self._model is None:
+            model = self._base_model if self._base_model is not None else gemini_model()
+            self._model = CachedModel(model, self.cache, MODEL_NAME) if self.cache is not None else model
+        return self._model
+    
+    @property
+    def conversation_history(self):
+        """Messages still inside the context window, oldest first"""
+        return [{"role": role, "content": content} for role, content, _ in self.context.messages]
         
     def _get_system_prompt(self):
         return """You are a performance testing expert assistant. Your role is to:
@@ -62,24 +133,18 @@ class PerformanceTestAssistant:
         - Use plain text formatting only
         - Give specific values, not ranges"""
         
-        response = self.model.generate_content(prompt)
-        self.conversation_history.append({"role": "user", "content": user_input})
-        self.conversation_history.append({"role": "assistant", "content": response.text})
+        response = self._generate(prompt)
+        self.context.add("user", user_input)
+        self.context.add("assistant", response.text)
         
         return response.text
 
     def refine_setup(self, feedback):
         """Refine the test setup based on user feedback"""
         
-        # Collect the conversation history to provide context
-        conversation = []
-        for message in self.conversation_history:
-            if message["role"] == "user":
-                conversation.append(f"User: {message['content']}")
-            else:
-                conversation.append(f"Assistant: {message['content']}")
-        
-        conversation_text = "\n".join(conversation)
+        with span('prompt.build'):
+            # Bounded context: current setup, summarized older turns and recent window
+            conversation_text = self.context.prompt_prefix()
         
         prompt = f"""Previous conversation:
 {conversation_text}
@@ -111,25 +176,30 @@ Important:
 - Update only the parameters mentioned in the feedback
 - Use plain text formatting only"""
         
-        response = self.model.generate_content(prompt)
-        self.conversation_history.append({"role": "user", "content": feedback})
-        self.conversation_history.append({"role": "assistant", "content": response.text})
+        response = self._generate(prompt)
+        self.context.add("user", feedback)
+        self.context.add("assistant", response.text)
         
         return response.text
 
-    def generate_jmx(self, final_setup):
-        """Generate complete JMeter test plan based on the final setup"""
-        # Collect the conversation history to provide context
-        conversation = []
-        for message in self.conversation_history:
-            if message["role"] == "user":
-                conversation.append(f"User: {message['content']}")
-            else:
-                conversation.append(f"Assistant: {message['content']}")
-        
-        conversation_text = "\n".join(conversation)
+    def _generate(self, prompt):
+        """Call the model, recording latency, prompt tokens and response size"""
+        self.context.record_prompt(prompt)
+        count('llm.requests')
+        count('llm.prompt_tokens', estimate_tokens(prompt))
+        with span('llm.generate'):
+            response = self.model.generate_content(prompt)
+        count('llm.response_tokens', estimate_tokens(response.text))
+        count('llm.response_bytes', len(response.text.encode('utf-8')))
+        return response
+
+    def _build_jmx_prompt(self, final_setup):
+        """Build the JMX generation prompt for the final setup"""
+        with span('prompt.build'):
+            # Bounded context: current setup, summarized older turns and recent window
+            conversation_text = self.context.prompt_prefix()
         
-        prompt = f"""Conversation history:
+        return f"""Conversation history:
 {conversation_text}
 
 Final test setup:
@@ -151,84 +221,60 @@ Important compatibility notes:
 - If domain is not specified, use example.com as the default
 - Leverage all appropriate JMeter features based on the test type (load, stress, spike, etc.)
 - Use JMeter's built-in capabilities for the specific test scenario (database, API, web, etc.)"""
+    
+    def _render_template(self, final_setup):
+        """Render standard setups locally; returns None if the LLM is needed"""
+        if not self.use_templates:
+            return None
+        with span('template.render'):
+            return render_from_setup(final_setup)
+    
+    def generate_jmx(self, final_setup):
+        """Generate complete JMeter test plan based on the final setup"""
+        jmx_content = self._render_template(final_setup)
+        if jmx_content is not None:
+            return jmx_content
         
-        response = self.model.generate_content(prompt)
+        prompt = self._build_jmx_prompt(final_setup)
+        response = self._generate(prompt)
         
         # Clean up the XML content
         jmx_content = self._clean_jmx_content(response.text)
         
-        # Remove any problematic fields from SampleSaveConfiguration
-        jmx_content = self._fix_sample_save_configuration(jmx_content)
-        
-        # Remove any incompatible JMeter elements
-        jmx_content = self._validate_jmeter_compatibility(jmx_content)
+        # Parse once: prune incompatible elements and problematic
+        # SampleSaveConfiguration fields, and validate, in a single traversal
+        jmx_content = self._sanitize_jmx(jmx_content)
         
         # If the JMX is empty or invalid, use default template
-        if not self._is_valid_xml(jmx_content):
+        if jmx_content is None:
             jmx_content = self._create_default_jmx()
             
         return jmx_content
     
     def _clean_jmx_content(self, content):
-        """Clean up the JMX content to ensure it's valid XML"""
-        # Remove markdown code block markers if present
-        content = re.sub(r'```xml|```jmx|```', '', content)
-        
-        # Extract the XML content - start with XML declaration or root element
-        xml_pattern = re.compile(r'(<\?xml.*?>\s*)?<jmeterTestPlan.*?</jmeterTestPlan>', re.DOTALL)
-        match = xml_pattern.search(content)
-        
-        if match:
-            xml_content = match.group(0)
-        else:
-            # If no match, try to find any XML-like content
-            xml_content = re.search(r'<[^>]+>.*</[^>]+>', content, re.DOTALL)
-            if xml_content:
-                xml_content = xml_content.group(0)
-            else:
-                # If still no match, return original content with warning
-                return '<?xml version="1.0" encoding="UTF-8"?>\n<!-- WARNING: Could not extract valid XML -->\n' + content
-        
-        # Ensure it starts with an XML declaration
-        if not xml_content.startswith('<?xml'):
-            xml_content = '<?xml version="1.0" encoding="UTF-8"?>\n' + xml_content
-            
-        return xml_content
+        """Extract the <jmeterTestPlan> element from the model response"""
+        with span('jmx.clean'):
+            xml_content = extract_test_plan(content)
+        if xml_content is None:
+            # Nothing resembling a test plan, return original content with warning
+            return '<?xml version="1.0" encoding="UTF-8"?>\n<!-- WARNING: Could not extract valid XML -->\n' + content
+        
+        return '<?xml version="1.0" encoding="UTF-8"?>\n' + xml_content
     
-    def _fix_sample_save_configuration(self, xml_content):
-        """Remove problematic fields from SampleSaveConfiguration"""
-        # List of problematic fields
-        problematic_fields = [
-            'sampleCounts',
-            'errorCount',
-            'assertions',
-            'hostname',
-            'threadCounts',
-            'sampleCount'
-        ]
-        
-        for field in problematic_fields:
-            # Remove lines containing these fields in SampleSaveConfiguration
-            pattern = re.compile(f'<{field}>.*?</{field}>', re.DOTALL)
-            xml_content = pattern.sub('', xml_content)
-        
-        return xml_content
+    def _sanitize_jmx(self, xml_content):
+        """Sanitize and validate JMX content, returning None if it is unusable"""
+        with span('jmx.sanitize'):
+            jmx_content, report = sanitize_jmx(xml_content)
+        count_removed(report)
+        return jmx_content
     
     def _is_valid_xml(self, xml_content):
-        """Check if the XML content is valid JMeter XML"""
-        required_elements = [
-            '<jmeterTestPlan',
-            '<hashTree>',
-            '<ThreadGroup',
-            'num_threads',
-            'ramp_time'
-        ]
-        
-        for element in required_elements:
-            if element not in xml_content:
-                return False
-        
-        return True
+        """Check if the XML content is a well-formed, usable JMeter test plan"""
+        try:
+            document = JMXDocument.parse(xml_content)
+        except JMXParseError:
+            return False
+        return document.sanitize(warn=False).valid
     
     def _create_default_jmx(self):
         """Create a default JMX template as fallback"""
@@ -284,7 +330,7 @@ Important compatibility notes:
         </HTTPSamplerProxy>
         <hashTree/>
       </hashTree>
-      <ResultCollector guiclass="ViewResultsFullVisualizer" testclass="ResultCollector" testname="View Results Tree" enabled="true">
+      <ResultCollector guiclass="ViewResultsFullVisualizer" testclass="ResultCollector" testname="View Results Tree" enabled="false">
         <boolProp name="ResultCollector.error_logging">false</boolProp>
         <objProp>
           <name>saveConfig</name>
@@ -312,7 +358,6 @@ Important compatibility notes:
             <bytes>true</bytes>
             <sentBytes>true</sentBytes>
             <url>true</url>
-            <threadCounts>true</threadCounts>
             <idleTime>true</idleTime>
             <connectTime>true</connectTime>
           </value>
@@ -348,7 +393,6 @@ Important compatibility notes:
             <bytes>true</bytes>
             <sentBytes>true</sentBytes>
             <url>true</url>
-            <threadCounts>true</threadCounts>
             <idleTime>true</idleTime>
             <connectTime>true</connectTime>
           </value>
@@ -360,55 +404,123 @@ Important compatibility notes:
   </hashTree>
 </jmeterTestPlan>"""
 
-    def save_jmx(self, jmx_content, test_type):
-        """Save the JMX file in the jmeter-tests/test-plans directory"""
+    def _reserve_plan_file(self, test_type, output_dir):
+        """Create an empty, uniquely named .jmx file and return its path"""
         # Create directory if it doesn't exist
-        os.makedirs('jmeter-tests/test-plans', exist_ok=True)
+        os.makedirs(output_dir, exist_ok=True)
         
         # Generate filename with timestamp
         timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
-        filename = f"jmeter-tests/test-plans/{test_type.lower().replace(' ', '_')}_{timestamp}.jmx"
+        base = f"{output_dir}/{test_type.lower().replace(' ', '_')}_{timestamp}"
+        filename = f"{base}.jmx"
         
-        # Save the JMX content
-        with open(filename, 'w') as f:
-            f.write(jmx_content)
+        # Never overwrite a plan saved in the same second
+        suffix = 1
+        while True:
+            try:
+                open(filename, 'x').close()
+                return filename
+            except FileExistsError:
+                filename = f"{base}_{suffix}.jmx"
+                suffix += 1
+    
+    def save_jmx(self, jmx_content, test_type, output_dir='jmeter-tests/test-plans'):
+        """Save the JMX file in the jmeter-tests/test-plans directory"""
+        with span('jmx.save'):
+            filename = self._reserve_plan_file(test_type, output_dir)
+            
+            # Save the JMX content
+            with open(filename, 'w') as f:
+                f.write(jmx_content)
+        count('jmx.bytes_written', len(jmx_content.encode('utf-8')))
         
         return filename
+    
+    def generate_and_save_jmx(self, final_setup, test_type, output_dir='jmeter-tests/test-plans'):
+        """Stream the JMX generation straight into a plan file
 
-    def _validate_jmeter_compatibility(self, xml_content):
-        """Remove any incompatible JMeter elements from the XML content"""
-        # List of incompatible elements that should be removed
-        incompatible_elements = [
-            'ResponseTimeAssertion',
-            'DebugSampler',
-            'BSFSampler',
-            'BSFPreProcessor',
-            'BSFPostProcessor',
-            'BSFAssertion',
-            'BeanShellSampler',  # Deprecated in newer versions
-            'AjpSampler',
-            'GraphVisualizer',   # Removed in newer versions
-            'ComparisonVisualizer',
-            'MonitorHealthVisualizer',
-            'DisableAction'
-        ]
-        
-        # Check and remove any incompatible elements
-        for element in incompatible_elements:
-            if element in xml_content:
-                print(f"Warning: Removing incompatible element '{element}' from JMX")
-                # Simple replacement - removes the element and its content
-                pattern = re.compile(f'<{element}.*?</{element}>', re.DOTALL)
-                xml_content = pattern.sub('', xml_content)
-                
-                # Also remove any empty hashTree elements that might be left behind
-                xml_content = re.sub(r'<hashTree>\s*</hashTree>', '', xml_content)
+        Model output is extracted, sanitized and written element by element
+        as it arrives, and generation stops early once the output clearly is
+        not a JMeter plan. Falls back to the default template if the streamed
+        plan is invalid. Returns the saved filename.
+        """
+        jmx_content = self._render_template(final_setup)
+        if jmx_content is not None:
+            return self.save_jmx(jmx_content, test_type, output_dir)
+        
+        prompt = self._build_jmx_prompt(final_setup)
+        self.context.record_prompt(prompt)
+        count('llm.requests')
+        count('llm.prompt_tokens', estimate_tokens(prompt))
+        filename = self._reserve_plan_file(test_type, output_dir)
+        partial = filename + '.part'
+        saved = False
+        
+        try:
+            try:
+                with span('llm.stream'), open(partial, 'w', encoding='utf-8') as f:
+                    writer = StreamingJMXWriter(f)
+                    for chunk in self.model.generate_content(prompt, stream=True):
+                        count('llm.response_tokens', estimate_tokens(chunk.text))
+                        count('llm.response_bytes', len(chunk.text.encode('utf-8')))
+                        # Sanitizing and writing as chunks arrive, so this is the
+                        # non-LLM share of llm.stream
+                        with span('jmx.stream_feed'):
+                            writer.feed(chunk.text)
+                # tell() on a text file is an opaque cookie, not a byte count
+                count('jmx.bytes_written', os.path.getsize(partial))
+                report = writer.close()
+                count_removed(report)
+                valid = report.valid
+            except StreamAborted as e:
+                print(f"Warning: Aborted JMX generation: {e}")
+                valid = False
+            
+            if valid:
+                os.replace(partial, filename)
+            else:
+                os.remove(partial)
+                with open(filename, 'w') as f:
+                    f.write(self._create_default_jmx())
+            saved = True
+        finally:
+            # Never leave an empty reserved plan or a half-written .part behind
+            if not saved:
+                for path in (partial, filename):
+                    if os.path.exists(path):
+                        os.remove(path)
         
-        return xml_content
+        return filename
+
+
+def count_removed(report):
+    """Count the incompatible elements and save-config fields a sanitize pass removed"""
+    count('jmx.elements_removed', sum(report.removed_elements.values()))
+    count('jmx.fields_removed', report.removed_fields)
+
+
+def main(argv=None):
+    import argparse
+    parser = argparse.ArgumentParser(description="Generate JMeter test plans from a conversation or a saved setup")
+    parser.add_argument('--setup', metavar='FILE',
+                        help='Generate straight from a test setup text file instead of asking interactively')
+    parser.add_argument('--test-type', default='performance_test', help='Plan filename prefix with --setup')
+    parser.add_argument('--output-dir', default='jmeter-tests/test-plans', help='Directory for generated plans')
+    parser.add_argument('--no-templates', action='store_true',
+                        help='Always ask the model instead of rendering standard setups from templates')
+    args = parser.parse_args(argv)
+
+    assistant = PerformanceTestAssistant(use_templates=not args.no_templates)
+
+    if args.setup:
+        with open(args.setup, encoding='utf-8') as f:
+            setup = f.read()
+        filename = assistant.generate_and_save_jmx(setup, args.test_type, args.output_dir)
+        print(f"JMX file has been generated and saved to: {filename}")
+        print()
+        print(format_report(PlanLinter().lint_file(filename)))
+        return 0
 
-def main():
-    assistant = PerformanceTestAssistant()
-    
     print("Welcome to the JMeter Test Plan Generator!")
     print("\nDescribe what you want to test, and I'll help you create a JMeter test plan.")
     print("\nExamples:")
@@ -436,15 +548,16 @@ def main():
             
             if choice == "1":
                 print("\nGenerating JMX file...")
-                jmx = assistant.generate_jmx(setup)
                 # Extract test type from the setup for filename
                 test_type = user_input.split(' ')[4] if len(user_input.split(' ')) > 4 else "performance_test"
-                filename = assistant.save_jmx(jmx, test_type)
+                filename = assistant.generate_and_save_jmx(setup, test_type, args.output_dir)
                 print(f"\nJMX file has been generated and saved to: {filename}")
+                print()
+                print(format_report(PlanLinter().lint_file(filename)))
                 print("\nWould you like to create another test plan? (y/n)")
                 if input().lower() != 'y':
                     print("Goodbye!")
-                    return
+                    return 0
                 break
                 
             elif choice == "2":
@@ -464,10 +577,10 @@ def main():
                 
             elif choice == "4":
                 print("Goodbye!")
-                return
+                return 0
                 
             else:
                 print("Invalid choice. Please try again.")
 
 if __name__ == "__main__":
-    main() 
\ No newline at end of file
+    sys.exit(main())
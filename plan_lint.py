@@ -0,0 +1,465 @@
+import argparse
+import json
+import math
+import os
+import sys
+from collections import namedtuple
+
+from jmx_model import (INCOMPATIBLE_ELEMENTS, PROBLEMATIC_SAVE_FIELDS, JMXDocument, JMXParseError, ThreadGroup,
+                       iter_test_elements)
+from jmx_templates import TEST_TYPES, detect_test_type
+from telemetry import count, span
+
+Finding = namedtuple('Finding', ['severity', 'code', 'element', 'message'])
+
+SEVERITIES = ('error', 'warning', 'info')
+
+# Assumed when estimating; override with --response-time / --response-size
+DEFAULT_RESPONSE_TIME_MS = 200
+DEFAULT_RESPONSE_SIZE = 10 * 1024
+
+# Approximate bytes per saved sample, before label and URL
+CSV_ROW_BYTES = 90
+XML_ROW_BYTES = 260
+
+# Listeners that keep every sample in memory or redraw per sample in GUI mode
+HEAVY_LISTENERS = frozenset([
+    'ViewResultsFullVisualizer', 'TableVisualizer', 'GraphVisualizer', 'RespTimeGraphVisualizer',
+    'SplineVisualizer', 'MailerVisualizer',
+])
+
+# Save-configuration fields that copy payloads into the results file
+PAYLOAD_SAVE_FIELDS = ('responseData', 'samplerData', 'requestHeaders', 'responseHeaders')
+
+# Scripting elements interpreted per sample rather than compiled once
+SLOW_SCRIPT_CLASSES = frozenset([
+    'BeanShellSampler', 'BeanShellPreProcessor', 'BeanShellPostProcessor', 'BeanShellAssertion',
+    'BeanShellTimer', 'BeanShellListener',
+])
+
+# Load test types where a per-sample GUI listener is an error, not a warning
+LOAD_TEST_TYPES = frozenset(TEST_TYPES)
+
+# Single-user plan types where GUI listeners and missing think time are expected
+CHECK_TEST_TYPES = ('smoke', 'functional', 'debug')
+
+THROUGHPUT_TIMERS = frozenset(['ConstantThroughputTimer', 'PreciseThroughputTimer'])
+
+
+def _number(text, default=None):
+    try:
+        return float(text)
+    except (TypeError, ValueError):
+        return default
+
+
+def timer_mean_ms(element):
+    """Mean delay a timer adds before each sampler in its scope (ms), or None if not a timer"""
+    testclass = element.testclass
+    offset = _number(element.get_prop('ConstantTimer.delay'), 0.0)
+    spread = _number(element.get_prop('RandomTimer.range'), 0.0)
+    if testclass == 'ConstantTimer':
+        return offset
+    if testclass == 'UniformRandomTimer':
+        return offset + spread / 2
+    if testclass == 'GaussianRandomTimer':
+        return offset
+    if testclass == 'PoissonRandomTimer':
+        return offset + spread
+    return None
+
+
+def throughput_cap(element, threads):
+    """Requests/sec a throughput timer allows for a group of `threads`, or None"""
+    for child in element.element:
+        if child.get('name') == 'throughput':
+            value = _number(child.text)
+        elif child.tag == 'doubleProp' and child.findtext('name') == 'throughput':
+            value = _number(child.findtext('value'))
+        else:
+            continue
+        if not value:
+            return None
+        per_second = value / 60.0
+        if element.testclass == 'ConstantThroughputTimer' and element.get_prop('calcMode', '0') == '0':
+            return per_second * threads
+        return per_second
+    return None
+
+
+class GroupEstimate:
+    """Expected load from one thread group"""
+
+    def __init__(self, name, threads, thread_seconds, wall_seconds, samplers, think_ms, cap=None,
+                 response_ms=DEFAULT_RESPONSE_TIME_MS, iterations=None, ramp_seconds=0.0):
+        self.name = name
+        self.threads = threads
+        self.samplers = samplers
+        self.wall_seconds = wall_seconds
+        iteration_ms = samplers * response_ms + think_ms
+        per_thread = samplers * 1000.0 / iteration_ms if iteration_ms else 0.0
+        self.peak_rate = threads * per_thread
+        if cap is not None:
+            self.peak_rate = min(self.peak_rate, cap)
+        if iterations is not None:
+            # Loop-bounded: each thread runs its iterations and exits, so with
+            # a ramp-up only the threads started within one thread's lifetime
+            # overlap, and the run ends one lifetime after the last start
+            self.samples = threads * iterations * samplers
+            if thread_seconds is not None:
+                self.samples = min(self.samples, thread_seconds * per_thread)
+            if ramp_seconds:
+                self.peak_rate = min(self.peak_rate, threads / ramp_seconds * iterations * samplers)
+            if per_thread:
+                finish = ramp_seconds + iterations * iteration_ms / 1000.0
+                self.wall_seconds = min(wall_seconds, finish) if wall_seconds else finish
+            if cap is not None and self.wall_seconds:
+                self.wall_seconds = max(self.wall_seconds, self.samples / cap)
+        else:
+            self.samples = thread_seconds * per_thread if thread_seconds is not None else None
+            if self.samples is not None and cap is not None and self.wall_seconds:
+                self.samples = min(self.samples, cap * self.wall_seconds)
+
+    def to_dict(self):
+        return {'name': self.name, 'threads': self.threads, 'samplers': self.samplers,
+                'peak_rate': self.peak_rate, 'samples': self.samples, 'seconds': self.wall_seconds}
+
+
+class PlanReport:
+    """Findings and cost estimate for one plan"""
+
+    def __init__(self, path):
+        self.path = path
+        self.findings = []
+        self.groups = []
+        self.result_files = []
+        self.row_bytes = CSV_ROW_BYTES
+
+    def add(self, severity, code, element, message):
+        self.findings.append(Finding(severity, code, element, message))
+
+    @property
+    def peak_rate(self):
+        return sum(group.peak_rate for group in self.groups)
+
+    @property
+    def samples(self):
+        if any(group.samples is None for group in self.groups):
+            return None
+        return sum(group.samples for group in self.groups)
+
+    @property
+    def seconds(self):
+        known = [group.wall_seconds for group in self.groups if group.wall_seconds is not None]
+        return max(known) if known else None
+
+    @property
+    def result_bytes(self):
+        """Estimated bytes across the -l results file and every listener writing its own file"""
+        if self.samples is None:
+            return None
+        return self.samples * sum([self.row_bytes] + [row for _, row in self.result_files])
+
+    def worst(self):
+        for severity in SEVERITIES:
+            if any(finding.severity == severity for finding in self.findings):
+                return severity
+        return None
+
+    def to_dict(self):
+        return {'path': self.path, 'peak_rate': self.peak_rate, 'samples': self.samples,
+                'seconds': self.seconds, 'result_bytes': self.result_bytes,
+                'groups': [group.to_dict() for group in self.groups],
+                'findings': [finding._asdict() for finding in self.findings]}
+
+
+class PlanLinter:
+    """Walk a plan once, collecting findings and the inputs for the estimate"""
+
+    def __init__(self, response_ms=DEFAULT_RESPONSE_TIME_MS, response_size=DEFAULT_RESPONSE_SIZE):
+        self.response_ms = response_ms
+        self.response_size = response_size
+
+    def lint_file(self, path):
+        report = PlanReport(path)
+        try:
+            with span('lint.parse'):
+                document = JMXDocument.load(path)
+        except (JMXParseError, OSError) as e:
+            report.add('error', 'parse-error', '', str(e))
+            return report
+        self.lint(document, report)
+        return report
+
+    def lint(self, document, report):
+        with span('lint.plan'):
+            self._lint(document, report)
+        count('lint.plans')
+        count('lint.findings', len(report.findings))
+        return report
+
+    def _lint(self, document, report):
+        test_plan = document.test_plan
+        if test_plan is None:
+            report.add('error', 'no-test-plan', '', "no TestPlan element")
+            return
+        test_type = detect_test_type(' '.join([test_plan.name, test_plan.get_prop('TestPlan.comments') or '']),
+                                     TEST_TYPES + CHECK_TEST_TYPES)
+        self.load_test = test_type is None or test_type in LOAD_TEST_TYPES
+        self.report = report
+        self._level(test_plan.hash_tree, {'timers': [], 'caps': [], 'defaults': []}, group=None)
+        if not report.groups:
+            report.add('error', 'no-thread-group', '', "no enabled thread group; the plan runs nothing")
+
+    def _level(self, hash_tree, outer, group):
+        """Lint one hashTree level; returns [(sampler, think ms, throughput timers)] for samplers in it"""
+        if hash_tree is None:
+            return []
+        report = self.report
+        children = list(iter_test_elements(hash_tree))
+        scope = {key: list(value) for key, value in outer.items()}
+        for child in children:
+            if not child.enabled:
+                continue
+            delay = timer_mean_ms(child)
+            if delay is not None:
+                scope['timers'].append(delay)
+            elif child.testclass in THROUGHPUT_TIMERS:
+                scope['caps'].append(child)
+            elif child.testclass == 'ConfigTestElement' and child.element.get('guiclass') == 'HttpDefaultsGui':
+                scope['defaults'].append(child)
+
+        samplers = []
+        for child in children:
+            label = f"{child.testclass} '{child.name}'"
+            if child.tag in INCOMPATIBLE_ELEMENTS:
+                report.add('error', 'incompatible-element', label, "not supported by JMeter 5.6.3")
+            if not child.enabled:
+                continue
+            if isinstance(child, ThreadGroup):
+                if group is None:
+                    self._thread_group(child, scope)
+                continue
+            if child.testclass == 'ResultCollector':
+                self._listener(child, label)
+            elif child.testclass in SLOW_SCRIPT_CLASSES:
+                report.add('warning', 'beanshell', label, "BeanShell is interpreted on every call; use JSR223 with Groovy")
+            elif child.testclass.startswith('JSR223'):
+                language = (child.get_prop('scriptLanguage') or 'groovy').lower()
+                if language != 'groovy':
+                    report.add('warning', 'jsr223-language', label,
+                               f"{language} scripts are not compiled and cached; use Groovy")
+                elif child.get_prop('cacheKey') == 'false':
+                    report.add('warning', 'jsr223-cache', label, "script compilation caching is disabled")
+            if child.testclass.endswith('Sampler') or child.testclass.endswith('SamplerProxy'):
+                if child.testclass == 'HTTPSamplerProxy':
+                    self._http_sampler(child, label, scope)
+                think = sum(scope['timers'])
+                caps = list(scope['caps'])
+                # Timers attached to the sampler apply to it alone
+                for inner in iter_test_elements(child.hash_tree) if child.hash_tree is not None else ():
+                    if not inner.enabled:
+                        continue
+                    delay = timer_mean_ms(inner)
+                    if delay is not None:
+                        think += delay
+                    elif inner.testclass in THROUGHPUT_TIMERS:
+                        caps.append(inner)
+                    elif inner.testclass in SLOW_SCRIPT_CLASSES:
+                        report.add('warning', 'beanshell', f"{inner.testclass} '{inner.name}'",
+                                   "BeanShell is interpreted on every call; use JSR223 with Groovy")
+                samplers.append((child, think, caps))
+            elif child.hash_tree is not None and group is not None:
+                # Controllers: their samplers run as part of each iteration
+                samplers += self._level(child.hash_tree, scope, group)
+        return samplers
+
+    def _thread_group(self, group, scope):
+        report = self.report
+        label = f"{group.testclass} '{group.name}'"
+        samplers = self._level(group.hash_tree, scope, group)
+        if not samplers:
+            report.add('warning', 'no-samplers', label, "thread group has no enabled samplers")
+            return
+        threads, thread_seconds, wall_seconds, iterations, ramp = self._schedule(group, label)
+        if threads is None:
+            return
+        think_ms = sum(delay for _, delay, _ in samplers)
+        timers = {id(timer.element): timer for _, _, caps in samplers for timer in caps}
+        if self.load_test and not think_ms and not timers and threads > 1:
+            report.add('info', 'no-think-time', label,
+                       "no timers: every thread sends requests back to back, unlike real users")
+        caps = [throughput_cap(timer, threads) for timer in timers.values()]
+        caps = [cap for cap in caps if cap is not None]
+        report.groups.append(GroupEstimate(group.name, threads, thread_seconds, wall_seconds, len(samplers),
+                                           think_ms, min(caps) if caps else None, self.response_ms, iterations, ramp))
+
+    def _schedule(self, group, label):
+        """(threads, thread-seconds, wall seconds, loop iterations or None, ramp-up seconds) for a thread group"""
+        report = self.report
+        element = group.element
+        rows = element.find("collectionProp[@name='ultimatethreadgroupdata']")
+        if rows is not None:
+            threads = thread_seconds = wall = 0
+            for row in rows:
+                values = [_number(prop.text, 0.0) for prop in row.findall('stringProp')]
+                if len(values) < 5:
+                    continue
+                count, delay, startup, hold, shutdown = values[:5]
+                threads += int(count)
+                thread_seconds += count * (startup / 2 + hold + shutdown / 2)
+                wall = max(wall, delay + startup + hold + shutdown)
+            return threads, thread_seconds, wall, None, 0.0
+
+        threads = _number(group.num_threads)
+        if threads is None:
+            if group.num_threads and '${' in group.num_threads:
+                report.add('info', 'parameterized', label, f"thread count is {group.num_threads}; not estimated")
+            else:
+                report.add('error', 'no-threads', label, "thread group defines no thread count")
+            return None, None, None, None, 0.0
+        threads = int(threads)
+
+        if group.get_prop('Start users count') is not None:
+            # Stepping Thread Group
+            step = max(1, int(_number(group.get_prop('Start users count'), threads)))
+            period = _number(group.get_prop('Start users period'), 0.0)
+            hold = _number(group.get_prop('flighttime'), 0.0)
+            steps = math.ceil(threads / step)
+            ramp = steps * period
+            thread_seconds = step * period * steps * (steps + 1) / 2 + threads * hold
+            return threads, thread_seconds, ramp + hold, None, ramp
+
+        ramp = _number(group.ramp_time or group.get_prop('RampUp'), 0.0)
+        duration = _number(group.duration or group.get_prop('Hold'), None)
+        # JMeter ignores the duration unless the scheduler is switched on
+        scheduled = group.get_prop('ThreadGroup.scheduler') == 'true' and duration
+        if group.testclass != 'ThreadGroup' and group.get_prop('Hold') is not None:
+            # Concurrency Thread Group: ramp, then hold
+            duration = ramp + _number(group.get_prop('Hold'), 0.0)
+            scheduled = True
+        if duration and not scheduled:
+            report.add('warning', 'scheduler-off', label,
+                       f"duration {duration:g}s is ignored because ThreadGroup.scheduler is not true")
+        controller = element.find("elementProp[@name='ThreadGroup.main_controller']")
+        loops = _number(controller.findtext("*[@name='LoopController.loops']") if controller is not None else None, 1)
+        forever = controller is not None and controller.findtext("*[@name='LoopController.continue_forever']") == 'true'
+        if scheduled:
+            if ramp > duration:
+                report.add('warning', 'ramp-exceeds-duration', label,
+                           f"ramp-up {ramp:g}s is longer than the {duration:g}s duration; full load is never reached")
+            active = max(0.0, duration - ramp / 2) if ramp <= duration else duration * duration / (2 * ramp)
+            if loops is not None and loops >= 0 and not forever:
+                return threads, threads * active, duration, int(loops), ramp
+            return threads, threads * active, duration, None, ramp
+        if (loops is None or loops < 0) or forever:
+            report.add('error', 'runs-forever', label, "loops forever with no duration; the test never ends")
+            return threads, None, None, None, ramp
+        return threads, None, None, int(loops), ramp
+
+    def _http_sampler(self, sampler, label, scope):
+        report = self.report
+        keepalive = sampler.get_prop('HTTPSampler.use_keepalive')
+        if keepalive != 'true':
+            state = 'disabled' if keepalive == 'false' else 'not set (JMeter treats it as off)'
+            report.add('warning', 'no-keepalive', label,
+                       f"keep-alive {state}: every request opens a new connection")
+        timeouts = [sampler.get_prop(name) or any(config.get_prop(name) for config in scope['defaults'])
+                    for name in ('HTTPSampler.connect_timeout', 'HTTPSampler.response_timeout')]
+        if not all(timeouts):
+            report.add('info', 'no-timeout', label, "no connect/response timeout; a hung server stalls threads")
+        if sampler.get_prop('HTTPSampler.image_parser') == 'true':
+            report.add('info', 'embedded-resources', label,
+                       "retrieves embedded resources; extra requests per sample are not estimated")
+
+    def _listener(self, listener, label):
+        report = self.report
+        guiclass = listener.element.get('guiclass', '')
+        if guiclass in HEAVY_LISTENERS:
+            severity = 'error' if self.load_test else 'warning'
+            report.add(severity, 'heavy-listener', f"{guiclass} '{listener.name}'",
+                       "keeps or redraws every sample; disable it for load tests and analyze the JTL instead")
+        config = listener.element.find("objProp/value[@class='SampleSaveConfiguration']")
+        if config is None:
+            return
+        saved = [field for field in PAYLOAD_SAVE_FIELDS if config.findtext(field) == 'true']
+        if saved:
+            report.add('warning', 'payload-saved', label,
+                       f"saves {', '.join(saved)} for every sample; results files and I/O balloon")
+        rejected = [child.tag for child in config if child.tag in PROBLEMATIC_SAVE_FIELDS]
+        if rejected:
+            report.add('error', 'bad-save-field', label, f"JMeter 5.6.3 rejects {', '.join(rejected)}")
+        if listener.get_prop('filename'):
+            row = XML_ROW_BYTES if config.findtext('xml') == 'true' else CSV_ROW_BYTES
+            if 'responseData' in saved:
+                row += self.response_size
+            report.result_files.append((listener.get_prop('filename'), row))
+
+
+def iter_plan_files(paths):
+    for path in paths:
+        if os.path.isdir(path):
+            for directory, _, files in os.walk(path):
+                for name in sorted(files):
+                    if name.endswith('.jmx'):
+                        yield os.path.join(directory, name)
+        else:
+            yield path
+
+
+def format_bytes(size):
+    for unit in ('B', 'KB', 'MB', 'GB'):
+        if size < 1024 or unit == 'GB':
+            return f"{size:.0f} {unit}" if unit == 'B' else f"{size:.1f} {unit}"
+        size /= 1024.0
+
+
+def format_report(report):
+    lines = [report.path]
+    if report.groups:
+        samples = f"{report.samples:,.0f}" if report.samples is not None else 'unbounded'
+        seconds = f"{report.seconds:,.0f}s" if report.seconds is not None else 'unbounded'
+        size = '~' + format_bytes(report.result_bytes) if report.result_bytes is not None else 'unbounded'
+        lines.append(f"  estimate: peak {report.peak_rate:,.1f} req/s, {samples} samples over {seconds}, "
+                     f"{size} of results")
+    for finding in sorted(report.findings, key=lambda finding: SEVERITIES.index(finding.severity)):
+        where = f" {finding.element}:" if finding.element else ''
+        lines.append(f"  {finding.severity:<7} [{finding.code}]{where} {finding.message}")
+    return "\n".join(lines)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Lint JMeter plans and estimate their load and results size")
+    parser.add_argument('paths', nargs='+', help='.jmx files or directories to scan recursively')
+    parser.add_argument('--response-time', type=float, default=DEFAULT_RESPONSE_TIME_MS,
+                        help='Assumed mean response time in ms for the estimate')
+    parser.add_argument('--response-size', type=int, default=DEFAULT_RESPONSE_SIZE,
+                        help='Assumed response size in bytes, for listeners saving response data')
+    parser.add_argument('--fail-on', choices=SEVERITIES, default='error',
+                        help='Exit non-zero if any finding is at least this severe (default: error)')
+    parser.add_argument('--quiet', action='store_true', help='Only print plans with findings')
+    parser.add_argument('--json', action='store_true', help='Print reports as JSON')
+    args = parser.parse_args(argv)
+
+    linter = PlanLinter(args.response_time, args.response_size)
+    reports = [linter.lint_file(path) for path in iter_plan_files(args.paths)]
+    if not reports:
+        print("No .jmx files found.")
+        return 1
+    if args.json:
+        print(json.dumps([report.to_dict() for report in reports], indent=2))
+    else:
+        for report in reports:
+            if args.quiet and not report.findings:
+                continue
+            print(format_report(report))
+        counts = {severity: sum(finding.severity == severity for report in reports for finding in report.findings)
+                  for severity in SEVERITIES}
+        print(f"\n{len(reports)} plans: {counts['error']} errors, {counts['warning']} warnings, {counts['info']} notes")
+    threshold = SEVERITIES.index(args.fail_on)
+    failing = any(report.worst() is not None and SEVERITIES.index(report.worst()) <= threshold for report in reports)
+    return 1 if failing else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
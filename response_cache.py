@@ -0,0 +1,206 @@
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+
+from telemetry import count
+
+DEFAULT_TTL = 7 * 24 * 3600
+DEFAULT_MAX_BYTES = 256 * 1024 * 1024
+
+
+def cache_key(model_name, prompt, generation_config=None):
+    """Content address for a model call: hash of model, prompt and settings"""
+    payload = json.dumps(
+        {'model': model_name, 'prompt': prompt, 'config': generation_config or {}},
+        sort_keys=True, default=str
+    )
+    return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+
+class ResponseCache:
+    """SQLite-backed response cache with TTL and size-bounded LRU eviction
+
+    Entries older than `ttl` seconds are treated as misses and deleted. When
+    the stored text exceeds `max_bytes` (or `max_entries`), the least recently
+    used entries are evicted. Safe to share between threads.
+    """
+
+    def __init__(self, path, ttl=DEFAULT_TTL, max_bytes=DEFAULT_MAX_BYTES, max_entries=None):
+        self.path = path
+        self.ttl = ttl
+        self.max_bytes = max_bytes
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._lock = threading.Lock()
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute('PRAGMA journal_mode=WAL')
+        self._conn.execute('PRAGMA synchronous=NORMAL')
+        self._conn.execute("""
+            CREATE TABLE IF NOT EXISTS responses (
+                key TEXT PRIMARY KEY,
+                value TEXT NOT NULL,
+                size INTEGER NOT NULL,
+                created REAL NOT NULL,
+                accessed REAL NOT NULL
+            )""")
+        self._conn.execute('CREATE INDEX IF NOT EXISTS responses_accessed ON responses (accessed)')
+        self._conn.commit()
+        # Running totals, so bounds are checked without scanning the table on every put
+        self._entries, self._bytes = self._conn.execute(
+            'SELECT COUNT(*), COALESCE(SUM(size), 0) FROM responses').fetchone()
+
+    def get(self, key):
+        now = time.time()
+        with self._lock:
+            row = self._conn.execute('SELECT value, size, created FROM responses WHERE key = ?',
+                                     (key,)).fetchone()
+            if row is None:
+                self.misses += 1
+                return None
+            value, size, created = row
+            if self.ttl is not None and now - created > self.ttl:
+                self._conn.execute('DELETE FROM responses WHERE key = ?', (key,))
+                self._conn.commit()
+                self._entries -= 1
+                self._bytes -= size
+                self.misses += 1
+                return None
+            self._conn.execute('UPDATE responses SET accessed = ? WHERE key = ?', (now, key))
+            self._conn.commit()
+            self.hits += 1
+            return value
+
+    def put(self, key, value):
+        now = time.time()
+        size = len(value.encode('utf-8'))
+        with self._lock:
+            old = self._conn.execute('SELECT size FROM responses WHERE key = ?', (key,)).fetchone()
+            self._conn.execute(
+                'INSERT OR REPLACE INTO responses (key, value, size, created, accessed) VALUES (?, ?, ?, ?, ?)',
+                (key, value, size, now, now)
+            )
+            if old is None:
+                self._entries += 1
+            else:
+                self._bytes -= old[0]
+            self._bytes += size
+            self._evict()
+            self._conn.commit()
+
+    def _evict(self):
+        """Drop least recently used entries until the size and count bounds hold"""
+        if self._within_bounds():
+            return
+        victims = []
+        for key, size in self._conn.execute('SELECT key, size FROM responses ORDER BY accessed ASC'):
+            if self._within_bounds():
+                break
+            victims.append((key,))
+            self._bytes -= size
+            self._entries -= 1
+        self._conn.executemany('DELETE FROM responses WHERE key = ?', victims)
+        self.evictions += len(victims)
+
+    def _within_bounds(self):
+        return (self.max_bytes is None or self._bytes <= self.max_bytes) and \
+            (self.max_entries is None or self._entries <= self.max_entries)
+
+    def clear(self):
+        with self._lock:
+            self._conn.execute('DELETE FROM responses')
+            self._conn.commit()
+            self._entries = self._bytes = 0
+
+    def stats(self):
+        with self._lock:
+            entries, total = self._entries, self._bytes
+        lookups = self.hits + self.misses
+        return {
+            'hits': self.hits,
+            'misses': self.misses,
+            'hit_rate': self.hits / lookups if lookups else 0.0,
+            'evictions': self.evictions,
+            'entries': entries,
+            'bytes': total,
+        }
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+
+class CachedResponse:
+    """Minimal stand-in for a generate_content response
+
+    Iterating yields the response itself, so a cached reply can be consumed
+    like a single-chunk streaming response.
+    """
+
+    def __init__(self, text):
+        self.text = text
+
+    def __iter__(self):
+        yield self
+
+
+class CachedModel:
+    """Wrap a generative model so repeated prompts are served from a ResponseCache"""
+
+    def __init__(self, model, cache, model_name, generation_config=None):
+        self.model = model
+        self.cache = cache
+        self.model_name = model_name
+        self.generation_config = generation_config
+
+    def generate_content(self, prompt, stream=False, **kwargs):
+        # Streaming does not change the content, so it is not part of the key
+        key = cache_key(self.model_name, prompt, dict(self.generation_config or {}, **kwargs))
+        text = self.cache.get(key)
+        if text is not None:
+            count('cache.hits')
+            return CachedResponse(text)
+        count('cache.misses')
+        if stream:
+            return self._record_stream(key, self.model.generate_content(prompt, stream=True, **kwargs))
+        response = self.model.generate_content(prompt, **kwargs)
+        self.cache.put(key, response.text)
+        return response
+
+    def _record_stream(self, key, response):
+        """Pass chunks through, caching the full text only if the stream completes"""
+        parts = []
+        for chunk in response:
+            parts.append(chunk.text)
+            yield chunk
+        self.cache.put(key, ''.join(parts))
+
+
+class FakeModel:
+    """Offline stand-in for genai.GenerativeModel
+
+    `responder` is called with the prompt and returns the response text; by
+    default a fixed `text` is returned. Every prompt is recorded in `calls`.
+    With stream=True the text is returned in `chunk_size` pieces.
+    """
+
+    def __init__(self, text='', responder=None, chunk_size=256):
+        self.text = text
+        self.responder = responder
+        self.chunk_size = chunk_size
+        self.calls = []
+
+    def generate_content(self, prompt, stream=False, **kwargs):
+        self.calls.append(prompt)
+        text = self.responder(prompt) if self.responder else self.text
+        if stream:
+            return [CachedResponse(text[i:i + self.chunk_size])
+                    for i in range(0, len(text), self.chunk_size)]
+        return CachedResponse(text)
@@ -0,0 +1,399 @@
+import argparse
+import math
+import os
+import sqlite3
+import sys
+import threading
+import time
+from datetime import datetime
+
+from jtl_analyzer import JTLAnalyzer, iter_samples
+
+DEFAULT_STORE_PATH = os.getenv('TYPHON_RESULTS_DB', '.typhon/results.sqlite3')
+
+# Per-label summary columns, one SQLite column each so a history query reads
+# only the metric it asks for
+METRICS = ('samples', 'errors', 'error_rate', 'throughput', 'mean', 'stddev', 'min', 'max',
+           'p50', 'p90', 'p95', 'p99', 'received_bytes', 'sent_bytes')
+
+DEFAULT_BASELINE_RUNS = 20
+
+# A regression must be statistically significant and at least this much slower
+SIGNIFICANCE = 0.01
+MIN_SLOWDOWN = 0.10
+
+# p95 is compared against the baseline median using a robust z-score (MAD)
+ROBUST_Z_THRESHOLD = 3.0
+MIN_BASELINE_RUNS = 3
+
+# Error rate increases smaller than this (absolute) are not reported
+MIN_ERROR_RATE_INCREASE = 0.01
+
+
+def _betacf(a, b, x):
+    """Continued fraction for the regularized incomplete beta function"""
+    tiny = 1e-300
+    qab, qap, qam = a + b, a + 1.0, a - 1.0
+    c, d = 1.0, 1.0 - qab * x / qap
+    d = 1.0 / (d if abs(d) > tiny else tiny)
+    h = d
+    for m in range(1, 201):
+        m2 = 2 * m
+        aa = m * (b - m) * x / ((qam + m2) * (a + m2))
+        d = 1.0 + aa * d
+        d = 1.0 / (d if abs(d) > tiny else tiny)
+        c = 1.0 + aa / c if abs(1.0 + aa / c) > tiny else tiny
+        h *= d * c
+        aa = -(a + m) * (qab + m) * x / ((a + m2) * (qap + m2))
+        d = 1.0 + aa * d
+        d = 1.0 / (d if abs(d) > tiny else tiny)
+        c = 1.0 + aa / c if abs(1.0 + aa / c) > tiny else tiny
+        delta = d * c
+        h *= delta
+        if abs(delta - 1.0) < 1e-12:
+            break
+    return h
+
+
+def _betainc(a, b, x):
+    if x <= 0.0:
+        return 0.0
+    if x >= 1.0:
+        return 1.0
+    front = math.exp(math.lgamma(a + b) - math.lgamma(a) - math.lgamma(b) + a * math.log(x) + b * math.log(1 - x))
+    if x < (a + 1) / (a + b + 2):
+        return front * _betacf(a, b, x) / a
+    return 1.0 - front * _betacf(b, a, 1 - x) / b
+
+
+def t_sf(t, df):
+    """One-sided p-value P(T > t) for Student's t with `df` degrees of freedom"""
+    if df <= 0 or math.isnan(t):
+        return 1.0
+    if math.isinf(df) or df > 1e6:
+        return 0.5 * math.erfc(t / math.sqrt(2))
+    tail = 0.5 * _betainc(df / 2.0, 0.5, df / (df + t * t))
+    return tail if t > 0 else 1.0 - tail
+
+
+def welch_test(mean1, std1, n1, mean2, std2, n2):
+    """Welch's t-test that sample 1 has a larger mean than sample 2: (t, df, p)"""
+    if n1 < 2 or n2 < 2:
+        return None
+    v1 = std1 * std1 / n1
+    v2 = std2 * std2 / n2
+    if v1 + v2 == 0:
+        return None
+    t = (mean1 - mean2) / math.sqrt(v1 + v2)
+    df = (v1 + v2) ** 2 / ((v1 * v1 / (n1 - 1) if v1 else 0) + (v2 * v2 / (n2 - 1) if v2 else 0))
+    return t, df, t_sf(t, df)
+
+
+def pool(rows):
+    """Combine per-run (samples, mean, stddev) rows into one (n, mean, stddev)"""
+    n = sum(row['samples'] for row in rows if row['mean'] is not None)
+    if not n:
+        return 0, None, None
+    mean = sum(row['samples'] * row['mean'] for row in rows if row['mean'] is not None) / n
+    second_moment = sum(row['samples'] * ((row['stddev'] or 0) ** 2 + row['mean'] ** 2)
+                        for row in rows if row['mean'] is not None) / n
+    return n, mean, max(second_moment - mean * mean, 0) ** 0.5
+
+
+def median(values):
+    ordered = sorted(values)
+    middle = len(ordered) // 2
+    if len(ordered) % 2:
+        return ordered[middle]
+    return (ordered[middle - 1] + ordered[middle]) / 2
+
+
+def detect_regressions(current, baseline):
+    """Compare one label's current row against its rows from baseline runs
+
+    Mean latency: Welch's t-test of the current run against the pooled
+    baseline samples. p95: robust z-score against the median and MAD of the
+    baseline runs' p95, which tolerates a few noisy runs in the window. Error
+    rate: two-proportion z-test. Latency findings also require a slowdown of
+    at least MIN_SLOWDOWN, so large runs do not flag trivial differences.
+    """
+    findings = []
+    n_base, mean_base, std_base = pool(baseline)
+    if current['mean'] is not None and mean_base:
+        result = welch_test(current['mean'], current['stddev'] or 0, current['samples'],
+                            mean_base, std_base or 0, n_base)
+        change = current['mean'] / mean_base - 1
+        if result and result[2] < SIGNIFICANCE and change >= MIN_SLOWDOWN:
+            findings.append({'metric': 'mean', 'baseline': mean_base, 'current': current['mean'],
+                             'change': change, 'test': 'welch', 'p_value': result[2]})
+
+    p95s = [row['p95'] for row in baseline if row['p95'] is not None]
+    if current['p95'] is not None and len(p95s) >= MIN_BASELINE_RUNS:
+        center = median(p95s)
+        mad = median([abs(value - center) for value in p95s]) * 1.4826
+        change = current['p95'] / center - 1 if center else 0.0
+        score = (current['p95'] - center) / mad if mad else (math.inf if change > 0 else 0.0)
+        if score > ROBUST_Z_THRESHOLD and change >= MIN_SLOWDOWN:
+            findings.append({'metric': 'p95', 'baseline': center, 'current': current['p95'],
+                             'change': change, 'test': 'robust_z', 'score': score})
+
+    base_samples = sum(row['samples'] for row in baseline)
+    if base_samples and current['samples']:
+        base_rate = sum(row['errors'] for row in baseline) / base_samples
+        rate = current['error_rate']
+        pooled = (current['errors'] + base_rate * base_samples) / (current['samples'] + base_samples)
+        spread = math.sqrt(pooled * (1 - pooled) * (1 / current['samples'] + 1 / base_samples))
+        if spread and rate - base_rate >= MIN_ERROR_RATE_INCREASE:
+            p_value = 0.5 * math.erfc((rate - base_rate) / spread / math.sqrt(2))
+            if p_value < SIGNIFICANCE:
+                findings.append({'metric': 'error_rate', 'baseline': base_rate, 'current': rate,
+                                 'change': rate - base_rate, 'test': 'two_proportion', 'p_value': p_value})
+    return findings
+
+
+class ResultsStore:
+    """SQLite store of per-label run summaries for run-over-run comparison
+
+    Each ingested JTL becomes a row in `runs` (keyed by plan file and start
+    time) plus one row per label in `label_stats`, whose primary key
+    (label, run_id) is the index behind history and baseline queries. A
+    results file is fingerprinted by path, size and mtime, so re-ingesting a
+    directory only processes new or changed files.
+    """
+
+    def __init__(self, path=DEFAULT_STORE_PATH):
+        self.path = path
+        self._lock = threading.Lock()
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.row_factory = sqlite3.Row
+        self._conn.execute('PRAGMA journal_mode=WAL')
+        self._conn.execute('PRAGMA synchronous=NORMAL')
+        self._conn.executescript(f"""
+            CREATE TABLE IF NOT EXISTS runs (
+                id INTEGER PRIMARY KEY,
+                plan TEXT,
+                results TEXT,
+                fingerprint TEXT UNIQUE,
+                started_at INTEGER,
+                duration_ms INTEGER,
+                samples INTEGER,
+                errors INTEGER,
+                ingested_at REAL NOT NULL
+            );
+            CREATE INDEX IF NOT EXISTS runs_plan_started ON runs (plan, started_at);
+            CREATE INDEX IF NOT EXISTS runs_started ON runs (started_at);
+            CREATE TABLE IF NOT EXISTS label_stats (
+                label TEXT NOT NULL,
+                run_id INTEGER NOT NULL,
+                {', '.join(f'{metric} REAL' for metric in METRICS)},
+                PRIMARY KEY (label, run_id)
+            ) WITHOUT ROWID;
+            CREATE INDEX IF NOT EXISTS label_stats_run ON label_stats (run_id);
+        """)
+        self._conn.commit()
+
+    @staticmethod
+    def fingerprint(results):
+        stat = os.stat(results)
+        return f"{os.path.abspath(results)}:{stat.st_size}:{stat.st_mtime_ns}"
+
+    def has(self, fingerprint):
+        with self._lock:
+            row = self._conn.execute('SELECT id FROM runs WHERE fingerprint = ?', (fingerprint,)).fetchone()
+        return row['id'] if row else None
+
+    def add_run(self, analyzer, plan=None, results=None, fingerprint=None):
+        """Store the summary of an analyzed run and return its id"""
+        return self.add_summary(analyzer.summary(), plan=plan, results=results, fingerprint=fingerprint,
+                                started_at=analyzer.total.first_timestamp)
+
+    def add_summary(self, rows, plan=None, results=None, fingerprint=None, started_at=None):
+        """Store summary rows (jtl_analyzer format, TOTAL last) as a new run"""
+        total = rows[-1]
+        if started_at is None:
+            started_at = int(time.time() * 1000)
+        with self._lock:
+            cursor = self._conn.execute(
+                'INSERT INTO runs (plan, results, fingerprint, started_at, duration_ms, samples, errors, ingested_at) '
+                'VALUES (?, ?, ?, ?, ?, ?, ?, ?)',
+                (plan and os.path.normpath(plan), results, fingerprint, started_at, total['duration_ms'],
+                 total['samples'], total['errors'], time.time())
+            )
+            run_id = cursor.lastrowid
+            self._conn.executemany(
+                f"INSERT INTO label_stats (label, run_id, {', '.join(METRICS)}) "
+                f"VALUES (?, ?, {', '.join('?' for _ in METRICS)})",
+                [(row['label'], run_id, *(row[metric] for metric in METRICS)) for row in rows]
+            )
+            self._conn.commit()
+        return run_id
+
+    def ingest(self, results, plan=None):
+        """Analyze and store a JTL file unless it was already ingested: (run_id, is_new)"""
+        fingerprint = self.fingerprint(results)
+        existing = self.has(fingerprint)
+        if existing is not None:
+            return existing, False
+        analyzer = JTLAnalyzer().feed(iter_samples(results))
+        return self.add_run(analyzer, plan=plan, results=results, fingerprint=fingerprint), True
+
+    def ingest_directory(self, directory, plan=None):
+        """Ingest every new or changed .jtl file under a directory"""
+        ingested = []
+        for root, _, files in os.walk(directory):
+            for name in sorted(files):
+                if name.endswith('.jtl'):
+                    run_id, is_new = self.ingest(os.path.join(root, name), plan=plan)
+                    if is_new:
+                        ingested.append(run_id)
+        return ingested
+
+    def runs(self, plan=None, limit=50):
+        """Most recent runs first"""
+        query = 'SELECT * FROM runs'
+        params = []
+        if plan:
+            query += ' WHERE plan = ?'
+            params.append(os.path.normpath(plan))
+        query += ' ORDER BY started_at DESC, id DESC LIMIT ?'
+        params.append(limit)
+        with self._lock:
+            return [dict(row) for row in self._conn.execute(query, params)]
+
+    def run(self, run_id=None):
+        """A run by id, or the most recent one"""
+        with self._lock:
+            if run_id is None:
+                row = self._conn.execute('SELECT * FROM runs ORDER BY started_at DESC, id DESC LIMIT 1').fetchone()
+            else:
+                row = self._conn.execute('SELECT * FROM runs WHERE id = ?', (run_id,)).fetchone()
+        return dict(row) if row else None
+
+    def run_stats(self, run_id):
+        with self._lock:
+            return [dict(row) for row in self._conn.execute(
+                'SELECT * FROM label_stats WHERE run_id = ? ORDER BY label', (run_id,))]
+
+    def history(self, label, metric='p95', plan=None, last=50):
+        """(run_id, started_at, value) for a label over its most recent runs"""
+        if metric not in METRICS:
+            raise ValueError(f"Unknown metric '{metric}', expected one of: {', '.join(METRICS)}")
+        query = (f'SELECT r.id, r.started_at, s.{metric} FROM label_stats s JOIN runs r ON r.id = s.run_id '
+                 'WHERE s.label = ?')
+        params = [label]
+        if plan:
+            query += ' AND r.plan = ?'
+            params.append(os.path.normpath(plan))
+        query += ' ORDER BY r.started_at DESC, r.id DESC LIMIT ?'
+        params.append(last)
+        with self._lock:
+            return [tuple(row) for row in self._conn.execute(query, params)]
+
+    def baseline(self, run, window=DEFAULT_BASELINE_RUNS):
+        """Per-label rows of up to `window` runs of the same plan before `run`"""
+        with self._lock:
+            run_ids = [row['id'] for row in self._conn.execute(
+                'SELECT id FROM runs WHERE plan IS ? AND (started_at < ? OR (started_at = ? AND id < ?)) '
+                'ORDER BY started_at DESC, id DESC LIMIT ?',
+                (run['plan'], run['started_at'], run['started_at'], run['id'], window))]
+            rows = {}
+            if run_ids:
+                placeholders = ', '.join('?' for _ in run_ids)
+                for row in self._conn.execute(
+                        f'SELECT * FROM label_stats WHERE run_id IN ({placeholders})', run_ids):
+                    rows.setdefault(row['label'], []).append(dict(row))
+        return run_ids, rows
+
+    def compare(self, run_id=None, window=DEFAULT_BASELINE_RUNS):
+        """Regression report for a run (default: the latest) against its baseline window"""
+        run = self.run(run_id)
+        if run is None:
+            raise ValueError('No such run' if run_id is not None else 'The store has no runs')
+        run_ids, baseline = self.baseline(run, window)
+        labels = []
+        for current in self.run_stats(run['id']):
+            findings = detect_regressions(current, baseline.get(current['label'], []))
+            labels.append({'label': current['label'], 'findings': findings})
+        return {'run': run, 'baseline_runs': run_ids, 'labels': labels,
+                'regressions': sum(len(label['findings']) for label in labels)}
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+
+def format_comparison(report):
+    run = report['run']
+    started = datetime.fromtimestamp(run['started_at'] / 1000).strftime('%Y-%m-%d %H:%M:%S')
+    lines = [f"Run {run['id']} ({run['plan'] or run['results']}, {started}) "
+             f"vs {len(report['baseline_runs'])} baseline runs"]
+    if not report['baseline_runs']:
+        lines.append("  No earlier runs of this plan to compare against.")
+        return "\n".join(lines)
+    for label in report['labels']:
+        for finding in label['findings']:
+            if finding['metric'] == 'error_rate':
+                detail = (f"{finding['baseline'] * 100:.2f}% -> {finding['current'] * 100:.2f}% "
+                          f"(p={finding['p_value']:.2g})")
+            else:
+                evidence = f"p={finding['p_value']:.2g}" if 'p_value' in finding else f"z={finding['score']:.1f}"
+                detail = (f"{finding['baseline']:.0f}ms -> {finding['current']:.0f}ms "
+                          f"(+{finding['change'] * 100:.0f}%, {evidence})")
+            lines.append(f"  REGRESSION  {label['label'][:40]:<40} {finding['metric']:<10} {detail}")
+    if not report['regressions']:
+        lines.append("  No regressions detected.")
+    return "\n".join(lines)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Store JMeter results and detect regressions across runs")
+    parser.add_argument('--db', default=DEFAULT_STORE_PATH, help=f'Store location (default {DEFAULT_STORE_PATH})')
+    commands = parser.add_subparsers(dest='command', required=True)
+
+    ingest = commands.add_parser('ingest', help='Store a JTL file or every new .jtl under a directory')
+    ingest.add_argument('path')
+    ingest.add_argument('--plan', help='Test plan the results belong to')
+
+    runs = commands.add_parser('runs', help='List stored runs')
+    runs.add_argument('--plan')
+    runs.add_argument('--last', type=int, default=20)
+
+    history = commands.add_parser('history', help='One metric of one label across recent runs')
+    history.add_argument('label')
+    history.add_argument('--metric', default='p95', choices=METRICS)
+    history.add_argument('--plan')
+    history.add_argument('--last', type=int, default=50)
+
+    compare = commands.add_parser('compare', help='Check a run against its baseline window')
+    compare.add_argument('run_id', nargs='?', type=int, help='Run id (default: latest)')
+    compare.add_argument('--baseline', type=int, default=DEFAULT_BASELINE_RUNS, help='Baseline window in runs')
+    args = parser.parse_args(argv)
+
+    store = ResultsStore(args.db)
+    if args.command == 'ingest':
+        if os.path.isdir(args.path):
+            ingested = store.ingest_directory(args.path, plan=args.plan)
+            print(f"Ingested {len(ingested)} new result files.")
+        else:
+            run_id, is_new = store.ingest(args.path, plan=args.plan)
+            print(f"{'Ingested' if is_new else 'Already stored'}: run {run_id}")
+    elif args.command == 'runs':
+        for run in store.runs(plan=args.plan, limit=args.last):
+            started = datetime.fromtimestamp(run['started_at'] / 1000).strftime('%Y-%m-%d %H:%M:%S')
+            print(f"{run['id']:>6}  {started}  {run['samples']:>9} samples  {run['plan'] or run['results']}")
+    elif args.command == 'history':
+        for run_id, started_at, value in store.history(args.label, args.metric, args.plan, args.last):
+            started = datetime.fromtimestamp(started_at / 1000).strftime('%Y-%m-%d %H:%M:%S')
+            print(f"{run_id:>6}  {started}  {'-' if value is None else f'{value:.1f}'}")
+    else:
+        report = store.compare(args.run_id, args.baseline)
+        print(format_comparison(report))
+        return 1 if report['regressions'] else 0
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
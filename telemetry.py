@@ -0,0 +1,255 @@
+"""Hot-path instrumentation: span timers, counters and optional profiling
+
+Code records into the process-wide TELEMETRY through span() and count():
+
+    with span('llm.generate'):
+        response = model.generate_content(prompt)
+    count('llm.response_bytes', len(response.text))
+
+Recording costs about a microsecond, so it stays on. A snapshot can be
+appended to a JSON-lines file or served as Prometheus text from a local
+HTTP endpoint; profiled() adds cProfile and tracemalloc capture around a
+block. Print a JSON-lines history with:
+
+    python telemetry.py .typhon/telemetry.jsonl
+"""
+import argparse
+import json
+import os
+import re
+import sys
+import threading
+import time
+from contextlib import contextmanager
+
+DEFAULT_METRICS_HOST = '127.0.0.1'
+METRIC_PREFIX = 'typhon'
+TRACEMALLOC_TOP = 10
+
+
+class SpanStats:
+    """Count, total and extremes of one span's durations, in seconds"""
+
+    __slots__ = ('count', 'total', 'min', 'max')
+
+    def __init__(self):
+        self.count = 0
+        self.total = 0.0
+        self.min = None
+        self.max = 0.0
+
+    def add(self, seconds):
+        self.count += 1
+        self.total += seconds
+        if self.min is None or seconds < self.min:
+            self.min = seconds
+        if seconds > self.max:
+            self.max = seconds
+
+    def to_dict(self):
+        return {
+            'count': self.count,
+            'total_ms': round(self.total * 1000, 3),
+            'mean_ms': round(self.total * 1000 / self.count, 3) if self.count else 0.0,
+            'min_ms': round((self.min or 0.0) * 1000, 3),
+            'max_ms': round(self.max * 1000, 3),
+        }
+
+
+class Telemetry:
+    """Thread-safe registry of span timings, counters and gauges"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.spans = {}
+        self.counters = {}
+        self.gauges = {}
+
+    @contextmanager
+    def span(self, name):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.record(name, time.perf_counter() - start)
+
+    def record(self, name, seconds):
+        with self._lock:
+            stats = self.spans.get(name)
+            if stats is None:
+                stats = self.spans[name] = SpanStats()
+            stats.add(seconds)
+
+    def count(self, name, value=1):
+        with self._lock:
+            self.counters[name] = self.counters.get(name, 0) + value
+
+    def gauge(self, name, value):
+        with self._lock:
+            self.gauges[name] = value
+
+    def reset(self):
+        with self._lock:
+            self.spans.clear()
+            self.counters.clear()
+            self.gauges.clear()
+
+    def snapshot(self):
+        """Plain-dict copy of everything recorded so far"""
+        with self._lock:
+            return {
+                'spans': {name: stats.to_dict() for name, stats in sorted(self.spans.items())},
+                'counters': dict(sorted(self.counters.items())),
+                'gauges': dict(sorted(self.gauges.items())),
+            }
+
+    def write_jsonl(self, path, **fields):
+        """Append one JSON line: timestamp, the given fields and a snapshot"""
+        record = {'timestamp': time.strftime('%Y-%m-%dT%H:%M:%S%z')}
+        record.update(fields)
+        record.update(self.snapshot())
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        with open(path, 'a', encoding='utf-8') as f:
+            f.write(json.dumps(record, sort_keys=True) + '\n')
+        return record
+
+    def prometheus_text(self, prefix=METRIC_PREFIX):
+        """Render the registry in the Prometheus text exposition format"""
+        snapshot = self.snapshot()
+        lines = []
+        if snapshot['spans']:
+            lines.append(f"# HELP {prefix}_span_seconds Time spent in instrumented spans")
+            lines.append(f"# TYPE {prefix}_span_seconds summary")
+            for name, stats in snapshot['spans'].items():
+                lines.append(f'{prefix}_span_seconds_sum{{span="{name}"}} {stats["total_ms"] / 1000:.6f}')
+                lines.append(f'{prefix}_span_seconds_count{{span="{name}"}} {stats["count"]}')
+            lines.append(f"# HELP {prefix}_span_max_seconds Longest single duration of each span")
+            lines.append(f"# TYPE {prefix}_span_max_seconds gauge")
+            for name, stats in snapshot['spans'].items():
+                lines.append(f'{prefix}_span_max_seconds{{span="{name}"}} {stats["max_ms"] / 1000:.6f}')
+        for name, value in snapshot['counters'].items():
+            metric = f"{prefix}_{metric_name(name)}"
+            if not metric.endswith('_total'):
+                metric += '_total'
+            lines.append(f"# TYPE {metric} counter")
+            lines.append(f"{metric} {value}")
+        for name, value in snapshot['gauges'].items():
+            metric = f"{prefix}_{metric_name(name)}"
+            lines.append(f"# TYPE {metric} gauge")
+            lines.append(f"{metric} {value}")
+        return '\n'.join(lines) + '\n'
+
+
+def metric_name(name):
+    """Prometheus-safe form of a dotted counter name"""
+    return re.sub(r'[^a-zA-Z0-9_]', '_', name)
+
+
+TELEMETRY = Telemetry()
+span = TELEMETRY.span
+count = TELEMETRY.count
+gauge = TELEMETRY.gauge
+
+
+def serve_prometheus(port, host=DEFAULT_METRICS_HOST, telemetry=TELEMETRY):
+    """Serve /metrics from a daemon thread; returns the server (call shutdown())"""
+    # Imported here: http.server costs more than the CLI's whole startup budget
+    from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+    class MetricsHandler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            if self.path.split('?', 1)[0] not in ('/', '/metrics'):
+                self.send_error(404)
+                return
+            body = telemetry.prometheus_text().encode('utf-8')
+            self.send_response(200)
+            self.send_header('Content-Type', 'text/plain; version=0.0.4; charset=utf-8')
+            self.send_header('Content-Length', str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, format, *args):
+            pass
+
+    server = ThreadingHTTPServer((host, port), MetricsHandler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, name='metrics', daemon=True).start()
+    return server
+
+
+@contextmanager
+def profiled(profile_path=None, trace_memory=False, telemetry=TELEMETRY):
+    """Optionally run a block under cProfile and/or tracemalloc
+
+    cProfile stats are dumped to profile_path (read them with pstats or
+    snakeviz). With trace_memory, the peak traced heap and the largest
+    allocation sites are recorded as gauges: memory.peak_bytes and
+    memory.top.<file:line> bytes.
+    """
+    profiler = None
+    if profile_path:
+        import cProfile
+        profiler = cProfile.Profile()
+    if trace_memory:
+        import tracemalloc
+        tracemalloc.start()
+    if profiler:
+        profiler.enable()
+    try:
+        yield
+    finally:
+        if profiler:
+            profiler.disable()
+            profiler.dump_stats(profile_path)
+        if trace_memory:
+            # Leave out the profiler's own bookkeeping
+            snapshot = tracemalloc.take_snapshot().filter_traces([
+                tracemalloc.Filter(False, tracemalloc.__file__),
+                tracemalloc.Filter(False, '*/cProfile.py'),
+            ])
+            peak = tracemalloc.get_traced_memory()[1]
+            tracemalloc.stop()
+            telemetry.gauge('memory.peak_bytes', peak)
+            for stat in snapshot.statistics('lineno')[:TRACEMALLOC_TOP]:
+                frame = stat.traceback[0]
+                telemetry.gauge(f"memory.top.{os.path.basename(frame.filename)}:{frame.lineno}", stat.size)
+
+
+def read_jsonl(path):
+    with open(path, encoding='utf-8') as f:
+        return [json.loads(line) for line in f if line.strip()]
+
+
+def format_history(records, span_names=None):
+    """One row per record with the mean of each span in ms"""
+    if not records:
+        return "No telemetry records"
+    if span_names is None:
+        span_names = sorted({name for record in records for name in record.get('spans', {})})
+    header = f"{'Timestamp':<25} {'Commit':<14}" + ''.join(f" {name:>16}" for name in span_names)
+    lines = [header, '-' * len(header)]
+    for record in records:
+        spans = record.get('spans', {})
+        cells = ''.join(f" {spans[name]['mean_ms']:16.3f}" if name in spans else f" {'-':>16}"
+                        for name in span_names)
+        lines.append(f"{record.get('timestamp', ''):<25} {str(record.get('commit', ''))[:14]:<14}{cells}")
+    return '\n'.join(lines)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Show span means from a telemetry JSON-lines file")
+    parser.add_argument('path', help='JSON-lines file written with --telemetry or a benchmark')
+    parser.add_argument('--span', action='append', help='Only show this span (repeatable)')
+    parser.add_argument('--last', type=int, default=20, help='Show the most recent N records')
+    args = parser.parse_args(argv)
+    if not os.path.exists(args.path):
+        print(f"Error: file not found: {args.path}")
+        return 1
+    print(format_history(read_jsonl(args.path)[-args.last:], args.span))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,76 @@
+import os
+
+import performance_test_assistant
+from batch_generator import STUB_SETUP, BatchGenerator
+from response_cache import FakeModel, ResponseCache
+
+
+class ResourceExhausted(Exception):
+    """Named like the SDK's throttling error"""
+
+
+def throttled_responder(failures, error):
+    """Raise `error` on the first `failures` calls, then answer with the stub setup"""
+    calls = []
+
+    def respond(prompt):
+        calls.append(prompt)
+        if len(calls) <= failures:
+            raise error
+        return STUB_SETUP
+    return respond
+
+
+def test_batch_retries_throttled_calls(tmp_path):
+    model = FakeModel(responder=throttled_responder(2, Exception('429 Too Many Requests')))
+    generator = BatchGenerator(model=model, concurrency=2, base_delay=0.001, max_delay=0.01,
+                               output_dir=str(tmp_path))
+    summary = generator.run([{'name': 'orders', 'requirement': 'Load test the orders API'},
+                             {'name': 'search', 'requirement': 'Load test search'}])
+    assert summary['succeeded'] == 2
+    assert summary['retries'] == 2
+    for result in summary['results']:
+        assert os.path.exists(result['file'])
+
+
+def test_batch_gives_up_after_max_retries(tmp_path):
+    model = FakeModel(responder=throttled_responder(10, ResourceExhausted('quota')))
+    generator = BatchGenerator(model=model, concurrency=1, max_retries=2, base_delay=0.001,
+                               max_delay=0.01, output_dir=str(tmp_path))
+    summary = generator.run([{'name': 'orders', 'requirement': 'Load test the orders API'}])
+    assert summary['failed'] == 1
+    assert summary['results'][0]['error'].startswith('ResourceExhausted')
+    assert len(model.calls) == 3
+
+
+def test_batch_does_not_retry_other_errors(tmp_path):
+    model = FakeModel(responder=throttled_responder(1, ValueError('bad prompt')))
+    generator = BatchGenerator(model=model, base_delay=0.001, output_dir=str(tmp_path))
+    summary = generator.run([{'name': 'orders', 'requirement': 'Load test the orders API'}])
+    assert summary['failed'] == 1
+    assert len(model.calls) == 1
+
+
+def test_batch_shares_one_cache_from_environment(tmp_path, monkeypatch):
+    opened = []
+
+    class TrackedCache(ResponseCache):
+        def __init__(self, *args, **kwargs):
+            super().__init__(*args, **kwargs)
+            self.closed = False
+            opened.append(self)
+
+        def close(self):
+            self.closed = True
+            super().close()
+
+    monkeypatch.setattr(performance_test_assistant, 'ResponseCache', TrackedCache)
+    monkeypatch.setenv('TYPHON_CACHE_PATH', str(tmp_path / 'cache.sqlite3'))
+    model = FakeModel(STUB_SETUP)
+    items = [{'name': f"item{i}", 'requirement': 'Load test the orders API'} for i in range(4)]
+    summary = BatchGenerator(model=model, concurrency=2, output_dir=str(tmp_path)).run(items)
+    assert summary['succeeded'] == 4
+    assert len(opened) == 1
+    assert opened[0].closed
+    # The repeated requirement is answered from the shared cache
+    assert len(model.calls) == 1
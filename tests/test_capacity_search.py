@@ -0,0 +1,168 @@
+import copy
+import json
+import os
+import shlex
+import sys
+
+import pytest
+
+import capacity_search
+from capacity_search import SLO, CapacitySearch, PlanCache, _distribute, scale_plan, slo_from_csv
+from jmx_model import JMXDocument, throughput_props
+from jmx_templates import render_plan
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..')
+FAKE_JMETER = [sys.executable, os.path.join(ROOT, 'fake_jmeter.py')]
+
+
+def write_plan(path, threads=(30, 10), throughput=None, csv_file=None):
+    """A plan with one thread group per entry in `threads`"""
+    spec = {'test_type': 'load', 'name': 'Capacity', 'threads': threads[0], 'ramp_up': 5, 'duration': 60,
+            'url': 'https://example.com/', 'throughput': throughput, 'csv_file': csv_file}
+    document = JMXDocument.parse(render_plan(spec, use_plugins=False))
+    group = document.thread_groups()[0]
+    tree = document.test_plan.hash_tree
+    for count in threads[1:]:
+        element, hash_tree = copy.deepcopy(group.element), copy.deepcopy(group.hash_tree)
+        tree.append(element)
+        tree.append(hash_tree)
+        element.find("*[@name='ThreadGroup.num_threads']").text = str(count)
+    document.save(str(path))
+    return str(path)
+
+
+def group_threads(path):
+    return [int(group.num_threads) for group in JMXDocument.load(path).thread_groups()]
+
+
+@pytest.mark.parametrize('total, weights, expected', [
+    (100, [30, 10], [75, 25]),
+    (10, [1, 1, 1], [4, 3, 3]),
+    (7, [2, 0, 5], [2, 0, 5]),
+    (5, [0, 0], [0, 0]),
+])
+def test_distribute_keeps_the_total(total, weights, expected):
+    assert _distribute(total, weights) == expected
+
+
+def test_scale_plan_splits_threads_and_throughput(tmp_path):
+    (tmp_path / 'users.csv').write_text('user\nalice\n')
+    plan = write_plan(tmp_path / 'base.jmx', throughput=600.0, csv_file='users.csv')
+    output = str(tmp_path / 'scaled.jmx')
+    assert scale_plan(plan, 100, output, duration=30, ramp_up=3) == 100
+
+    document = JMXDocument.load(output)
+    assert group_threads(output) == [75, 25]
+    for group in document.thread_groups():
+        assert group.get_prop('ThreadGroup.scheduler') == 'true'
+        assert group.get_prop('ThreadGroup.duration') == '30'
+        assert group.get_prop('ThreadGroup.ramp_time') == '3'
+    timers = [element for element in document.elements() if element.testclass == 'ConstantThroughputTimer']
+    # Shared throughput targets grow with the thread count (40 -> 100 threads)
+    assert [float(prop.text) for timer in timers for prop in throughput_props(timer.element)] == [1500.0, 1500.0]
+    data_sets = [element for element in document.elements() if element.testclass == 'CSVDataSet']
+    assert {element.get_prop('filename') for element in data_sets} == {str(tmp_path / 'users.csv')}
+
+
+def test_plan_cache_key_follows_content_location_and_overrides(tmp_path):
+    plan = write_plan(tmp_path / 'base.jmx')
+    os.makedirs(tmp_path / 'copy')
+    moved = write_plan(tmp_path / 'copy' / 'base.jmx')
+    cache_dir = str(tmp_path / 'cache')
+
+    key = PlanCache(plan, cache_dir, duration=30, ramp_up=3).key
+    assert PlanCache(plan, cache_dir, duration=30, ramp_up=3).key == key
+    assert PlanCache(plan, cache_dir, duration=60, ramp_up=3).key != key
+    assert PlanCache(plan, cache_dir, duration=30, ramp_up=0).key != key
+    # Relative CSV paths resolve against the plan's directory
+    assert PlanCache(moved, cache_dir, duration=30, ramp_up=3).key != key
+    write_plan(tmp_path / 'base.jmx', threads=(30, 20))
+    assert PlanCache(plan, cache_dir, duration=30, ramp_up=3).key != key
+
+
+def test_plan_cache_reuses_written_variants(tmp_path):
+    plan = write_plan(tmp_path / 'base.jmx')
+    cache = PlanCache(plan, str(tmp_path / 'cache'))
+    path = cache.get(20)
+    assert cache.get(20) == path
+    assert (cache.hits, cache.misses) == (1, 1)
+    assert group_threads(path) == [15, 5]
+    assert not [name for name in os.listdir(tmp_path / 'cache') if name.endswith('.part')]
+
+
+def test_slo_from_csv_takes_the_strictest_threshold(tmp_path):
+    path = tmp_path / 'test-data.csv'
+    path.write_text('username,password,expected_response_time\nu1,p1,1500\nu2,p2,\nu3,p3,800\n')
+    assert slo_from_csv(str(path)) == 800
+    path.write_text('username,password\nu1,p1\n')
+    assert slo_from_csv(str(path)) is None
+    assert slo_from_csv(str(tmp_path / 'missing.csv')) is None
+    assert slo_from_csv(os.path.join(ROOT, capacity_search.DEFAULT_DATA_CSV)) == 2000
+
+
+def test_slo_breaches():
+    slo = SLO(p95_ms=200, max_error_rate=0.01)
+    assert slo.breaches({'p95': 150, 'error_rate': 0.0}) == []
+    assert slo.breaches({'p95': 250, 'error_rate': 0.02}) == ['p95 250 ms > 200 ms', 'errors 2.00% > 1.00%']
+
+
+class ThresholdSearch(CapacitySearch):
+    """CapacitySearch whose levels pass up to `limit` threads without running anything"""
+
+    def __init__(self, limit, **kwargs):
+        super().__init__('plan.jmx', SLO(), output_dir='unused', plan_cache=object(), **kwargs)
+        self.limit = limit
+        self.order = []
+
+    def run_level(self, threads, on_update=None):
+        if threads not in self.steps:
+            self.order.append(threads)
+            self.steps[threads] = {'threads': threads, 'passed': threads <= self.limit}
+        return self.steps[threads]
+
+
+def test_search_grows_then_bisects():
+    search = ThresholdSearch(137, start=10, growth=2, precision=0.05)
+    assert search.run()['threads'] == 135
+    assert search.order == [10, 20, 40, 80, 160, 120, 140, 130, 135]
+
+
+def test_search_bisects_below_a_failing_first_level():
+    search = ThresholdSearch(3, start=10)
+    assert search.run()['threads'] == 3
+    assert search.order == [10, 5, 2, 3, 4]
+
+
+def test_search_returns_none_when_one_thread_fails():
+    search = ThresholdSearch(0, start=10)
+    assert search.run() is None
+    assert search.order == [10, 5, 2, 1]
+
+
+def test_search_stops_at_max_threads():
+    search = ThresholdSearch(1000, start=10, max_threads=50)
+    assert search.run()['threads'] == 50
+    assert search.order == [10, 20, 40, 50]
+
+
+def test_search_against_fake_jmeter(tmp_path, monkeypatch, capsys):
+    # p95 is about 116 ms at 80 threads, 164 ms at 100 and 252 ms at 120
+    monkeypatch.setenv('FAKE_JMETER_DURATION', '1')
+    monkeypatch.setenv('FAKE_JMETER_CAPACITY', '100')
+    monkeypatch.setenv('FAKE_JMETER_LATENCY', '50')
+    monkeypatch.chdir(tmp_path)
+    plan = write_plan(tmp_path / 'base.jmx', threads=(5,))
+    data = tmp_path / 'test-data.csv'
+    data.write_text('username,password,expected_response_time\nu1,p1,300\nu2,p2,200\n')
+
+    code = capacity_search.main(['--plan', plan, '--data-csv', str(data), '--jmeter', shlex.join(FAKE_JMETER),
+                                 '--start', '40', '--precision', '0.25', '--duration', '1', '--ramp-up', '0',
+                                 '--output-dir', str(tmp_path / 'out'), '--json'])
+    report = json.loads(capsys.readouterr().out)
+    assert code == 0
+    assert report['slo']['p95_ms'] == 200
+    assert [step['threads'] for step in report['steps']] == [40, 80, 100, 120, 160]
+    assert [step['passed'] for step in report['steps']] == [True, True, True, False, False]
+    assert report['max_sustainable_threads'] == 100
+    assert all(step['row']['samples'] for step in report['steps'])
+    assert len(os.listdir(tmp_path / '.typhon' / 'plans')) == 5
@@ -0,0 +1,36 @@
+from conversation_context import ConversationContext, estimate_tokens
+
+SETUP_REPLY = """TEST TYPE: Load Test
+TEST PARAMETERS:
+- Users/Threads: 100
+- Ramp-up Period: 30
+REQUIRED INFORMATION:
+- Target URL: https://example.com/"""
+
+
+def test_window_uses_the_whole_budget_before_any_eviction():
+    requirement = 'r' * 400
+    context = ConversationContext(token_budget=400)
+    context.add('user', requirement)
+    context.add('assistant', SETUP_REPLY)
+    context.add('user', 'u' * 400)
+    context.add('assistant', 'a' * 400)
+    # Requirement and setup are not sent yet, so they must not crowd out the window
+    assert context.evicted_messages == 0
+    assert context.prompt_prefix() == context._window_text.rstrip('\n')
+    assert estimate_tokens(context.prompt_prefix()) <= 400
+
+
+def test_prompt_stays_within_budget_once_the_summary_is_sent():
+    context = ConversationContext(token_budget=300)
+    context.add('user', 'Load test the checkout API ' * 10)
+    context.add('assistant', SETUP_REPLY)
+    for turn in range(10):
+        context.add('user', f"Change number {turn}: " + 'x' * 200)
+        context.add('assistant', SETUP_REPLY + '\n' + 'y' * 200)
+        prefix = context.prompt_prefix()
+        if context.evicted_messages and len(context.messages) > 2:
+            assert estimate_tokens(prefix) <= 300
+    assert context.evicted_messages
+    assert 'Original requirement:' in context.prompt_prefix()
+    assert 'Current test setup:' in context.prompt_prefix()
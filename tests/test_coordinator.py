@@ -0,0 +1,82 @@
+import csv
+import os
+import sys
+
+import pytest
+
+from coordinator import Coordinator, merge_jtl, split_plan
+from jmx_templates import render_plan
+from jtl_analyzer import DEFAULT_CSV_COLUMNS
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..')
+FAKE_JMETER = [sys.executable, os.path.join(ROOT, 'fake_jmeter.py')]
+
+CSV_DATA_SET = """        <CSVDataSet guiclass="TestBeanGUI" testclass="CSVDataSet" testname="{name}" enabled="true">
+          <stringProp name="filename">{filename}</stringProp>
+          <stringProp name="variableNames">user</stringProp>
+        </CSVDataSet>
+        <hashTree/>
+"""
+
+
+def write_jtl(path, timestamps, header=True):
+    with open(path, 'w', newline='', encoding='utf-8') as f:
+        writer = csv.writer(f, lineterminator='\n')
+        if header:
+            writer.writerow(DEFAULT_CSV_COLUMNS)
+        for timestamp in timestamps:
+            writer.writerow([timestamp, 100, 'Home', 200, 'OK', 'Thread Group 1-1', 'text', 'true', '',
+                             1024, 128, 1, 1, 'https://example.com/', 50, 0, 1])
+
+
+def read_timestamps(path):
+    with open(path, newline='', encoding='utf-8') as f:
+        rows = list(csv.reader(f))
+    return [int(row[0]) for row in rows[1:]]
+
+
+@pytest.mark.parametrize('run_rows', [2, 3, 1000])
+def test_merge_jtl_orders_unsorted_inputs(tmp_path, run_rows):
+    # Rows land in completion order, so start timestamps are out of order within a file
+    first = [1005, 1000, 1010, 1003, 1020, 1001, 1015]
+    second = [1002, 1012, 1004, 999, 1030]
+    write_jtl(tmp_path / 'a.jtl', first)
+    write_jtl(tmp_path / 'b.jtl', second, header=False)
+    output = str(tmp_path / 'merged.jtl')
+    written = merge_jtl([str(tmp_path / 'a.jtl'), str(tmp_path / 'b.jtl')], output, run_rows=run_rows)
+    assert written == len(first) + len(second)
+    assert read_timestamps(output) == sorted(first + second)
+
+
+def test_split_plan_keeps_same_named_csv_files_apart(tmp_path):
+    for directory, users in (('east', ['alice', 'bob']), ('west', ['carol', 'dave'])):
+        os.makedirs(tmp_path / directory)
+        (tmp_path / directory / 'users.csv').write_text('\n'.join(users) + '\n')
+    plan = render_plan({'test_type': 'load', 'name': 'Split', 'threads': 4, 'ramp_up': 1, 'duration': 10,
+                        'url': 'https://example.com/'}, use_plugins=False)
+    data_sets = ''.join(CSV_DATA_SET.format(name=name, filename=f"{name}/users.csv") for name in ('east', 'west'))
+    plan = plan.replace('<HTTPSamplerProxy ', data_sets.lstrip() + '        <HTTPSamplerProxy ', 1)
+    plan_path = tmp_path / 'plan.jmx'
+    plan_path.write_text(plan, encoding='utf-8')
+
+    node_plans, _ = split_plan(str(plan_path), 2, str(tmp_path / 'out'))
+    for node in node_plans:
+        east, west = node.data_files['east/users.csv'], node.data_files['west/users.csv']
+        assert east != west
+        with open(east) as f:
+            assert f.read().strip() in ('alice', 'bob')
+        with open(west) as f:
+            assert f.read().strip() in ('carol', 'dave')
+
+
+def test_started_nodes_stop_when_a_later_node_fails(tmp_path, monkeypatch):
+    monkeypatch.setenv('FAKE_JMETER_DURATION', '30')
+    plan = render_plan({'test_type': 'load', 'name': 'Nodes', 'threads': 4, 'ramp_up': 1, 'duration': 30,
+                        'url': 'https://example.com/'}, use_plugins=False)
+    plan_path = tmp_path / 'plan.jmx'
+    plan_path.write_text(plan, encoding='utf-8')
+    coordinator = Coordinator(str(plan_path), nodes=[FAKE_JMETER, [str(tmp_path / 'no-such-jmeter')]],
+                              output_dir=str(tmp_path / 'out'))
+    with pytest.raises(FileNotFoundError):
+        coordinator.run()
+    assert coordinator.runners[0].process.poll() is not None
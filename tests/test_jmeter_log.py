@@ -0,0 +1,37 @@
+import os
+
+from jmeter_log import analyze_log
+from telemetry import TELEMETRY
+
+SAMPLE_LOG = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'jmeter-tests', 'test-plans',
+                          'jmeter.log')
+
+
+def test_parsing_and_analysis_are_recorded():
+    TELEMETRY.reset()
+    analyzer = analyze_log(SAMPLE_LOG)
+    runs = analyzer.summary()
+    assert runs
+    assert TELEMETRY.counters['log.bytes'] == os.path.getsize(SAMPLE_LOG)
+    assert TELEMETRY.counters['log.lines'] == analyzer.lines
+    assert TELEMETRY.spans['log.parse'].count == 1
+    assert TELEMETRY.spans['log.analyze'].count == 1
+
+
+def test_log_starting_mid_run_measures_from_its_first_event(tmp_path):
+    lines = [
+        '2025-05-19 14:30:20,000 INFO o.a.j.t.JMeterThread: Thread finished: Users 1-1',
+        '2025-05-19 14:30:21,500 INFO o.a.j.t.JMeterThread: Thread started: Users 1-3',
+        '2025-05-19 14:30:21,500 INFO o.a.j.t.JMeterThread: Thread started: Users 1-4',
+        '2025-05-19 14:30:22,000 INFO o.a.j.t.JMeterThread: Thread finished: Users 1-3',
+        '2025-05-19 14:30:23,000 INFO o.a.j.e.StandardJMeterEngine: Notifying test listeners of end of test',
+    ]
+    path = tmp_path / 'jmeter.log'
+    path.write_text('\n'.join(lines) + '\n')
+    (run,) = analyze_log(str(path)).summary()
+    assert run['started_at'] == '2025-05-19 14:30:20,000'
+    assert run['duration_ms'] == 3000
+    (group,) = run['groups']
+    assert (group['started'], group['finished']) == (2, 2)
+    assert group['last_finish_ms'] == 2000
+    assert group['mean_lifetime_ms'] == 500
@@ -0,0 +1,90 @@
+import os
+import signal
+import sys
+
+import pytest
+
+from jmeter_runner import JMeterRunner, JTLTailer
+from jmx_templates import render_plan
+from jtl_analyzer import DEFAULT_CSV_COLUMNS
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..')
+FAKE_JMETER = [sys.executable, os.path.join(ROOT, 'fake_jmeter.py')]
+
+HEADER = ','.join(DEFAULT_CSV_COLUMNS) + '\n'
+
+
+def row(timestamp, label):
+    return (f"{timestamp},120,{label},200,OK,Thread Group 1-1,text,true,,1024,128,1,1,"
+            f"https://example.com/,60,0,1\n")
+
+
+def test_tailer_keeps_partial_lines_until_complete(tmp_path):
+    path = tmp_path / 'results.jtl'
+    path.write_text('')
+    tailer = JTLTailer(str(path))
+    line = row(1000, '"Login, with comma"')
+    with open(path, 'a', newline='') as f:
+        f.write(HEADER + row(999, 'Home') + line[:20])
+        f.flush()
+        assert [sample.label for sample in tailer.poll()] == ['Home']
+        f.write(line[20:-1])
+        f.flush()
+        assert tailer.poll() == []
+        f.write('\n')
+        f.flush()
+        samples = tailer.poll()
+    assert [sample.label for sample in samples] == ['Login, with comma']
+    assert samples[0].timestamp == 1000
+
+
+def test_tailer_keeps_rows_with_multi_line_quoted_fields(tmp_path):
+    path = tmp_path / 'results.jtl'
+    path.write_text('')
+    tailer = JTLTailer(str(path))
+    failed = (f'1000,120,Login,500,Error,Thread Group 1-1,text,false,"Expected 200\nbut got ""500""",'
+              f'1024,128,1,1,https://example.com/,60,0,1\n')
+    cut = failed.index('\n') + 1
+    with open(path, 'a', newline='') as f:
+        f.write(HEADER + failed[:cut])
+        f.flush()
+        assert tailer.poll() == []
+        f.write(failed[cut:] + row(1001, 'Home'))
+        f.flush()
+        samples = tailer.poll()
+    assert [sample.label for sample in samples] == ['Login', 'Home']
+    assert not samples[0].success and samples[0].response_code == '500'
+
+
+def test_tailer_skips_rows_written_before_it_started(tmp_path):
+    path = tmp_path / 'results.jtl'
+    path.write_text(HEADER + row(1, 'Old'))
+    tailer = JTLTailer(str(path))
+    with open(path, 'a', newline='') as f:
+        f.write(row(2, 'New'))
+    assert [sample.label for sample in tailer.poll()] == ['New']
+
+
+@pytest.mark.skipif(os.name == 'nt', reason='SIGINT to the own process is POSIX only')
+def test_runner_stops_on_sigint(tmp_path, monkeypatch):
+    monkeypatch.setenv('FAKE_JMETER_DURATION', '30')
+    plan = render_plan({'test_type': 'load', 'name': 'Fake', 'threads': 5, 'ramp_up': 1, 'duration': 30,
+                        'url': 'https://example.com/search?q=a,b'}, use_plugins=False)
+    plan_path = tmp_path / 'plan.jmx'
+    plan_path.write_text(plan, encoding='utf-8')
+    runner = JMeterRunner(str(plan_path), str(tmp_path / 'results.jtl'), jmeter=FAKE_JMETER, interval=0.1)
+    assert runner.tailer is None
+    updates = []
+
+    def on_update(elapsed, snapshot):
+        updates.append(elapsed)
+        if len(updates) == 5:
+            os.kill(os.getpid(), signal.SIGINT)
+
+    analyzer = runner.run(on_update)
+    assert runner.stopped
+    assert runner.returncode == 0
+    assert max(updates) < 10
+    assert analyzer.total.count > 0
+    # The comma in the label survives the round trip through the CSV
+    assert set(analyzer.labels) == {'GET /search?q=a,b'}
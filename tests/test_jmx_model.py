@@ -0,0 +1,119 @@
+import xml.etree.ElementTree as ET
+
+from jmx_model import JMXDocument, SanitizeReport, sanitize_children, sanitize_jmx
+
+PLAN = """<?xml version="1.0" encoding="UTF-8"?>
+<jmeterTestPlan version="1.2" properties="5.0" jmeter="5.6.3">
+  <hashTree>
+    <TestPlan guiclass="TestPlanGui" testclass="TestPlan" testname="Plan" enabled="true"/>
+    <hashTree>
+      <ThreadGroup guiclass="ThreadGroupGui" testclass="ThreadGroup" testname="Users" enabled="true">
+        <stringProp name="ThreadGroup.num_threads">5</stringProp>
+        <stringProp name="ThreadGroup.ramp_time">1</stringProp>
+      </ThreadGroup>
+      <hashTree>
+{children}      </hashTree>
+    </hashTree>
+  </hashTree>
+</jmeterTestPlan>
+"""
+
+SAMPLER = """        <HTTPSamplerProxy guiclass="HttpTestSampleGui" testclass="HTTPSamplerProxy" testname="{name}" enabled="true"/>
+        <hashTree>
+          <ConstantTimer guiclass="ConstantTimerGui" testclass="ConstantTimer" testname="{name} timer" enabled="true"/>
+          <hashTree/>
+        </hashTree>
+"""
+
+DEBUG_SAMPLER = """        <DebugSampler guiclass="TestBeanGUI" testclass="DebugSampler" testname="{name}" enabled="true"/>
+        <hashTree>
+          <ConstantTimer guiclass="ConstantTimerGui" testclass="ConstantTimer" testname="{name} timer" enabled="true"/>
+          <hashTree/>
+        </hashTree>
+"""
+
+COLLECTOR = """        <ResultCollector guiclass="SummaryReport" testclass="ResultCollector" testname="Summary" enabled="true">
+          <objProp>
+            <name>saveConfig</name>
+            <value class="SampleSaveConfiguration">
+              <time>true</time>
+              <sampleCount>true</sampleCount>
+              <hostname>true</hostname>
+              <assertions>true</assertions>
+              <threadName>true</threadName>
+            </value>
+          </objProp>
+          <objProp>
+            <name>otherConfig</name>
+            <value class="CustomConfiguration">
+              <hostname>true</hostname>
+              <sampleCount>true</sampleCount>
+            </value>
+          </objProp>
+          <collectionProp name="notes">
+            <hostname>kept</hostname>
+          </collectionProp>
+        </ResultCollector>
+        <hashTree/>
+"""
+
+
+def sanitize(children):
+    document = JMXDocument.parse(PLAN.format(children=children))
+    report = document.sanitize(warn=False)
+    return document, report
+
+
+def names(document):
+    return [element.name for element in document.elements()]
+
+
+def test_save_fields_are_removed_only_from_sample_save_configuration():
+    document, report = sanitize(COLLECTOR)
+    collector = document.root.find('.//ResultCollector')
+    save_config = collector.find("objProp/value[@class='SampleSaveConfiguration']")
+    assert [child.tag for child in save_config] == ['time', 'threadName']
+    other = collector.find("objProp/value[@class='CustomConfiguration']")
+    assert [child.tag for child in other] == ['hostname', 'sampleCount']
+    assert collector.findtext("collectionProp/hostname") == 'kept'
+    assert report.removed_fields == 3
+    assert report.removed_elements == {}
+
+
+def test_incompatible_elements_are_removed_with_their_hash_tree():
+    children = (SAMPLER.format(name='first') + DEBUG_SAMPLER.format(name='debug')
+                + DEBUG_SAMPLER.format(name='debug again') + SAMPLER.format(name='last'))
+    document, report = sanitize(children)
+    assert names(document) == ['Plan', 'Users', 'first', 'first timer', 'last', 'last timer']
+    tree = document.thread_groups()[0].hash_tree
+    assert [child.tag for child in tree] == ['HTTPSamplerProxy', 'hashTree', 'HTTPSamplerProxy', 'hashTree']
+    assert report.removed_elements == {'DebugSampler': 2}
+    assert report.valid
+
+
+def test_incompatible_element_without_hash_tree_leaves_the_next_sibling():
+    parent = ET.fromstring('<hashTree><GraphVisualizer/><HTTPSamplerProxy/><hashTree><ConstantTimer/></hashTree>'
+                           '<DebugSampler/></hashTree>')
+    report = SanitizeReport()
+    sanitize_children(parent, report)
+    assert [child.tag for child in parent] == ['HTTPSamplerProxy', 'hashTree']
+    assert parent.find('hashTree/ConstantTimer') is not None
+    assert report.removed_elements == {'GraphVisualizer': 1, 'DebugSampler': 1}
+
+
+def test_incompatible_tags_outside_a_hash_tree_are_kept():
+    parent = ET.fromstring('<hashTree><HTTPSamplerProxy><collectionProp><DebugSampler/></collectionProp>'
+                           '</HTTPSamplerProxy><hashTree/></hashTree>')
+    report = SanitizeReport()
+    sanitize_children(parent, report)
+    assert parent.find('HTTPSamplerProxy/collectionProp/DebugSampler') is not None
+    assert report.removed_elements == {}
+
+
+def test_sanitize_jmx_rejects_plans_without_a_usable_thread_group():
+    content, report = sanitize_jmx(PLAN.format(children='').replace('ThreadGroup.ramp_time', 'other'), warn=False)
+    assert content is None
+    assert report.problems == ["no ThreadGroup defines num_threads and ramp_time"]
+    content, report = sanitize_jmx(PLAN.format(children=DEBUG_SAMPLER.format(name='debug')), warn=False)
+    assert 'DebugSampler' not in content
+    assert report.valid
@@ -0,0 +1,27 @@
+import io
+import xml.etree.ElementTree as ET
+
+import pytest
+
+from jmx_stream import StreamingJMXWriter, quote_attribute
+
+
+@pytest.mark.parametrize('value', ['plain', 'a "quoted" name', "it's", 'a & b < c > d',
+                                   'line one\nline two', 'tab\there', 'cr\rlf\r\n', 'ünïcode'])
+def test_quoted_attribute_round_trips(value):
+    element = ET.fromstring(f'<e name={quote_attribute(value)}/>')
+    assert element.get('name') == value
+
+
+def test_stream_keeps_container_attributes():
+    plan = ('<jmeterTestPlan version="1.2" properties="5.0">'
+            '<hashTree><TestPlan testname="Orders &quot;v2&quot;&#10;&amp; more" enabled="true"/>'
+            '<hashTree/></hashTree></jmeterTestPlan>')
+    out = io.StringIO()
+    writer = StreamingJMXWriter(out)
+    for i in range(0, len(plan), 7):
+        writer.feed(plan[i:i + 7])
+    writer.close(warn=False)
+    root = ET.fromstring(out.getvalue())
+    assert root.get('properties') == '5.0'
+    assert root.find('hashTree/TestPlan').get('testname') == 'Orders "v2"\n& more'
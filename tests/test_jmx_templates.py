@@ -0,0 +1,59 @@
+import pytest
+
+from jmx_model import JMXDocument
+from jmx_templates import detect_test_type, parse_seconds, render_from_setup, render_plan
+
+SETUP = """TEST TYPE: Load Test "checkout" <peak> & more
+TEST PARAMETERS:
+- Number of Users: 50
+- Ramp-up Period: 30 seconds
+- Test Duration: 10 minutes (600 seconds)
+REQUIRED INFORMATION:
+- Target URL: https://api.example.com/orders?a=1&b="2\""""
+
+
+def test_quotes_in_names_render_well_formed_xml():
+    plan = render_from_setup(SETUP, use_plugins=False)
+    document = JMXDocument.parse(plan)
+    assert document.test_plan.name == 'Load Test "checkout" <peak> & more'
+    assert document.thread_groups()[0].name == 'Load Test "checkout" <peak> & more'
+
+
+def test_render_plan_escapes_url_parts():
+    spec = {'test_type': 'load', 'threads': 5, 'ramp_up': 0, 'duration': 60,
+            'url': 'https://api.example.com/search?q="x"&page=1', 'method': 'GET'}
+    JMXDocument.parse(render_plan(spec, use_plugins=False))
+
+
+def test_parse_seconds_uses_first_expression_only():
+    assert parse_seconds('10 minutes (600 seconds)') == 600
+    assert parse_seconds('1h 30m') == 5400
+    assert parse_seconds('1 hour and 30 minutes') == 5400
+    assert parse_seconds('30s') == 30
+    assert parse_seconds('300') == 300
+    assert parse_seconds('about 5 min or 300 seconds') == 300
+    assert parse_seconds('none') is None
+
+
+def test_detect_test_type_prefers_the_named_type_over_the_description():
+    assert detect_test_type('Stress Test - find the breaking point under increasing load') == 'stress'
+    assert detect_test_type('Spike Test: sudden bursts of load') == 'spike'
+    assert detect_test_type('Endurance Test - sustained load over 8 hours') == 'endurance'
+    assert detect_test_type('Soak test with normal load for 12 hours') == 'endurance'
+    assert detect_test_type('Load Test - verify behaviour before the stress test') == 'load'
+    assert detect_test_type('Checkout - scalability of the cart') == 'scalability'
+    assert detect_test_type('Smoke check') is None
+
+
+@pytest.mark.parametrize('heading, testclass', [
+    ('Load Test - expected peak traffic', 'ThreadGroup'),
+    ('Stress Test - find the breaking point under increasing load', 'kg.apc.jmeter.threads.SteppingThreadGroup'),
+    ('Spike Test - sudden bursts of load', 'kg.apc.jmeter.threads.UltimateThreadGroup'),
+    ('Endurance Test - sustained load over 8 hours', 'ThreadGroup'),
+    ('Soak Test - normal load held overnight', 'ThreadGroup'),
+    ('Scalability Test - add load in steps', 'kg.apc.jmeter.threads.SteppingThreadGroup'),
+])
+def test_each_test_type_renders_its_thread_group(heading, testclass):
+    setup = SETUP.replace('Load Test "checkout" <peak> & more', heading)
+    document = JMXDocument.parse(render_from_setup(setup, use_plugins=True))
+    assert [group.testclass for group in document.thread_groups()] == [testclass]
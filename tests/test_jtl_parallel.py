@@ -0,0 +1,64 @@
+import mmap
+
+import pytest
+
+import jtl_analyzer
+from telemetry import TELEMETRY
+from jtl_analyzer import (DEFAULT_CSV_COLUMNS, JTLAnalyzer, _analyze_csv_range, _read_csv_header,
+                          _split_at_lines, analyze_jtl, analyze_jtl_parallel_aggregate)
+
+LABELS = ['Home', 'Login, with comma', 'Search "quoted"', 'Checkout']
+
+
+def write_jtl(path, rows=400, header=True):
+    """CSV JTL mixing quoted commas, escaped quotes and multi-line failure messages"""
+    with open(path, 'w', newline='', encoding='utf-8') as f:
+        if header:
+            f.write(','.join(DEFAULT_CSV_COLUMNS) + '\n')
+        for i in range(rows):
+            label = LABELS[i % len(LABELS)]
+            quoted = '"' + label.replace('"', '""') + '"' if (',' in label or '"' in label) else label
+            success = i % 7 != 0
+            message = '' if success else ['"line one\nline two"', '"carriage\rreturn"', '"sep\x1cand "'][i % 3]
+            f.write(f"{1747657823000 + i * 37},{100 + (i * 13) % 900},{quoted},{200 if success else 500},"
+                    f"OK,Thread Group 1-{i % 10},text,{'true' if success else 'false'},{message},"
+                    f"{1000 + i},120,10,10,https://example.com/,{50 + i % 40},0,{i % 5}\n")
+
+
+@pytest.mark.parametrize('header', [True, False])
+@pytest.mark.parametrize('workers', [2, 3, 5, 8])
+def test_parallel_matches_serial(tmp_path, header, workers):
+    path = str(tmp_path / 'results.jtl')
+    write_jtl(path, header=header)
+    serial = analyze_jtl(path)
+    assert sum(row['samples'] for row in serial[:-1]) == 400
+    assert analyze_jtl_parallel_aggregate(path, workers).summary() == serial
+
+
+@pytest.mark.parametrize('parts', [2, 4, 16, 64])
+def test_ranges_and_blocks_end_on_record_boundaries(tmp_path, monkeypatch, parts):
+    path = str(tmp_path / 'results.jtl')
+    write_jtl(path)
+    # Force many small blocks inside each range as well
+    monkeypatch.setattr(jtl_analyzer, 'PARALLEL_BLOCK_SIZE', 512)
+    with open(path, 'rb') as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+        columns, start = _read_csv_header(mm)
+        ranges = _split_at_lines(mm, start, len(mm), parts)
+    merged = JTLAnalyzer()
+    for range_start, range_end in ranges:
+        merged.merge(_analyze_csv_range(path, columns, range_start, range_end))
+    assert merged.summary() == analyze_jtl(path)
+
+
+def test_parsing_and_merging_are_recorded(tmp_path):
+    path = str(tmp_path / 'results.jtl')
+    write_jtl(path)
+    TELEMETRY.reset()
+    analyze_jtl(path)
+    assert TELEMETRY.counters['jtl.samples'] == 400
+    assert TELEMETRY.spans['jtl.parse'].count == 1
+    assert TELEMETRY.spans['jtl.summary'].count == 1
+    TELEMETRY.reset()
+    analyze_jtl_parallel_aggregate(path, 2)
+    assert TELEMETRY.counters['jtl.samples'] == 400
+    assert {'jtl.split', 'jtl.parse', 'jtl.merge'} <= set(TELEMETRY.spans)
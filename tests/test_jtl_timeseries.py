@@ -0,0 +1,137 @@
+import os
+
+import pytest
+
+np = pytest.importorskip('numpy')
+
+import jtl_timeseries
+from jtl_analyzer import DEFAULT_CSV_COLUMNS
+from jtl_timeseries import apdex, concurrency_curve, find_knee, load_columns, per_second, window_percentiles
+
+BASE = 1_700_000_000_000
+
+
+def write_jtl(path, samples):
+    """samples: (end second, offset ms, elapsed, label, success, all threads)"""
+    with open(path, 'w', newline='', encoding='utf-8') as f:
+        f.write(','.join(DEFAULT_CSV_COLUMNS) + '\n')
+        for second, offset, elapsed, label, success, threads in samples:
+            timestamp = BASE + second * 1000 + offset - elapsed
+            f.write(f"{timestamp},{elapsed},{label},{200 if success else 500},OK,Users 1-1,text,"
+                    f"{'true' if success else 'false'},,1000,100,{threads},{threads},https://example.com/,"
+                    f"{elapsed // 2},0,{elapsed // 10}\n")
+
+
+def columns_for(tmp_path, samples):
+    path = str(tmp_path / 'run.jtl')
+    write_jtl(path, samples)
+    return load_columns(path)
+
+
+def test_apdex_splits_satisfied_tolerating_and_frustrated(tmp_path):
+    columns = columns_for(tmp_path, [
+        (0, 0, 50, 'A', True, 1),
+        (0, 1, 100, 'A', True, 1),
+        (1, 0, 150, 'A', True, 1),
+        (1, 1, 400, 'B', True, 1),
+        (1, 2, 401, 'B', True, 1),
+        (1, 3, 50, 'B', False, 1),
+    ])
+    scores = apdex(columns, threshold_ms=100)
+    assert (scores['satisfied'], scores['tolerating'], scores['frustrated']) == (2, 2, 2)
+    assert scores['score'] == pytest.approx(3 / 6)
+    assert scores['labels'] == pytest.approx({'A': 2.5 / 3, 'B': 0.5 / 3})
+    assert list(scores['per_second']) == pytest.approx([1.0, 1 / 4])
+
+
+def test_window_percentiles_slide_over_seconds(tmp_path):
+    samples = [(0, i, 100, 'A', True, 1) for i in range(10)] + [(1, i, 1000, 'A', True, 1) for i in range(10)]
+    columns = columns_for(tmp_path, samples)
+
+    single = window_percentiles(columns, window=1, percentiles=(50, 95))
+    assert single['step'] == 1
+    assert list(single['second']) == [BASE // 1000, BASE // 1000 + 1]
+    assert list(single['samples']) == [10, 10]
+    assert list(single['p50']) == pytest.approx([100, 1000], rel=0.005)
+
+    sliding = window_percentiles(columns, window=2, percentiles=(50, 95))
+    assert list(sliding['samples']) == [10, 20]
+    assert sliding['p50'][1] == pytest.approx(100, rel=0.005)
+    assert sliding['p95'][1] == pytest.approx(1000, rel=0.005)
+
+
+def test_per_second_counts_errors_and_peak_threads(tmp_path):
+    columns = columns_for(tmp_path, [(0, 0, 10, 'A', True, 3), (0, 5, 10, 'A', False, 5), (2, 0, 10, 'A', True, 2)])
+    seconds = per_second(columns)
+    assert list(seconds['samples']) == [2, 0, 1]
+    assert list(seconds['errors']) == [1, 0, 0]
+    assert list(seconds['threads']) == [5, 0, 2]
+
+
+def saturating_run(capacity=4, levels=10):
+    """Two seconds per thread level; throughput stops growing at `capacity` threads"""
+    samples = []
+    for threads in range(1, levels + 1):
+        rate = 10 * min(threads, capacity)
+        latency = 100 * max(threads, capacity) // capacity
+        for second in (2 * (threads - 1), 2 * threads - 1):
+            samples += [(second, i * 20, latency, 'A', True, threads) for i in range(rate)]
+    return samples
+
+
+def test_concurrency_curve_per_thread_level(tmp_path):
+    curve = concurrency_curve(columns_for(tmp_path, saturating_run()))
+    assert list(curve['threads']) == list(range(1, 11))
+    assert list(curve['throughput']) == [10, 20, 30, 40, 40, 40, 40, 40, 40, 40]
+    assert list(curve['samples']) == [20, 40, 60, 80, 80, 80, 80, 80, 80, 80]
+    assert list(curve['mean']) == [100, 100, 100, 100, 125, 150, 175, 200, 225, 250]
+    assert list(curve['p95']) == pytest.approx(list(curve['mean']), rel=0.005)
+
+
+def test_concurrency_curve_bins_to_at_most_points_levels(tmp_path):
+    curve = concurrency_curve(columns_for(tmp_path, saturating_run()), points=5)
+    assert list(curve['threads']) == pytest.approx([1 + 2 / 3, 3 + 4 / 7, 5.5, 7.5, 9.5])
+    assert curve['samples'].sum() == 680
+
+
+def test_find_knee_at_the_saturation_level(tmp_path):
+    knee = find_knee(concurrency_curve(columns_for(tmp_path, saturating_run())))
+    assert knee['threads'] == 4
+    assert knee['throughput'] == 40
+    assert knee['p95'] == pytest.approx(100, rel=0.005)
+    # p95 is 200 ms at 8 threads, first above twice the 100 ms baseline at 9
+    assert knee['latency_knee_threads'] == 9
+
+
+def test_find_knee_needs_three_levels(tmp_path):
+    samples = [(0, i, 100, 'A', True, 1) for i in range(5)] + [(1, i, 100, 'A', True, 2) for i in range(9)]
+    assert find_knee(concurrency_curve(columns_for(tmp_path, samples))) is None
+
+
+def test_columns_are_cached_as_memory_mapped_npy_files(tmp_path, monkeypatch):
+    monkeypatch.setattr(jtl_timeseries, 'INGEST_CHUNK_ROWS', 4)
+    path = str(tmp_path / 'run.jtl')
+    samples = [(i // 3, i, 10 + i, 'AB'[i % 2], i % 5 != 0, 1 + i % 4) for i in range(10)]
+    write_jtl(path, samples)
+    columns = load_columns(path)
+    assert sorted(os.listdir(path + '.cols')) == sorted(
+        ['meta.json', 'labels.json'] + [f"{name}.npy" for name, _, _ in jtl_timeseries.COLUMNS])
+    assert isinstance(columns.elapsed, np.memmap)
+    assert len(columns) == 10
+    assert list(columns.elapsed) == [10 + i for i in range(10)]
+    assert list(columns.success) == [i % 5 != 0 for i in range(10)]
+    assert [columns.labels[code] for code in columns.label] == ['AB'[i % 2] for i in range(10)]
+    assert list(columns.all_threads) == [1 + i % 4 for i in range(10)]
+
+    def fail(*args):
+        raise AssertionError('cache was rebuilt')
+
+    monkeypatch.setattr(jtl_timeseries, 'ingest_jtl', fail)
+    assert list(load_columns(path).timestamp) == list(columns.timestamp)
+
+    monkeypatch.undo()
+    write_jtl(path, samples + [(9, 0, 999, 'C', True, 1)])
+    rebuilt = load_columns(path)
+    assert len(rebuilt) == 11
+    assert rebuilt.labels == ['A', 'B', 'C']
+    assert rebuilt.elapsed[-1] == 999
@@ -0,0 +1,273 @@
+import csv
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import unquote
+
+import pytest
+
+from native_runner import run_plan
+from jtl_analyzer import DEFAULT_CSV_COLUMNS
+
+PLAN = """<?xml version="1.0" encoding="UTF-8"?>
+<jmeterTestPlan version="1.2" properties="5.0" jmeter="5.6.3">
+  <hashTree>
+    <TestPlan guiclass="TestPlanGui" testclass="TestPlan" testname="Native" enabled="true"/>
+    <hashTree>
+{groups}    </hashTree>
+  </hashTree>
+</jmeterTestPlan>
+"""
+
+GROUP = """      <ThreadGroup guiclass="ThreadGroupGui" testclass="ThreadGroup" testname="{name}" enabled="true">
+        <stringProp name="ThreadGroup.num_threads">{threads}</stringProp>
+        <stringProp name="ThreadGroup.ramp_time">0</stringProp>
+        <boolProp name="ThreadGroup.scheduler">{scheduler}</boolProp>
+        <stringProp name="ThreadGroup.duration">{duration}</stringProp>
+        <elementProp name="ThreadGroup.main_controller" elementType="LoopController" guiclass="LoopControlPanel" testclass="LoopController" testname="Loop Controller" enabled="true">
+          <stringProp name="LoopController.loops">{loops}</stringProp>
+        </elementProp>
+      </ThreadGroup>
+      <hashTree>
+{children}      </hashTree>
+"""
+
+SAMPLER = """        <HTTPSamplerProxy guiclass="HttpTestSampleGui" testclass="HTTPSamplerProxy" testname="{name}" enabled="true">
+          <stringProp name="HTTPSampler.domain">127.0.0.1</stringProp>
+          <stringProp name="HTTPSampler.port">{port}</stringProp>
+          <stringProp name="HTTPSampler.path">{path}</stringProp>
+          <stringProp name="HTTPSampler.method">{method}</stringProp>
+          <boolProp name="HTTPSampler.follow_redirects">{follow}</boolProp>
+          {keepalive}
+        </HTTPSamplerProxy>
+        <hashTree>
+{headers}        </hashTree>
+"""
+
+HEADER_MANAGER = """          <HeaderManager guiclass="HeaderPanel" testclass="HeaderManager" testname="Headers" enabled="true">
+            <collectionProp name="HeaderManager.headers">
+              <elementProp name="" elementType="Header">
+                <stringProp name="Header.name">X-Note</stringProp>
+                <stringProp name="Header.value">{value}</stringProp>
+              </elementProp>
+            </collectionProp>
+          </HeaderManager>
+          <hashTree/>
+"""
+
+CSV_DATA_SET = """        <CSVDataSet guiclass="TestBeanGUI" testclass="CSVDataSet" testname="Items" enabled="true">
+          <stringProp name="filename">{filename}</stringProp>
+          <stringProp name="variableNames">item</stringProp>
+          <boolProp name="ignoreFirstLine">false</boolProp>
+          <boolProp name="recycle">{recycle}</boolProp>
+          <boolProp name="stopThread">{stop_thread}</boolProp>
+          <stringProp name="shareMode">shareMode.{share}</stringProp>
+        </CSVDataSet>
+        <hashTree/>
+"""
+
+CONSTANT_TIMER = """        <ConstantTimer guiclass="ConstantTimerGui" testclass="ConstantTimer" testname="Think" enabled="true">
+          <stringProp name="ConstantTimer.delay">{delay}</stringProp>
+        </ConstantTimer>
+        <hashTree/>
+"""
+
+REDIRECTS = {'/start': '/middle', '/middle': '/final?from=middle', '/post': '/final', '/loop': '/loop'}
+
+
+class Handler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+    requests = []
+    connections = []
+
+    def _respond(self):
+        length = int(self.headers.get('Content-Length') or 0)
+        if length:
+            self.rfile.read(length)
+        self.requests.append((self.command, self.path))
+        self.connections.append((self.client_address, self.headers.get('Connection')))
+        location = REDIRECTS.get(self.path.split('?')[0])
+        self.send_response(302 if location else 200)
+        if location:
+            self.send_header('Location', location)
+        self.send_header('Content-Length', '4')
+        self.end_headers()
+        self.wfile.write(b'done')
+
+    do_GET = do_POST = _respond
+
+    def log_message(self, format, *args):
+        pass
+
+
+@pytest.fixture
+def server():
+    Handler.requests = []
+    Handler.connections = []
+    httpd = ThreadingHTTPServer(('127.0.0.1', 0), Handler)
+    thread = threading.Thread(target=httpd.serve_forever, daemon=True)
+    thread.start()
+    yield httpd
+    httpd.shutdown()
+    httpd.server_close()
+
+
+def sampler(server, name, path, method='GET', follow='false', header=None, keepalive='true'):
+    return SAMPLER.format(name=name, port=server.server_address[1], path=path, method=method, follow=follow,
+                          headers=HEADER_MANAGER.format(value=header) if header else '',
+                          keepalive=f'<boolProp name="HTTPSampler.use_keepalive">{keepalive}</boolProp>'
+                          if keepalive is not None else '')
+
+
+def group(children, name='Users', threads=1, loops=1, duration=None):
+    return GROUP.format(name=name, threads=threads, loops=loops, children=children,
+                        scheduler='true' if duration else 'false', duration=duration or '')
+
+
+def data_set(tmp_path, items, share='all', recycle='true', stop_thread='false'):
+    path = tmp_path / 'items.csv'
+    path.write_text(''.join(f"{item}\n" for item in items), encoding='utf-8')
+    return CSV_DATA_SET.format(filename=path, share=share, recycle=recycle, stop_thread=stop_thread)
+
+
+def run_groups(tmp_path, *groups):
+    """Run a plan of thread groups; returns the JTL header and rows"""
+    plan = tmp_path / 'plan.jmx'
+    plan.write_text(PLAN.format(groups=''.join(groups)), encoding='utf-8')
+    results = tmp_path / 'results.jtl'
+    run_plan(str(plan), str(results))
+    with open(results, newline='', encoding='utf-8') as f:
+        reader = csv.reader(f)
+        header = next(reader)
+        return header, [dict(zip(header, row)) for row in reader]
+
+
+def run(tmp_path, server, samplers):
+    text = ''.join(sampler(server, name, path, method, follow, header)
+                   for name, path, method, follow, header in samplers)
+    _, rows = run_groups(tmp_path, group(text))
+    return {row['label']: row for row in rows}
+
+
+def items(paths):
+    return sorted(unquote(path.rsplit('/', 1)[1]) for _, path in paths)
+
+
+def test_redirects_are_followed_when_enabled(tmp_path, server):
+    rows = run(tmp_path, server, [('follow', '/start', 'GET', 'true', None),
+                                  ('stay', '/start', 'GET', 'false', None)])
+    assert rows['follow']['responseCode'] == '200'
+    assert rows['follow']['URL'].endswith('/final?from=middle')
+    assert rows['stay']['responseCode'] == '302'
+    assert rows['stay']['URL'].endswith('/start')
+    assert Handler.requests == [('GET', '/start'), ('GET', '/middle'), ('GET', '/final?from=middle'),
+                                ('GET', '/start')]
+
+
+def test_redirected_post_repeats_as_get(tmp_path, server):
+    rows = run(tmp_path, server, [('post', '/post', 'POST', 'true', None)])
+    assert rows['post']['responseCode'] == '200'
+    assert Handler.requests == [('POST', '/post'), ('GET', '/final')]
+
+
+def test_redirect_loops_stop_at_the_limit(tmp_path, server):
+    rows = run(tmp_path, server, [('loop', '/loop', 'GET', 'true', None)])
+    assert rows['loop']['responseCode'] == '302'
+    assert len(Handler.requests) == 21
+
+
+def test_unencodable_header_fails_only_its_sample(tmp_path, server):
+    rows = run(tmp_path, server, [('snowman', '/final', 'GET', 'false', 'sn☃w'),
+                                  ('latin', '/final', 'GET', 'false', 'café'),
+                                  ('after', '/final', 'GET', 'false', None)])
+    assert rows['snowman']['success'] == 'false'
+    assert rows['snowman']['responseCode'] == 'Non HTTP response code: UnicodeEncodeError'
+    assert rows['latin']['responseCode'] == '200'
+    assert rows['after']['responseCode'] == '200'
+
+
+def test_keepalive_is_off_unless_the_sampler_enables_it(tmp_path, server):
+    run_groups(tmp_path, group(sampler(server, 'reuse', '/final'), loops=3))
+    assert {address for address, _ in Handler.connections} == {Handler.connections[0][0]}
+    assert [header for _, header in Handler.connections] == [None] * 3
+
+    for keepalive in ('false', None):
+        Handler.connections = []
+        run_groups(tmp_path, group(sampler(server, 'close', '/final', keepalive=keepalive), loops=3))
+        assert len({address for address, _ in Handler.connections}) == 3
+        assert [header for _, header in Handler.connections] == ['close'] * 3
+
+
+@pytest.mark.parametrize('share, expected', [
+    ('all', ['a', 'b', 'c', 'd']),
+    ('group', ['a', 'a', 'b', 'b']),
+    ('thread', ['a', 'a', 'b', 'b']),
+])
+def test_csv_share_modes_across_groups(tmp_path, server, share, expected):
+    # Two groups of one user each, two iterations per user
+    data = data_set(tmp_path, 'abcd', share=share)
+    run_groups(tmp_path, *[group(data + sampler(server, 'item', '/item/${item}'), name=name, loops=2)
+                           for name in ('First', 'Second')])
+    assert items(Handler.requests) == expected
+
+
+def test_csv_thread_share_mode_within_a_group(tmp_path, server):
+    data = data_set(tmp_path, 'abcd', share='thread')
+    run_groups(tmp_path, group(data + sampler(server, 'item', '/item/${item}'), threads=2, loops=2))
+    assert items(Handler.requests) == ['a', 'a', 'b', 'b']
+
+
+@pytest.mark.parametrize('recycle, stop_thread, expected', [
+    ('true', 'false', ['a', 'a', 'b']),
+    ('false', 'false', ['<EOF>', 'a', 'b']),
+    ('false', 'true', ['a', 'b']),
+])
+def test_csv_end_of_file(tmp_path, server, recycle, stop_thread, expected):
+    data = data_set(tmp_path, 'ab', recycle=recycle, stop_thread=stop_thread)
+    _, rows = run_groups(tmp_path, group(data + sampler(server, 'item', '/item/${item}'), loops=3))
+    assert items(Handler.requests) == expected
+    assert len(rows) == len(expected)
+
+
+def test_constant_timer_delays_each_sample(tmp_path, server):
+    started = time.time() * 1000
+    _, rows = run_groups(tmp_path, group(CONSTANT_TIMER.format(delay=200) + sampler(server, 'think', '/final'),
+                                         loops=3))
+    timestamps = [int(row['timeStamp']) for row in rows]
+    assert timestamps[0] - started >= 190
+    assert all(later - earlier >= 190 for earlier, later in zip(timestamps, timestamps[1:]))
+
+
+def test_loop_count_bounds_each_user(tmp_path, server):
+    _, rows = run_groups(tmp_path, group(sampler(server, 'loop', '/final'), threads=3, loops=4))
+    assert len(rows) == 12
+    assert sorted({row['threadName'] for row in rows}) == ['Users 1-1', 'Users 1-2', 'Users 1-3']
+
+
+def test_duration_ends_infinite_loops(tmp_path, server):
+    started = time.monotonic()
+    _, rows = run_groups(tmp_path, group(CONSTANT_TIMER.format(delay=100) + sampler(server, 'timed', '/final'),
+                                         loops=-1, duration=1))
+    assert time.monotonic() - started < 3
+    assert 3 <= len(rows) <= 11
+    first = int(rows[0]['timeStamp'])
+    assert all(int(row['timeStamp']) - first < 1000 for row in rows)
+
+
+def test_jtl_has_jmeter_default_columns(tmp_path, server):
+    header, rows = run_groups(tmp_path, group(sampler(server, 'Home ${missing}', '/final?q=1')))
+    assert header == list(DEFAULT_CSV_COLUMNS)
+    row, = rows
+    port = server.server_address[1]
+    assert row['label'] == 'Home ${missing}'
+    assert row['responseCode'] == '200'
+    assert row['responseMessage'] == 'OK'
+    assert row['threadName'] == 'Users 1-1'
+    assert row['dataType'] == 'text'
+    assert row['success'] == 'true'
+    assert row['failureMessage'] == ''
+    assert int(row['bytes']) > 4 and int(row['sentBytes']) > 0
+    assert (row['grpThreads'], row['allThreads']) == ('1', '1')
+    assert row['URL'] == f'http://127.0.0.1:{port}/final?q=1'
+    assert 0 <= int(row['Latency']) <= int(row['elapsed'])
+    assert row['IdleTime'] == '0'
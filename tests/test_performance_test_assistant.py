@@ -0,0 +1,38 @@
+import os
+
+import pytest
+
+from jmx_templates import render_plan
+from performance_test_assistant import PerformanceTestAssistant
+from response_cache import CachedResponse, FakeModel
+from telemetry import TELEMETRY
+
+SETUP = "TEST TYPE: Custom\nREQUIRED INFORMATION:\n- Target URL: https://example.com/"
+
+
+class BrokenStream:
+    """Model whose stream fails after a few chunks"""
+
+    def generate_content(self, prompt, stream=False):
+        def chunks():
+            yield CachedResponse('<?xml version="1.0"?>\n<jmeterTestPlan version="1.2">')
+            raise ConnectionError('stream reset')
+        return chunks()
+
+
+def test_failed_stream_leaves_no_files(tmp_path):
+    assistant = PerformanceTestAssistant(model=BrokenStream(), use_templates=False)
+    with pytest.raises(ConnectionError):
+        assistant.generate_and_save_jmx(SETUP, 'load', str(tmp_path))
+    assert os.listdir(tmp_path) == []
+
+
+def test_streamed_plan_counts_encoded_bytes(tmp_path):
+    plan = render_plan({'test_type': 'load', 'name': 'Café ünïcode', 'threads': 5, 'ramp_up': 1,
+                        'duration': 30, 'url': 'https://example.com/'}, use_plugins=False)
+    model = FakeModel(f"Here you go:\n```xml\n{plan}\n```", chunk_size=64)
+    TELEMETRY.reset()
+    filename = PerformanceTestAssistant(model=model, use_templates=False).generate_and_save_jmx(
+        SETUP, 'load', str(tmp_path))
+    assert os.listdir(tmp_path) == [os.path.basename(filename)]
+    assert TELEMETRY.counters['jmx.bytes_written'] == os.path.getsize(filename)
@@ -0,0 +1,146 @@
+import os
+
+import pytest
+
+from jmx_model import JMXDocument
+from plan_lint import PlanLinter, PlanReport
+from telemetry import TELEMETRY
+
+PLANS = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'jmeter-tests', 'test-plans')
+
+PLAN = """<?xml version="1.0" encoding="UTF-8"?>
+<jmeterTestPlan version="1.2" properties="5.0" jmeter="5.6.3">
+  <hashTree>
+    <TestPlan guiclass="TestPlanGui" testclass="TestPlan" testname="{name}" enabled="true"/>
+    <hashTree>
+      <ThreadGroup guiclass="ThreadGroupGui" testclass="ThreadGroup" testname="Users" enabled="true">
+        <stringProp name="ThreadGroup.num_threads">{threads}</stringProp>
+        <stringProp name="ThreadGroup.ramp_time">{ramp}</stringProp>
+        {scheduler}
+        <stringProp name="ThreadGroup.duration">{duration}</stringProp>
+        <elementProp name="ThreadGroup.main_controller" elementType="LoopController" guiclass="LoopControlPanel" testclass="LoopController" testname="Loop Controller" enabled="true">
+          <boolProp name="LoopController.continue_forever">false</boolProp>
+          <stringProp name="LoopController.loops">{loops}</stringProp>
+        </elementProp>
+      </ThreadGroup>
+      <hashTree>
+        <HTTPSamplerProxy guiclass="HttpTestSampleGui" testclass="HTTPSamplerProxy" testname="GET /" enabled="true">
+          <stringProp name="HTTPSampler.domain">example.com</stringProp>
+          <stringProp name="HTTPSampler.path">/</stringProp>
+          {keepalive}
+        </HTTPSamplerProxy>
+        <hashTree/>
+      </hashTree>
+      {listener}
+    </hashTree>
+  </hashTree>
+</jmeterTestPlan>
+"""
+
+LISTENER = """<ResultCollector guiclass="{guiclass}" testclass="ResultCollector" testname="Results" enabled="true">
+        <boolProp name="ResultCollector.error_logging">false</boolProp>
+        <objProp>
+          <name>saveConfig</name>
+          <value class="SampleSaveConfiguration">
+            <time>true</time>
+            <responseData>{response_data}</responseData>
+          </value>
+        </objProp>
+        <stringProp name="filename">results.jtl</stringProp>
+      </ResultCollector>
+      <hashTree/>"""
+
+
+def lint(threads=100, ramp=0, duration=300, loops=-1, scheduler=True, name='Load Test', keepalive='true',
+         listener=''):
+    flag = f'<boolProp name="ThreadGroup.scheduler">{"true" if scheduler else "false"}</boolProp>'
+    plan = PLAN.format(threads=threads, ramp=ramp, duration=duration, loops=loops,
+                       scheduler=flag if scheduler is not None else '', name=name, listener=listener,
+                       keepalive=f'<boolProp name="HTTPSampler.use_keepalive">{keepalive}</boolProp>'
+                       if keepalive is not None else '')
+    return PlanLinter(response_ms=200).lint(JMXDocument.parse(plan), PlanReport('plan.jmx'))
+
+
+def codes(report):
+    return {finding.code for finding in report.findings}
+
+
+def test_sample_plan_with_single_loop_is_bounded_by_ramp_up():
+    report = PlanLinter().lint_file(os.path.join(PLANS, 'my_20250519_142712.jmx'))
+    assert report.samples == 2000
+    assert report.peak_rate == pytest.approx(1000 / 60 * 2)
+    assert report.seconds < 120
+    assert 'scheduler-off' in codes(report)
+
+
+def test_finite_loops_cap_peak_by_arrival_rate():
+    report = lint(threads=600, ramp=60, loops=2, scheduler=None)
+    assert report.samples == 1200
+    # 10 threads/s arrive, each sends 2 requests and leaves
+    assert report.peak_rate == pytest.approx(20)
+    assert report.seconds == pytest.approx(60.4)
+
+
+def test_finite_loops_without_ramp_up_start_together():
+    report = lint(threads=50, ramp=0, loops=10, scheduler=None)
+    assert report.peak_rate == pytest.approx(50 * 5)
+    assert report.seconds == pytest.approx(2)
+
+
+def test_missing_scheduler_ignores_duration():
+    report = lint(loops=-1, scheduler=None)
+    assert {'scheduler-off', 'runs-forever'} <= codes(report)
+    assert report.samples is None
+
+
+def test_scheduled_infinite_loops_run_for_duration():
+    report = lint(threads=10, ramp=0, duration=100, loops=-1, scheduler=True)
+    assert report.peak_rate == pytest.approx(50)
+    assert report.samples == pytest.approx(5000)
+    assert report.seconds == 100
+    assert not {'scheduler-off', 'runs-forever'} & codes(report)
+
+
+def test_linting_is_recorded():
+    TELEMETRY.reset()
+    report = PlanLinter().lint_file(os.path.join(PLANS, 'my_20250519_142712.jmx'))
+    assert TELEMETRY.spans['lint.parse'].count == 1
+    assert TELEMETRY.spans['lint.plan'].count == 1
+    assert TELEMETRY.counters['lint.plans'] == 1
+    assert TELEMETRY.counters['lint.findings'] == len(report.findings)
+
+
+def findings(report, code):
+    return [finding for finding in report.findings if finding.code == code]
+
+
+@pytest.mark.parametrize('name, severity', [
+    ('Load Test', 'error'),
+    ('Stress Test - debug the checkout flow', 'error'),
+    ('Performance Test Plan', 'error'),
+    ('Smoke Test - one user before the load test', 'warning'),
+    ('Debug plan', 'warning'),
+])
+def test_full_results_listener_severity_follows_test_type(name, severity):
+    report = lint(name=name, listener=LISTENER.format(guiclass='ViewResultsFullVisualizer', response_data='false'))
+    assert [finding.severity for finding in findings(report, 'heavy-listener')] == [severity]
+
+
+def test_summary_listener_is_not_heavy():
+    report = lint(listener=LISTENER.format(guiclass='SummaryReport', response_data='false'))
+    assert not findings(report, 'heavy-listener')
+    assert not findings(report, 'payload-saved')
+
+
+def test_saving_response_data_is_flagged_and_sized():
+    saved = lint(listener=LISTENER.format(guiclass='SummaryReport', response_data='true'))
+    plain = lint(listener=LISTENER.format(guiclass='SummaryReport', response_data='false'))
+    assert [finding.severity for finding in findings(saved, 'payload-saved')] == ['warning']
+    assert 'responseData' in findings(saved, 'payload-saved')[0].message
+    assert saved.result_files[0][1] > plain.result_files[0][1]
+
+
+@pytest.mark.parametrize('keepalive, flagged', [('true', False), ('false', True), (None, True)])
+def test_missing_keepalive_is_flagged(keepalive, flagged):
+    report = lint(keepalive=keepalive)
+    assert bool(findings(report, 'no-keepalive')) == flagged
@@ -0,0 +1,114 @@
+import pytest
+
+import response_cache
+from response_cache import CachedModel, FakeModel, ResponseCache, cache_key
+
+
+class Clock:
+    def __init__(self, now=1000.0):
+        self.now = now
+
+    def time(self):
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = Clock()
+    monkeypatch.setattr(response_cache.time, 'time', clock.time)
+    return clock
+
+
+def open_cache(tmp_path, **kwargs):
+    return ResponseCache(str(tmp_path / 'cache.sqlite3'), **kwargs)
+
+
+def test_hits_and_misses_are_counted(tmp_path):
+    cache = open_cache(tmp_path)
+    assert cache.get('a') is None
+    cache.put('a', 'alpha')
+    assert cache.get('a') == 'alpha'
+    assert cache.get('a') == 'alpha'
+    stats = cache.stats()
+    assert (stats['hits'], stats['misses']) == (2, 1)
+    assert stats['hit_rate'] == pytest.approx(2 / 3)
+    assert (stats['entries'], stats['bytes']) == (1, 5)
+
+
+def test_entries_expire_after_ttl(tmp_path, clock):
+    cache = open_cache(tmp_path, ttl=60)
+    cache.put('a', 'alpha')
+    clock.now += 59
+    assert cache.get('a') == 'alpha'
+    clock.now += 2
+    assert cache.get('a') is None
+    assert cache.stats()['entries'] == 0
+    assert cache.stats()['misses'] == 1
+
+
+def test_lru_eviction_by_bytes(tmp_path, clock):
+    cache = open_cache(tmp_path, max_bytes=10)
+    for key in 'abc':
+        clock.now += 1
+        cache.put(key, key * 4)
+    # 12 bytes > 10: the least recently used entry goes
+    assert cache.get('a') is None
+    assert cache.get('b') == 'bbbb'
+    clock.now += 1
+    cache.get('b')
+    clock.now += 1
+    cache.put('d', 'dddd')
+    assert cache.get('c') is None
+    assert cache.get('b') == 'bbbb'
+    assert cache.stats()['bytes'] == 8
+    assert cache.evictions == 2
+
+
+def test_lru_eviction_by_entry_count(tmp_path, clock):
+    cache = open_cache(tmp_path, max_entries=2)
+    for key in 'ab':
+        clock.now += 1
+        cache.put(key, key)
+    clock.now += 1
+    cache.get('a')
+    clock.now += 1
+    cache.put('c', 'c')
+    assert cache.get('b') is None
+    assert cache.get('a') == 'a' and cache.get('c') == 'c'
+    assert cache.stats()['entries'] == 2
+
+
+def test_replacing_an_entry_keeps_totals(tmp_path):
+    cache = open_cache(tmp_path)
+    cache.put('a', 'x' * 10)
+    cache.put('a', 'x' * 3)
+    assert (cache.stats()['entries'], cache.stats()['bytes']) == (1, 3)
+    cache.close()
+    reopened = open_cache(tmp_path)
+    assert (reopened.stats()['entries'], reopened.stats()['bytes']) == (1, 3)
+
+
+def test_cached_model_serves_repeats_offline(tmp_path):
+    model = FakeModel('setup text')
+    cached = CachedModel(model, open_cache(tmp_path), 'fake-model')
+    assert cached.generate_content('prompt').text == 'setup text'
+    assert cached.generate_content('prompt').text == 'setup text'
+    assert model.calls == ['prompt']
+
+
+def test_stream_is_cached_only_after_it_completes(tmp_path):
+    cache = open_cache(tmp_path)
+    model = FakeModel('x' * 1000, chunk_size=100)
+    cached = CachedModel(model, cache, 'fake-model')
+    key = cache_key('fake-model', 'prompt', {})
+
+    stream = cached.generate_content('prompt', stream=True)
+    for _ in range(3):
+        next(stream)
+    stream.close()
+    assert cache.get(key) is None
+
+    chunks = [chunk.text for chunk in cached.generate_content('prompt', stream=True)]
+    assert ''.join(chunks) == 'x' * 1000
+    assert cache.get(key) == 'x' * 1000
+    assert len(model.calls) == 2
@@ -0,0 +1,154 @@
+import os
+import shlex
+import sys
+
+import pytest
+
+import jmeter_runner
+from jmx_templates import render_plan
+from jtl_analyzer import DEFAULT_CSV_COLUMNS
+from results_store import ResultsStore, detect_regressions, format_comparison
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..')
+FAKE_JMETER = [sys.executable, os.path.join(ROOT, 'fake_jmeter.py')]
+
+BASELINE_MEANS = [100, 104, 98, 101, 97, 103, 99, 102]
+BASELINE_P95S = [200, 205, 195, 210, 190, 202, 198, 204]
+
+
+def stats(label='Home', samples=1000, errors=0, mean=100.0, stddev=10.0, p95=200.0):
+    return {'label': label, 'samples': samples, 'errors': errors, 'error_rate': errors / samples,
+            'throughput': samples / 60.0, 'mean': mean, 'stddev': stddev, 'min': 10, 'max': 900,
+            'p50': mean, 'p90': p95 * 0.9, 'p95': p95, 'p99': p95 * 1.5,
+            'received_bytes': samples * 1024, 'sent_bytes': samples * 128, 'duration_ms': 60000}
+
+
+def summary(**kwargs):
+    row = stats(**kwargs)
+    return [row, dict(row, label='TOTAL')]
+
+
+@pytest.fixture
+def store(tmp_path):
+    store = ResultsStore(str(tmp_path / 'results.sqlite3'))
+    for i, (mean, p95) in enumerate(zip(BASELINE_MEANS, BASELINE_P95S)):
+        store.add_summary(summary(mean=mean, p95=p95, errors=5), plan='plan.jmx', started_at=1000 + i)
+    yield store
+    store.close()
+
+
+def write_jtl(path, elapsed):
+    with open(path, 'w', newline='', encoding='utf-8') as f:
+        f.write(','.join(DEFAULT_CSV_COLUMNS) + '\n')
+        for i, value in enumerate(elapsed):
+            f.write(f"{1747657823000 + i * 100},{value},Home,200,OK,Thread Group 1-1,text,true,,"
+                    f"1024,128,1,1,https://example.com/,{value // 2},0,1\n")
+
+
+def findings(report):
+    return {(label['label'], finding['metric']) for label in report['labels'] for finding in label['findings']}
+
+
+def test_ingest_skips_files_already_stored(tmp_path):
+    store = ResultsStore(str(tmp_path / 'results.sqlite3'))
+    path = str(tmp_path / 'run.jtl')
+    write_jtl(path, [100, 120, 140])
+    run_id, is_new = store.ingest(path, plan='plan.jmx')
+    assert is_new
+    assert store.ingest(path, plan='plan.jmx') == (run_id, False)
+    assert store.ingest_directory(str(tmp_path), plan='plan.jmx') == []
+
+    write_jtl(path, [100, 120, 140, 160])
+    os.utime(path, ns=(1, 1))
+    second_id, is_new = store.ingest(path, plan='plan.jmx')
+    assert is_new and second_id != run_id
+    assert [row['samples'] for row in store.run_stats(second_id)] == [4, 4]
+    store.close()
+
+
+def test_baseline_window_holds_earlier_runs_of_the_same_plan(store):
+    other = store.add_summary(summary(), plan='other.jmx', started_at=1003)
+    current = store.add_summary(summary(), plan='plan.jmx', started_at=2000)
+    later = store.add_summary(summary(), plan='plan.jmx', started_at=3000)
+
+    run_ids, rows = store.baseline(store.run(current), window=3)
+    assert run_ids == [8, 7, 6]
+    assert other not in run_ids and later not in run_ids
+    assert sorted(rows) == ['Home', 'TOTAL']
+    assert sorted(row['mean'] for row in rows['Home']) == [99, 102, 103]
+
+
+def test_compare_flags_a_slower_run(store):
+    run_id = store.add_summary(summary(mean=130, p95=260), plan='plan.jmx', started_at=2000)
+    report = store.compare(run_id)
+    assert report['run']['id'] == run_id
+    assert len(report['baseline_runs']) == len(BASELINE_MEANS)
+    assert findings(report) == {('Home', 'mean'), ('Home', 'p95'), ('TOTAL', 'mean'), ('TOTAL', 'p95')}
+    assert 'REGRESSION  Home' in format_comparison(report)
+
+
+def test_compare_accepts_a_run_within_baseline_noise(store):
+    run_id = store.add_summary(summary(mean=103, p95=207, errors=6), plan='plan.jmx', started_at=2000)
+    report = store.compare(run_id)
+    assert report['regressions'] == 0
+    assert 'No regressions detected.' in format_comparison(report)
+
+
+def test_compare_uses_the_requested_run_not_the_latest(store):
+    slow = store.add_summary(summary(mean=130, p95=260), plan='plan.jmx', started_at=2000)
+    store.add_summary(summary(), plan='plan.jmx', started_at=3000)
+    assert store.compare()['regressions'] == 0
+    assert store.compare(slow)['regressions'] > 0
+
+
+def test_welch_ignores_a_trivial_but_significant_slowdown():
+    baseline = [stats(samples=100000, mean=100, stddev=5) for _ in range(5)]
+    current = stats(samples=100000, mean=105, stddev=5)
+    assert detect_regressions(current, baseline) == []
+    current = stats(samples=100000, mean=115, stddev=5)
+    assert [finding['test'] for finding in detect_regressions(current, baseline)] == ['welch']
+
+
+def test_welch_needs_significance_on_small_samples():
+    baseline = [stats(samples=3, mean=100, stddev=80) for _ in range(2)]
+    assert detect_regressions(stats(samples=3, mean=130, stddev=80), baseline) == []
+
+
+def test_p95_uses_median_and_mad_of_the_baseline():
+    baseline = [stats(mean=100, p95=p95) for p95 in BASELINE_P95S + [900]]
+    found = detect_regressions(stats(mean=100, p95=240), baseline)
+    assert [(finding['metric'], finding['test']) for finding in found] == [('p95', 'robust_z')]
+    assert found[0]['baseline'] == 202
+    # One outlier run in the window does not hide or fake a regression
+    assert detect_regressions(stats(mean=100, p95=215), baseline) == []
+
+
+def test_p95_needs_enough_baseline_runs():
+    baseline = [stats(p95=200), stats(p95=200)]
+    assert detect_regressions(stats(p95=400), baseline) == []
+
+
+def test_error_rate_uses_a_two_proportion_test():
+    baseline = [stats(samples=1000, errors=10) for _ in range(5)]
+    found = detect_regressions(stats(samples=1000, errors=40), baseline)
+    assert [(finding['metric'], finding['test']) for finding in found] == [('error_rate', 'two_proportion')]
+    assert found[0]['change'] == pytest.approx(0.03)
+    assert detect_regressions(stats(samples=1000, errors=15), baseline) == []
+    assert detect_regressions(stats(samples=20, errors=1), baseline) == []
+
+
+def test_runner_compares_the_run_it_just_stored(tmp_path, monkeypatch, capsys):
+    monkeypatch.setenv('FAKE_JMETER_DURATION', '1')
+    plan_path = str(tmp_path / 'plan.jmx')
+    with open(plan_path, 'w', encoding='utf-8') as f:
+        f.write(render_plan({'test_type': 'load', 'name': 'Fake', 'threads': 2, 'ramp_up': 0, 'duration': 1,
+                             'url': 'https://example.com/'}, use_plugins=False))
+    db = str(tmp_path / 'results.sqlite3')
+    store = ResultsStore(db)
+    # A run imported from elsewhere that sorts after anything recorded today
+    store.add_summary(summary(), plan=plan_path, started_at=4102444800000)
+    store.close()
+
+    assert jmeter_runner.main([plan_path, '--jmeter', shlex.join(FAKE_JMETER), '--interval', '0.2',
+                               '--store', db]) == 0
+    assert 'Run 2 (' in capsys.readouterr().out
@@ -0,0 +1,85 @@
+import json
+import pstats
+
+from telemetry import Telemetry, format_history, profiled, read_jsonl
+
+
+def recorded():
+    telemetry = Telemetry()
+    telemetry.record('jtl.parse', 0.25)
+    telemetry.record('jtl.parse', 0.75)
+    telemetry.count('jtl.samples', 400)
+    telemetry.count('requests.total', 3)
+    telemetry.count('lint.error_total', 2)
+    telemetry.gauge('memory.top.jtl_analyzer.py:120', 2048)
+    return telemetry
+
+
+def test_prometheus_text_renders_spans_counters_and_gauges():
+    lines = recorded().prometheus_text(prefix='typhon').splitlines()
+    assert lines[:2] == ['# HELP typhon_span_seconds Time spent in instrumented spans',
+                         '# TYPE typhon_span_seconds summary']
+    assert 'typhon_span_seconds_sum{span="jtl.parse"} 1.000000' in lines
+    assert 'typhon_span_seconds_count{span="jtl.parse"} 2' in lines
+    assert 'typhon_span_max_seconds{span="jtl.parse"} 0.750000' in lines
+    assert '# TYPE typhon_jtl_samples_total counter' in lines
+    assert 'typhon_jtl_samples_total 400' in lines
+    assert '# TYPE typhon_memory_top_jtl_analyzer_py_120 gauge' in lines
+    assert 'typhon_memory_top_jtl_analyzer_py_120 2048' in lines
+
+
+def test_prometheus_counters_get_one_total_suffix():
+    text = recorded().prometheus_text(prefix='typhon')
+    assert 'typhon_requests_total 3\n' in text
+    assert 'typhon_lint_error_total 2\n' in text
+    assert '_total_total' not in text
+
+
+def test_prometheus_text_without_spans():
+    telemetry = Telemetry()
+    telemetry.count('llm.calls')
+    assert telemetry.prometheus_text(prefix='x') == '# TYPE x_llm_calls_total counter\nx_llm_calls_total 1\n'
+
+
+def test_write_jsonl_appends_snapshots(tmp_path):
+    telemetry = recorded()
+    path = str(tmp_path / 'history' / 'telemetry.jsonl')
+    first = telemetry.write_jsonl(path, commit='abc123')
+    telemetry.record('jtl.parse', 1.0)
+    telemetry.write_jsonl(path, commit='def456')
+
+    records = read_jsonl(path)
+    assert len(records) == 2
+    assert records[0] == json.loads(json.dumps(first))
+    assert records[0]['commit'] == 'abc123'
+    assert records[0]['spans']['jtl.parse'] == {'count': 2, 'total_ms': 1000.0, 'mean_ms': 500.0,
+                                               'min_ms': 250.0, 'max_ms': 750.0}
+    assert records[0]['counters']['jtl.samples'] == 400
+    assert records[1]['spans']['jtl.parse']['count'] == 3
+    history = format_history(records).splitlines()
+    assert history[2].split()[1:] == ['abc123', '500.000']
+    assert history[3].split()[1:] == ['def456', '666.667']
+
+
+def allocate():
+    return [bytearray(1024) for _ in range(1000)]
+
+
+def test_profiled_records_memory_gauges_and_profile(tmp_path):
+    telemetry = Telemetry()
+    profile = str(tmp_path / 'run.prof')
+    with profiled(profile, trace_memory=True, telemetry=telemetry):
+        blocks = allocate()
+    assert len(blocks) == 1000
+    assert telemetry.gauges['memory.peak_bytes'] >= 1000 * 1024
+    top = {name: size for name, size in telemetry.gauges.items() if name.startswith('memory.top.test_telemetry.py:')}
+    assert max(top.values()) >= 1000 * 1024
+    functions = {name for _, _, name in pstats.Stats(profile).stats}
+    assert 'allocate' in functions
+
+
+def test_profiled_does_nothing_by_default():
+    telemetry = Telemetry()
+    with profiled(telemetry=telemetry):
+        allocate()
+    assert telemetry.gauges == {}
@@ -0,0 +1,19 @@
+from typhon import analyzer_for
+
+
+def test_analyzer_by_extension():
+    assert analyzer_for(['results.jtl']) == 'jtl_analyzer'
+    assert analyzer_for(['results.csv']) == 'jtl_analyzer'
+    assert analyzer_for(['jmeter.log', '--timeline']) == 'jmeter_log'
+    assert analyzer_for(['plan.JMX']) == 'plan_lint'
+
+
+def test_directories_go_to_plan_lint(tmp_path):
+    assert analyzer_for([str(tmp_path)]) == 'plan_lint'
+
+
+def test_option_values_are_not_paths():
+    assert analyzer_for(['--workers', '4', 'jmeter.log']) == 'jmeter_log'
+    assert analyzer_for(['--fail-on', 'warning', 'plan.jmx']) == 'plan_lint'
+    assert analyzer_for(['--workers=4', 'plan.jmx']) == 'plan_lint'
+    assert analyzer_for(['--json']) == 'jtl_analyzer'
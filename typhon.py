@@ -0,0 +1,86 @@
+"""Single command-line entry point for the Typhon tools
+
+Each subcommand imports only the module that implements it, so analysis
+and sanitization never load the Gemini SDK or need an API key.
+
+Usage:
+    python typhon.py generate [--setup setup.txt]
+    python typhon.py sanitize plan.jmx [plan.jmx ...]
+    python typhon.py analyze results.jtl | jmeter.log | plan.jmx
+    python typhon.py run plan.jmx [--results results.jtl]
+    python typhon.py --telemetry .typhon/telemetry.jsonl --trace-memory generate --setup setup.txt
+"""
+import argparse
+import importlib
+import os
+import sys
+
+from telemetry import TELEMETRY, profiled, serve_prometheus
+
+# subcommand: (module whose main(argv) implements it, help)
+COMMANDS = {
+    'generate': ('performance_test_assistant', 'Generate a JMeter test plan with the assistant'),
+    'sanitize': ('jmx_model', 'Sanitize plans in place for JMeter 5.6.3'),
+    'analyze': (None, 'Summarize a JTL file, a jmeter.log, or lint a .jmx plan'),
+    'run': ('jmeter_runner', 'Run a plan locally with live results'),
+}
+
+# analyze picks its backend from the first path: directories are scanned for
+# plans, files go by extension
+ANALYZERS = {
+    '.log': 'jmeter_log',
+    '.jmx': 'plan_lint',
+}
+DIRECTORY_ANALYZER = 'plan_lint'
+DEFAULT_ANALYZER = 'jtl_analyzer'
+
+# Options of the analyzers that take a value, so the value is not taken for the path
+ANALYZE_VALUE_OPTIONS = frozenset(['--workers', '--response-time', '--response-size', '--fail-on'])
+
+
+def analyzer_for(argv):
+    """Module that analyzes the first path argument"""
+    args = iter(argv)
+    for arg in args:
+        if arg.startswith('-'):
+            if arg in ANALYZE_VALUE_OPTIONS:
+                next(args, None)
+            continue
+        if os.path.isdir(arg):
+            return DIRECTORY_ANALYZER
+        return ANALYZERS.get(os.path.splitext(arg)[1].lower(), DEFAULT_ANALYZER)
+    return DEFAULT_ANALYZER
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        description="Generate, sanitize, analyze and run JMeter test plans",
+        epilog="Run 'typhon.py COMMAND --help' for the options of each command.")
+    parser.add_argument('command', choices=COMMANDS, metavar='COMMAND',
+                        help='; '.join(f"{name}: {text}" for name, (_, text) in COMMANDS.items()))
+    parser.add_argument('args', nargs=argparse.REMAINDER, help=argparse.SUPPRESS)
+    parser.add_argument('--telemetry', metavar='FILE',
+                        help='Append span timings and counters for the command to this JSON-lines file')
+    parser.add_argument('--metrics-port', type=int, metavar='PORT',
+                        help='Serve Prometheus metrics on 127.0.0.1:PORT/metrics while the command runs')
+    parser.add_argument('--profile', metavar='FILE', help='Write cProfile stats for the command to FILE')
+    parser.add_argument('--trace-memory', action='store_true',
+                        help='Record the peak heap and largest allocation sites with tracemalloc')
+    args = parser.parse_args(argv)
+
+    module_name = COMMANDS[args.command][0] or analyzer_for(args.args)
+    server = serve_prometheus(args.metrics_port) if args.metrics_port else None
+    try:
+        with TELEMETRY.span(f"command.{args.command}"), profiled(args.profile, args.trace_memory):
+            module = importlib.import_module(module_name)
+            status = module.main(args.args) or 0
+    finally:
+        if args.telemetry:
+            TELEMETRY.write_jsonl(args.telemetry, command=args.command, args=args.args)
+        if server is not None:
+            server.shutdown()
+    return status
+
+
+if __name__ == "__main__":
+    sys.exit(main())